@@ -24,10 +24,10 @@ from supabase_utils import (
 )
 
 from translations import get_translation
+from gemini_clients import get_gemini_client
 
 # Gemini TTS
 try:
-    from google import genai
     from google.genai import types
     GEMINI_AVAILABLE = True
 except ImportError:
@@ -313,7 +313,7 @@ def tts_generate_from_url():
         if not url or not api_key:
             return jsonify({'error': '缺少必要參數'}), 400
 
-        client = genai.Client(api_key=api_key)
+        client = get_gemini_client(api_key)
         webpage_content = fetch_webpage(url)
         conversation = generate_conversation_from_content(
             client, webpage_content, speaker1_name, speaker2_name, language_code
@@ -392,7 +392,7 @@ def tts_generate_manual():
         if not conversation or not api_key:
             return jsonify({'error': '缺少必要參數'}), 400
 
-        client = genai.Client(api_key=api_key)
+        client = get_gemini_client(api_key)
         prompt = f"TTS the following conversation between {speaker1_name} and {speaker2_name}:\n{conversation}"
 
         response = client.models.generate_content(
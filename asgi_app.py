@@ -0,0 +1,328 @@
+"""
+ASGI 服務入口
+auth_app 中只在等待外部網路的路由改以 asyncio 處理，單一進程即可同時保有數百個進行中的
+Gemini／TTS 呼叫與代理請求，不會因為每個請求各佔一條 worker 執行緒而耗盡：
+- /api/tts/speak（單字語音快取讀寫在執行緒中進行）、POST /api/tts/generate-from-url、/api/tts/generate-manual：
+  Gemini 非同步客戶端（client.aio），網頁以 httpx.AsyncClient 抓取
+- /korean-app、/chinese-app：httpx.AsyncClient 串流代理（SERVICE_MODE=inprocess 已在本進程掛載時除外）
+其餘路由經 asgiref 的 WsgiToAsgi 交給原本的 Flask 應用（在執行緒池中執行），行為不變
+
+啟動：uvicorn asgi_app:app --host 0.0.0.0 --port 8080
+"""
+import json
+import urllib.parse
+
+import anyio
+import httpx
+from asgiref.wsgi import WsgiToAsgi
+from flask import Request
+
+import auth_app
+from gemini_clients import get_gemini_client
+from tts_cache import get_tts_cache
+from upstream_proxy import (
+    UPSTREAMS, PROXY_CONNECT_TIMEOUT, PROXY_READ_TIMEOUT, PROXY_POOL_SIZE,
+    request_headers, response_headers
+)
+
+
+flask_app = auth_app.app
+wsgi = WsgiToAsgi(flask_app)
+
+_http_client = None
+
+
+def get_http_client():
+    """獲取共用的 httpx.AsyncClient（需在事件迴圈中呼叫）"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=httpx.Timeout(PROXY_READ_TIMEOUT, connect=PROXY_CONNECT_TIMEOUT),
+            limits=httpx.Limits(max_connections=None, max_keepalive_connections=PROXY_POOL_SIZE),
+            follow_redirects=True,
+            trust_env=False
+        )
+    return _http_client
+
+
+# ==================== 請求與回應 ====================
+
+async def _read_body(receive):
+    chunks = []
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            break
+        chunks.append(message.get('body', b''))
+        if not message.get('more_body'):
+            break
+    return b''.join(chunks)
+
+
+def _headers(scope):
+    return [(name.decode('latin-1'), value.decode('latin-1')) for name, value in scope['headers']]
+
+
+def _session(headers):
+    """以 auth_app 的 session 介面解析 cookie"""
+    cookie = next((value for name, value in headers if name == 'cookie'), '')
+    return flask_app.session_interface.open_session(flask_app, Request({'HTTP_COOKIE': cookie})) or {}
+
+
+async def _respond(send, status, body=b'', headers=()):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(name.lower().encode('latin-1'), value.encode('latin-1')) for name, value in headers]
+    })
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _json(send, status, data):
+    body = json.dumps(data, ensure_ascii=False).encode('utf-8')
+    await _respond(send, status, body, [('Content-Type', 'application/json; charset=utf-8')])
+
+
+async def _json_request(receive):
+    try:
+        return json.loads(await _read_body(receive) or b'{}')
+    except ValueError:
+        return {}
+
+
+# ==================== 非同步 TTS ====================
+
+def _audio_data(response):
+    return response.candidates[0].content.parts[0].inline_data.data
+
+
+async def _fetch_webpage(url):
+    """非同步抓取網頁；HTML 轉 markdown 在執行緒中進行，不阻塞事件迴圈"""
+    try:
+        response = await get_http_client().get(url, headers=auth_app.FETCH_HEADERS, timeout=10)
+        response.raise_for_status()
+        return await anyio.to_thread.run_sync(auth_app.html_to_markdown, response.content)
+    except Exception as e:
+        raise Exception(f"Failed to fetch webpage: {str(e)}")
+
+
+async def tts_speak(scope, receive, send, session):
+    """執行 auth_app.tts_speak_steps 的流程：快取讀寫在執行緒中，Gemini 以非同步客戶端呼叫"""
+    try:
+        if scope['method'] == 'GET':
+            data = dict(urllib.parse.parse_qsl(scope.get('query_string', b'').decode('utf-8')))
+        else:
+            data = await _json_request(receive)
+        cache = get_tts_cache()
+        steps = auth_app.tts_speak_steps(data)
+        result = None
+        while True:
+            try:
+                step = steps.send(result)
+            except StopIteration as done:
+                kind, *outcome = done.value
+                break
+            if step[0] == 'cache_get':
+                result = await anyio.to_thread.run_sync(cache.get, step[1])
+            elif step[0] == 'generate':
+                result = await get_gemini_client(step[1]).aio.models.generate_content(**step[2])
+            else:
+                result = await anyio.to_thread.run_sync(cache.put, step[1], step[2])
+
+        if kind == 'error':
+            return await _json(send, outcome[1], outcome[0])
+        await _speak_response(scope, send, *outcome)
+    except Exception as e:
+        print(f"TTS Error: {e}")
+        await _json(send, 500, {'error': str(e)})
+
+
+async def _speak_response(scope, send, wav, etag):
+    headers = auth_app.speak_headers(etag)
+    if_none_match = next((value for name, value in _headers(scope) if name == 'if-none-match'), None)
+    if auth_app.speak_not_modified(scope['method'], if_none_match, etag):
+        return await _respond(send, 304, headers=headers)
+    await _respond(send, 200, wav, headers + [('Content-Type', 'audio/wav'), ('Content-Length', str(len(wav)))])
+
+
+async def _conversation_audio(data, conversation):
+    """依對話內容生成雙人語音，回傳 PCM"""
+    speaker1_name = data.get('speaker1_name', 'Joe')
+    speaker2_name = data.get('speaker2_name', 'Jane')
+    response = await get_gemini_client(data['api_key']).aio.models.generate_content(
+        model=data.get('model', 'gemini-2.5-flash-preview-tts'),
+        contents=auth_app.conversation_tts_prompt(speaker1_name, speaker2_name, conversation),
+        config=auth_app.conversation_speech_config(
+            speaker1_name, data.get('speaker1_voice', 'Kore'),
+            speaker2_name, data.get('speaker2_voice', 'Puck')
+        )
+    )
+    return _audio_data(response)
+
+
+async def tts_generate_from_url(scope, receive, send, session):
+    if not auth_app.GEMINI_AVAILABLE:
+        return await _json(send, 500, {'error': 'Gemini API not available'})
+
+    try:
+        data = await _json_request(receive)
+        url = data.get('url')
+        if not url or not data.get('api_key'):
+            return await _json(send, 400, {'error': '缺少必要參數'})
+
+        # Step 1: 抓取網頁
+        webpage_content = await _fetch_webpage(url)
+
+        # Step 2: 生成對話
+        try:
+            response = await get_gemini_client(data['api_key']).aio.models.generate_content(
+                model="gemini-2.5-flash",
+                contents=auth_app.conversation_prompt(
+                    webpage_content, data.get('speaker1_name', 'Joe'), data.get('speaker2_name', 'Jane'),
+                    data.get('language', 'en')
+                )
+            )
+            conversation = response.text.strip()
+        except Exception as e:
+            raise Exception(f"Failed to generate conversation: {str(e)}")
+
+        # Step 3: 生成 TTS
+        audio_data = await _conversation_audio(data, conversation)
+        file_name = await anyio.to_thread.run_sync(
+            auth_app.save_audio_file, 'tts', session.get('username', 'user'), audio_data
+        )
+
+        await _json(send, 200, {
+            'success': True,
+            'conversation': conversation,
+            'webpage_content': webpage_content[:1000],
+            'audio_file': file_name,
+            'audio_url': f'/static/audio/{file_name}'
+        })
+    except Exception as e:
+        await _json(send, 500, {'error': str(e)})
+
+
+async def tts_generate_manual(scope, receive, send, session):
+    if not auth_app.GEMINI_AVAILABLE:
+        return await _json(send, 500, {'error': 'Gemini API not available'})
+
+    try:
+        data = await _json_request(receive)
+        conversation = data.get('conversation')
+        if not conversation or not data.get('api_key'):
+            return await _json(send, 400, {'error': '缺少必要參數'})
+
+        audio_data = await _conversation_audio(data, conversation)
+        file_name = await anyio.to_thread.run_sync(
+            auth_app.save_audio_file, 'tts_manual', session.get('username', 'user'), audio_data
+        )
+
+        await _json(send, 200, {
+            'success': True,
+            'audio_file': file_name,
+            'audio_url': f'/static/audio/{file_name}'
+        })
+    except Exception as e:
+        await _json(send, 500, {'error': str(e)})
+
+
+ASYNC_ROUTES = {
+    ('GET', '/api/tts/speak'): tts_speak,
+    ('POST', '/api/tts/speak'): tts_speak,
+    ('POST', '/api/tts/generate-from-url'): tts_generate_from_url,
+    ('POST', '/api/tts/generate-manual'): tts_generate_manual
+}
+
+
+# ==================== 非同步代理 ====================
+
+def _target_url(scope, prefix, base_url):
+    """上游網址：使用未解碼的 raw_path，路徑片段中的 %2F、%3F、%23 原樣轉發，不會變成 / ? #"""
+    raw_path = (scope.get('raw_path') or scope['path'].encode('utf-8')).decode('latin-1')
+    target_url = f"{base_url}/{raw_path[len(prefix) + 1:]}"
+    if scope.get('query_string'):
+        target_url += f"?{scope['query_string'].decode('latin-1')}"
+    return target_url
+
+
+async def proxy(scope, receive, send, session, prefix):
+    if scope['method'] not in ('GET', 'POST', 'DELETE'):
+        return await _json(send, 405, {'error': 'Method Not Allowed'})
+
+    base_url, service_name = UPSTREAMS[prefix]
+    target_url = _target_url(scope, prefix, base_url)
+
+    body = await _read_body(receive)
+    client = get_http_client()
+    upstream_request = client.build_request(
+        scope['method'],
+        target_url,
+        headers=request_headers(_headers(scope), session.get('user_id', ''), session.get('username', '')),
+        content=body or None
+    )
+    try:
+        upstream = await client.send(upstream_request, stream=True)
+    except httpx.TimeoutException as e:
+        return await _json(send, 504, {'error': f'{service_name}回應逾時', 'details': str(e)})
+    except httpx.HTTPError as e:
+        return await _json(send, 503, {'error': f'無法連接到{service_name}', 'details': str(e)})
+
+    try:
+        await send({
+            'type': 'http.response.start',
+            'status': upstream.status_code,
+            'headers': [(name.encode('latin-1'), value.encode('latin-1'))
+                        for name, value in response_headers(upstream.headers.multi_items())]
+        })
+        # aiter_raw：壓縮過的本體原樣轉發
+        async for chunk in upstream.aiter_raw():
+            await send({'type': 'http.response.body', 'body': chunk, 'more_body': True})
+        await send({'type': 'http.response.body', 'body': b''})
+    finally:
+        await upstream.aclose()
+
+
+def _proxy_prefix(path):
+    for prefix in UPSTREAMS:
+        if prefix in auth_app.mounted_services:
+            continue
+        if path == prefix or path.startswith(prefix + '/'):
+            return prefix
+    return None
+
+
+# ==================== ASGI 入口 ====================
+
+async def _lifespan(receive, send):
+    global _http_client
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            if _http_client is not None:
+                await _http_client.aclose()
+                _http_client = None
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        return await _lifespan(receive, send)
+
+    if scope['type'] == 'http':
+        handler = ASYNC_ROUTES.get((scope['method'], scope['path']))
+        prefix = None if handler else _proxy_prefix(scope['path'])
+        if handler or prefix:
+            session = _session(_headers(scope))
+            if 'username' not in session:
+                if prefix:
+                    return await _respond(send, 302, headers=[('Location', '/login')])
+                return await _json(send, 401, {'error': 'Unauthorized'})
+            if prefix:
+                return await proxy(scope, receive, send, session, prefix)
+            return await handler(scope, receive, send, session)
+
+    await wsgi(scope, receive, send)
@@ -1,6 +1,6 @@
 
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, send_file
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response
 import hashlib
 import os
 from datetime import datetime
@@ -10,10 +10,15 @@ import signal
 import sys
 import requests
 import re
-import urllib.parse
 import io
 import wave
 from translations import get_translation
+from gemini_clients import get_gemini_client
+from avatar_store import get_avatar_store, AVATAR_URL_PREFIX, AVATAR_NAME
+from upstream_proxy import proxy_request
+from service_mount import mount_services
+from tts_cache import get_tts_cache, tts_cache_key
+from werkzeug.http import parse_etags, quote_etag
 from dotenv import load_dotenv
 from bs4 import BeautifulSoup
 from markdownify import markdownify as md
@@ -24,6 +29,8 @@ load_dotenv()
 # Supabase 用戶操作
 from supabase_utils import (
     get_user_by_username,
+    get_user_avatar,
+    load_user_profile,
     get_user_by_email,
     create_user,
     update_user,
@@ -35,7 +42,6 @@ from supabase_utils import (
 
 # Gemini TTS 相關
 try:
-    from google import genai
     from google.genai import types
     GEMINI_AVAILABLE = True
 except ImportError:
@@ -48,6 +54,16 @@ app.config['JSON_AS_ASCII'] = False  # 確保 JSON 回應正確處理中文
 app.config['TEMPLATES_AUTO_RELOAD'] = True  # 自動重載模板
 app.config['SEND_FILE_MAX_AGE_DEFAULT'] = 0  # 禁用靜態文件緩存
 
+# 代理的韓文/中文圖譜頁面引用的 /static/graph/ 由本服務提供
+@app.after_request
+def cache_graph_assets(response):
+    """知識圖譜共用的 CSS/JS 帶有版本參數，內容更新時網址也會改變，可長期快取"""
+    if request.path.startswith('/static/graph/') and request.args.get('v'):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+    return response
+
 # TTS 語言和聲音選項
 LANGUAGE_OPTIONS = {
     "English": "en",
@@ -153,63 +169,70 @@ def signal_handler(sig, frame):
 
 signal.signal(signal.SIGINT, signal_handler)
 
+# 單一進程模式（SERVICE_MODE=inprocess）：韓文／中文系統直接掛載在本進程，不啟動子進程也不經 HTTP 代理
+SERVICE_MODE = os.environ.get('SERVICE_MODE', 'subprocess')
+mounted_services = mount_services(app) if SERVICE_MODE == 'inprocess' else []
+
 # 密碼加密函數
 def hash_password(password):
     return hashlib.sha256(password.encode()).hexdigest()
 
 # ==================== TTS 輔助函數 ====================
 
-def fetch_webpage(url):
-    """抓取並轉換網頁為 markdown"""
-    try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        response = requests.get(url, headers=headers, timeout=10)
-        response.raise_for_status()
+FETCH_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+}
 
-        soup = BeautifulSoup(response.content, 'html.parser')
+def html_to_markdown(content):
+    """網頁 HTML 轉換為 markdown（最多 10000 字）"""
+    soup = BeautifulSoup(content, 'html.parser')
 
-        # 移除 script 和 style 元素
-        for script in soup(["script", "style"]):
-            script.decompose()
+    # 移除 script 和 style 元素
+    for script in soup(["script", "style"]):
+        script.decompose()
 
-        # 轉換為 markdown
-        markdown_content = md(str(soup), heading_style="ATX")
+    # 轉換為 markdown
+    markdown_content = md(str(soup), heading_style="ATX")
 
-        # 限制內容長度
-        if len(markdown_content) > 10000:
-            markdown_content = markdown_content[:10000]
+    # 限制內容長度
+    if len(markdown_content) > 10000:
+        markdown_content = markdown_content[:10000]
 
-        return markdown_content
-    except Exception as e:
-        raise Exception(f"Failed to fetch webpage: {str(e)}")
+    return markdown_content
 
-def generate_conversation_from_content(client, content, speaker1_name, speaker2_name, language_code='en'):
-    """使用 Gemini 2.5 Flash 分析內容並生成對話"""
+def fetch_webpage(url):
+    """抓取並轉換網頁為 markdown"""
     try:
-        language_instructions = {
-            'en': 'in English',
-            'zh-cn': 'in Simplified Chinese (简体中文)',
-            'zh-tw': 'in Traditional Chinese (繁體中文)',
-            'ko': 'in Korean (한국어)',
-            'ja': 'in Japanese (日本語)',
-            'es': 'in Spanish (Español)',
-            'fr': 'in French (Français)',
-            'de': 'in German (Deutsch)',
-            'it': 'in Italian (Italiano)',
-            'pt': 'in Portuguese (Português)',
-            'ru': 'in Russian (Русский)',
-            'ar': 'in Arabic (العربية)',
-            'th': 'in Thai (ไทย)',
-            'vi': 'in Vietnamese (Tiếng Việt)',
-            'id': 'in Indonesian (Bahasa Indonesia)',
-            'hi': 'in Hindi (हिन्दी)'
-        }
-
-        lang_instruction = language_instructions.get(language_code, 'in English')
+        response = requests.get(url, headers=FETCH_HEADERS, timeout=10)
+        response.raise_for_status()
+        return html_to_markdown(response.content)
+    except Exception as e:
+        raise Exception(f"Failed to fetch webpage: {str(e)}")
 
-        prompt = f"""Based on the following content, create an engaging and informative conversation between {speaker1_name} and {speaker2_name} {lang_instruction}.
+def conversation_prompt(content, speaker1_name, speaker2_name, language_code='en'):
+    """產生雙人對話的提示詞"""
+    language_instructions = {
+        'en': 'in English',
+        'zh-cn': 'in Simplified Chinese (简体中文)',
+        'zh-tw': 'in Traditional Chinese (繁體中文)',
+        'ko': 'in Korean (한국어)',
+        'ja': 'in Japanese (日本語)',
+        'es': 'in Spanish (Español)',
+        'fr': 'in French (Français)',
+        'de': 'in German (Deutsch)',
+        'it': 'in Italian (Italiano)',
+        'pt': 'in Portuguese (Português)',
+        'ru': 'in Russian (Русский)',
+        'ar': 'in Arabic (العربية)',
+        'th': 'in Thai (ไทย)',
+        'vi': 'in Vietnamese (Tiếng Việt)',
+        'id': 'in Indonesian (Bahasa Indonesia)',
+        'hi': 'in Hindi (हिन्दी)'
+    }
+
+    lang_instruction = language_instructions.get(language_code, 'in English')
+
+    return f"""Based on the following content, create an engaging and informative conversation between {speaker1_name} and {speaker2_name} {lang_instruction}.
 
 The conversation should:
 1. Discuss the main points and key insights from the content
@@ -230,6 +253,11 @@ Generate the conversation in this exact format:
 
 Only output the conversation, nothing else. Remember: ALL dialogue must be {lang_instruction}."""
 
+def generate_conversation_from_content(client, content, speaker1_name, speaker2_name, language_code='en'):
+    """使用 Gemini 2.5 Flash 分析內容並生成對話"""
+    try:
+        prompt = conversation_prompt(content, speaker1_name, speaker2_name, language_code)
+
         response = client.models.generate_content(
             model="gemini-2.5-flash",
             contents=prompt
@@ -248,6 +276,63 @@ def wave_file_to_path(filename, pcm, channels=1, rate=24000, sample_width=2):
         wf.setframerate(rate)
         wf.writeframes(pcm)
 
+def speech_config(voice_name):
+    """單一語音的 TTS 設定"""
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                    voice_name=voice_name,
+                )
+            )
+        )
+    )
+
+def conversation_speech_config(speaker1_name, speaker1_voice, speaker2_name, speaker2_voice):
+    """雙人對話的 TTS 設定"""
+    return types.GenerateContentConfig(
+        response_modalities=["AUDIO"],
+        speech_config=types.SpeechConfig(
+            multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
+                speaker_voice_configs=[
+                    types.SpeakerVoiceConfig(
+                        speaker=speaker1_name,
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name=speaker1_voice,
+                            )
+                        )
+                    ),
+                    types.SpeakerVoiceConfig(
+                        speaker=speaker2_name,
+                        voice_config=types.VoiceConfig(
+                            prebuilt_voice_config=types.PrebuiltVoiceConfig(
+                                voice_name=speaker2_voice,
+                            )
+                        )
+                    ),
+                ]
+            )
+        )
+    )
+
+def conversation_tts_prompt(speaker1_name, speaker2_name, conversation):
+    return f"TTS the following conversation between {speaker1_name} and {speaker2_name}:\n{conversation}"
+
+def save_audio_file(prefix, username, audio_data):
+    """把 PCM 音頻存到 static/audio，回傳檔名"""
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    file_name = f"{prefix}_{username}_{timestamp}.wav"
+    file_path = os.path.join('static', 'audio', file_name)
+
+    # 確保目錄存在
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+
+    # 保存文件
+    wave_file_to_path(file_path, audio_data)
+    return file_name
+
 # 首頁 - 重導向到登入頁
 @app.route('/')
 def index():
@@ -276,7 +361,7 @@ def dashboard():
         return redirect(url_for('login'))
 
     # 獲取用戶的語言設定
-    user = get_user_by_username(session['username'])
+    user = load_user_profile(session['username'])
     lang = 'zh-TW'
     if user and user.get('language'):
         lang = user.get('language', 'zh-TW')
@@ -374,7 +459,7 @@ def get_user_profile():
     if 'username' not in session:
         return jsonify({'success': False, 'message': '未登入'}), 401
 
-    user = get_user_by_username(session['username'])
+    user = load_user_profile(session['username'])
     if user:
         return jsonify({
             'success': True,
@@ -443,7 +528,7 @@ def get_user_settings():
     if 'username' not in session:
         return jsonify({'success': False, 'message': '未登入'}), 401
 
-    user = get_user_by_username(session['username'])
+    user = load_user_profile(session['username'])
     if user:
         settings = {
             'notifications': True,
@@ -515,11 +600,23 @@ def upload_avatar():
     if len(avatar_data) > 2 * 1024 * 1024 * 1.37:  # base64 會比原始大小大約 37%
         return jsonify({'success': False, 'message': '圖片大小超過 2MB 限制'}), 400
 
+    # 解碼、縮圖後存入頭像儲存，資料庫只記錄網址；
+    # 儲存不持久（重新部署會清空）時資料庫保留原本的 data URI，否則網址會在部署後失效
+    try:
+        store = get_avatar_store()
+        avatar_url = store.save_data_uri(avatar_data)
+        if not store.durable:
+            avatar_url = avatar_data
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        return jsonify({'success': False, 'message': f'更新失敗: {str(e)}'}), 500
+
     # 更新用戶頭像
     try:
-        result = update_user(session['username'], {'avatar': avatar_data})
+        result = update_user(session['username'], {'avatar': avatar_url})
         if result.get('success'):
-            return jsonify({'success': True, 'message': '頭像更新成功'})
+            return jsonify({'success': True, 'message': '頭像更新成功', 'avatar': avatar_url})
         else:
             return jsonify({'success': False, 'message': '更新失敗'}), 500
     except Exception as e:
@@ -531,10 +628,37 @@ def get_avatar():
     if 'username' not in session:
         return jsonify({'success': False, 'message': '未登入'}), 401
 
-    user = get_user_by_username(session['username'])
-    if user and 'avatar' in user:
-        return jsonify({'success': True, 'avatar': user['avatar']})
-    return jsonify({'success': True, 'avatar': None})
+    avatar = get_user_avatar(session['username'])
+    # 舊資料仍是 base64 data URI：轉存到持久的頭像儲存並改寫為網址
+    if avatar and avatar.startswith('data:image/') and get_avatar_store().durable:
+        try:
+            avatar_url = get_avatar_store().save_data_uri(avatar)
+            update_user(session['username'], {'avatar': avatar_url})
+            avatar = avatar_url
+        except Exception as e:
+            print(f"頭像轉存失敗: {e}")
+    return jsonify({'success': True, 'avatar': avatar})
+
+# 頭像圖片（內容定址，網址不變則內容不變，可永久快取）
+@app.route(AVATAR_URL_PREFIX + '<name>')
+def serve_avatar(name):
+    if not AVATAR_NAME.match(name):
+        return jsonify({'error': '頭像不存在'}), 404
+    # 檔名即內容雜湊：瀏覽器已有相同 ETag 時直接回 304，不必讀檔
+    etag = name.split('.')[0]
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        avatar = get_avatar_store().load(name)
+        if avatar is None:
+            return jsonify({'error': '頭像不存在'}), 404
+        data, content_type = avatar
+        response = Response(data, mimetype=content_type)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = 31536000
+    response.cache_control.immutable = True
+    return response
 
 # 獲取系統統計
 @app.route('/api/user/stats', methods=['GET'])
@@ -543,7 +667,7 @@ def get_user_stats():
         return jsonify({'success': False, 'message': '未登入'}), 401
 
     try:
-        user = get_user_by_username(session['username'])
+        user = load_user_profile(session['username'])
 
         # 計算使用天數
         days_active = 0
@@ -580,59 +704,7 @@ def get_user_stats():
 def proxy_korean(path):
     if 'username' not in session:
         return redirect(url_for('login'))
-
-    # 構建目標 URL
-    target_url = f'http://localhost:5000/{path}'
-    if request.query_string:
-        target_url += f'?{request.query_string.decode()}'
-
-    # 準備請求參數
-    headers = {key: value for key, value in request.headers if key.lower() != 'host'}
-    headers['X-User-ID'] = session.get('user_id', '')
-    # URL 編碼 username 以避免中文字符導致 Latin-1 編碼錯誤
-    username = session.get('username', '')
-    headers['X-Username'] = urllib.parse.quote(username) if username else ''
-
-    # 轉發請求
-    try:
-        if request.method == 'GET':
-            resp = requests.get(target_url, headers=headers, stream=True)
-        elif request.method == 'POST':
-            resp = requests.post(target_url, headers=headers, data=request.get_data(), stream=True)
-        elif request.method == 'DELETE':
-            resp = requests.delete(target_url, headers=headers, stream=True)
-        else:
-            resp = requests.request(request.method, target_url, headers=headers, data=request.get_data(), stream=True)
-
-        # 處理回應
-        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-        response_headers = [(name, value) for name, value in resp.raw.headers.items()
-                            if name.lower() not in excluded_headers]
-
-        # 如果是 HTML 回應，重寫路徑
-        response_content = resp.content
-        content_type = 'application/octet-stream'
-
-        if resp.headers.get('Content-Type', '').startswith('text/html'):
-            html_content = response_content.decode('utf-8', errors='ignore')
-            # 由於前端已經使用 getBasePath() 動態處理路徑，不需要在代理層重寫 HTML
-            # 只需要確保正確的 Content-Type
-            response_content = html_content.encode('utf-8')
-            content_type = 'text/html; charset=utf-8'
-        elif resp.headers.get('Content-Type'):
-            content_type = resp.headers.get('Content-Type')
-            # 確保 JSON 回應也使用 UTF-8
-            if 'application/json' in content_type and 'charset' not in content_type:
-                content_type = 'application/json; charset=utf-8'
-
-        # 過濾並更新 Content-Type header
-        response_headers = [(name, value) for name, value in response_headers if name.lower() != 'content-type']
-        response_headers.append(('Content-Type', content_type))
-
-        return Response(response_content, resp.status_code, response_headers)
-
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': '無法連接到韓文新聞系統', 'details': str(e)}), 503
+    return proxy_request('/korean-app', path)
 
 # 代理路由：中文詞彙系統 (轉發到 port 5001)
 @app.route('/chinese-app', defaults={'path': ''})
@@ -640,59 +712,7 @@ def proxy_korean(path):
 def proxy_chinese(path):
     if 'username' not in session:
         return redirect(url_for('login'))
-
-    # 構建目標 URL
-    target_url = f'http://localhost:5001/{path}'
-    if request.query_string:
-        target_url += f'?{request.query_string.decode()}'
-
-    # 準備請求參數
-    headers = {key: value for key, value in request.headers if key.lower() != 'host'}
-    headers['X-User-ID'] = session.get('user_id', '')
-    # URL 編碼 username 以避免中文字符導致 Latin-1 編碼錯誤
-    username = session.get('username', '')
-    headers['X-Username'] = urllib.parse.quote(username) if username else ''
-
-    # 轉發請求
-    try:
-        if request.method == 'GET':
-            resp = requests.get(target_url, headers=headers, stream=True)
-        elif request.method == 'POST':
-            resp = requests.post(target_url, headers=headers, data=request.get_data(), stream=True)
-        elif request.method == 'DELETE':
-            resp = requests.delete(target_url, headers=headers, stream=True)
-        else:
-            resp = requests.request(request.method, target_url, headers=headers, data=request.get_data(), stream=True)
-
-        # 處理回應
-        excluded_headers = ['content-encoding', 'content-length', 'transfer-encoding', 'connection']
-        response_headers = [(name, value) for name, value in resp.raw.headers.items()
-                            if name.lower() not in excluded_headers]
-
-        # 如果是 HTML 回應，重寫路徑
-        response_content = resp.content
-        content_type = 'application/octet-stream'
-
-        if resp.headers.get('Content-Type', '').startswith('text/html'):
-            html_content = response_content.decode('utf-8', errors='ignore')
-            # 由於前端已經使用 getBasePath() 動態處理路徑，不需要在代理層重寫 HTML
-            # 只需要確保正確的 Content-Type
-            response_content = html_content.encode('utf-8')
-            content_type = 'text/html; charset=utf-8'
-        elif resp.headers.get('Content-Type'):
-            content_type = resp.headers.get('Content-Type')
-            # 確保 JSON 回應也使用 UTF-8
-            if 'application/json' in content_type and 'charset' not in content_type:
-                content_type = 'application/json; charset=utf-8'
-
-        # 過濾並更新 Content-Type header
-        response_headers = [(name, value) for name, value in response_headers if name.lower() != 'content-type']
-        response_headers.append(('Content-Type', content_type))
-
-        return Response(response_content, resp.status_code, response_headers)
-
-    except requests.exceptions.RequestException as e:
-        return jsonify({'error': '無法連接到中文詞彙系統', 'details': str(e)}), 503
+    return proxy_request('/chinese-app', path)
 
 # 遊戲選單頁面
 @app.route('/games')
@@ -735,61 +755,88 @@ def create_wave_file(pcm_data, channels=1, rate=24000, sample_width=2):
     buffer.seek(0)
     return buffer
 
-@app.route('/api/tts/speak', methods=['POST'])
+# 單字語音固定使用的模型與聲音（預設語音，支援多語言）
+TTS_SPEAK_MODEL = "gemini-2.5-flash-preview-tts"
+TTS_SPEAK_VOICE = "Kore"
+TTS_SPEAK_MAX_AGE = 7 * 24 * 3600
+
+def tts_speak_steps(data):
+    """/api/tts/speak 的共用流程（本模組的同步路由與 asgi_app 的非同步路由共用）
+
+    產生器只決定步驟，I/O 由呼叫端執行並以 send() 送回結果：
+    - ('cache_get', key)：送回快取中的 (wav, etag) 或 None
+    - ('generate', api_key, kwargs)：送回 Gemini generate_content(**kwargs) 的回應
+    - ('cache_put', key, wav)：送回 ETag
+    結束時回傳 ('audio', wav, etag) 或 ('error', {'error': ...}, 狀態碼)
+    """
+    text = data.get('text', '')
+    lang = data.get('lang', 'zh')  # 'zh' 或 'ko'
+    if not text:
+        return 'error', {'error': 'Text is required'}, 400
+
+    # 相同的 (文字, 語言, 聲音, 模型) 只合成一次，之後由磁碟快取回傳
+    key = tts_cache_key(text, lang, TTS_SPEAK_VOICE, TTS_SPEAK_MODEL)
+    cached = yield 'cache_get', key
+    if cached is not None:
+        return ('audio', *cached)
+
+    if not GEMINI_AVAILABLE:
+        return 'error', {'error': 'Gemini TTS not available'}, 503
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        return 'error', {'error': 'GEMINI_API_KEY not configured'}, 500
+
+    response = yield 'generate', api_key, {
+        'model': TTS_SPEAK_MODEL,
+        'contents': text,
+        'config': speech_config(TTS_SPEAK_VOICE)
+    }
+    # 取得音頻資料並轉換為 WAV
+    wav = create_wave_file(response.candidates[0].content.parts[0].inline_data.data).getvalue()
+    etag = yield 'cache_put', key, wav
+    return 'audio', wav, etag
+
+def speak_headers(etag):
+    """單字語音回應的快取標頭（瀏覽器可直接快取）"""
+    return [('ETag', quote_etag(etag)), ('Cache-Control', f'private, max-age={TTS_SPEAK_MAX_AGE}')]
+
+def speak_not_modified(method, if_none_match, etag):
+    """GET 請求的 If-None-Match 是否符合（弱比較：接受 W/ 前綴、多個 ETag 與 *）"""
+    return method == 'GET' and parse_etags(if_none_match).contains_weak(etag)
+
+def speak_response(wav, etag):
+    """單字語音回應；GET 請求可帶 If-None-Match 取得 304"""
+    if speak_not_modified(request.method, request.headers.get('If-None-Match'), etag):
+        return Response(status=304, headers=speak_headers(etag))
+    return Response(wav, mimetype='audio/wav', headers=speak_headers(etag))
+
+@app.route('/api/tts/speak', methods=['GET', 'POST'])
 def tts_speak():
-    """生成單字語音的 API"""
+    """生成單字語音的 API（GET ?text=&lang= 或 POST JSON）"""
     if 'username' not in session:
         return jsonify({'error': 'Unauthorized'}), 401
 
-    if not GEMINI_AVAILABLE:
-        return jsonify({'error': 'Gemini TTS not available'}), 503
-
     try:
-        data = request.json
-        text = data.get('text', '')
-        lang = data.get('lang', 'zh')  # 'zh' 或 'ko'
-
-        if not text:
-            return jsonify({'error': 'Text is required'}), 400
-
-        # 取得 API key
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            return jsonify({'error': 'GEMINI_API_KEY not configured'}), 500
-
-        # 建立 Gemini 客戶端
-        client = genai.Client(api_key=api_key)
-
-        # 選擇適合的語音
-        voice_name = "Kore"  # 預設語音，支援多語言
-
-        # 生成語音
-        response = client.models.generate_content(
-            model="gemini-2.5-flash-preview-tts",
-            contents=text,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    voice_config=types.VoiceConfig(
-                        prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                            voice_name=voice_name,
-                        )
-                    )
-                )
-            )
-        )
-
-        # 取得音頻資料
-        audio_data = response.candidates[0].content.parts[0].inline_data.data
-
-        # 轉換為 WAV
-        wav_buffer = create_wave_file(audio_data)
-
-        return send_file(
-            wav_buffer,
-            mimetype='audio/wav',
-            as_attachment=False
-        )
+        data = request.args if request.method == 'GET' else (request.get_json(silent=True) or {})
+        steps = tts_speak_steps(data)
+        result = None
+        while True:
+            try:
+                step = steps.send(result)
+            except StopIteration as done:
+                kind, *outcome = done.value
+                break
+            if step[0] == 'cache_get':
+                result = get_tts_cache().get(step[1])
+            elif step[0] == 'generate':
+                # 取得共用的 Gemini 客戶端（同一 API key 重用連線）
+                result = get_gemini_client(step[1]).models.generate_content(**step[2])
+            else:
+                result = get_tts_cache().put(step[1], step[2])
+
+        if kind == 'error':
+            return jsonify(outcome[0]), outcome[1]
+        return speak_response(*outcome)
 
     except Exception as e:
         print(f"TTS Error: {e}")
@@ -841,8 +888,8 @@ def tts_generate_from_url():
         if not url or not api_key:
             return jsonify({'error': '缺少必要參數'}), 400
 
-        # 初始化 client
-        client = genai.Client(api_key=api_key)
+        # 取得 client（同一 API key 重用連線）
+        client = get_gemini_client(api_key)
 
         # Step 1: 抓取網頁
         webpage_content = fetch_webpage(url)
@@ -853,52 +900,19 @@ def tts_generate_from_url():
         )
 
         # Step 3: 生成 TTS
-        prompt = f"TTS the following conversation between {speaker1_name} and {speaker2_name}:\n{conversation}"
+        prompt = conversation_tts_prompt(speaker1_name, speaker2_name, conversation)
 
         response = client.models.generate_content(
             model=model,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                        speaker_voice_configs=[
-                            types.SpeakerVoiceConfig(
-                                speaker=speaker1_name,
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name=speaker1_voice,
-                                    )
-                                )
-                            ),
-                            types.SpeakerVoiceConfig(
-                                speaker=speaker2_name,
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name=speaker2_voice,
-                                    )
-                                )
-                            ),
-                        ]
-                    )
-                )
-            )
+            config=conversation_speech_config(speaker1_name, speaker1_voice, speaker2_name, speaker2_voice)
         )
 
         # 提取音頻數據
         audio_data = response.candidates[0].content.parts[0].inline_data.data
 
-        # 生成文件名
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        username = session.get('username', 'user')
-        file_name = f"tts_{username}_{timestamp}.wav"
-        file_path = os.path.join('static', 'audio', file_name)
-
-        # 確保目錄存在
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
         # 保存文件
-        wave_file_to_path(file_path, audio_data)
+        file_name = save_audio_file('tts', session.get('username', 'user'), audio_data)
 
         return jsonify({
             'success': True,
@@ -933,56 +947,23 @@ def tts_generate_manual():
         if not conversation or not api_key:
             return jsonify({'error': '缺少必要參數'}), 400
 
-        # 初始化 client
-        client = genai.Client(api_key=api_key)
+        # 取得 client（同一 API key 重用連線）
+        client = get_gemini_client(api_key)
 
         # 生成 TTS
-        prompt = f"TTS the following conversation between {speaker1_name} and {speaker2_name}:\n{conversation}"
+        prompt = conversation_tts_prompt(speaker1_name, speaker2_name, conversation)
 
         response = client.models.generate_content(
             model=model,
             contents=prompt,
-            config=types.GenerateContentConfig(
-                response_modalities=["AUDIO"],
-                speech_config=types.SpeechConfig(
-                    multi_speaker_voice_config=types.MultiSpeakerVoiceConfig(
-                        speaker_voice_configs=[
-                            types.SpeakerVoiceConfig(
-                                speaker=speaker1_name,
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name=speaker1_voice,
-                                    )
-                                )
-                            ),
-                            types.SpeakerVoiceConfig(
-                                speaker=speaker2_name,
-                                voice_config=types.VoiceConfig(
-                                    prebuilt_voice_config=types.PrebuiltVoiceConfig(
-                                        voice_name=speaker2_voice,
-                                    )
-                                )
-                            ),
-                        ]
-                    )
-                )
-            )
+            config=conversation_speech_config(speaker1_name, speaker1_voice, speaker2_name, speaker2_voice)
         )
 
         # 提取音頻數據
         audio_data = response.candidates[0].content.parts[0].inline_data.data
 
-        # 生成文件名
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        username = session.get('username', 'user')
-        file_name = f"tts_manual_{username}_{timestamp}.wav"
-        file_path = os.path.join('static', 'audio', file_name)
-
-        # 確保目錄存在
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
         # 保存文件
-        wave_file_to_path(file_path, audio_data)
+        file_name = save_audio_file('tts_manual', session.get('username', 'user'), audio_data)
 
         return jsonify({
             'success': True,
@@ -1011,15 +992,23 @@ if __name__ == '__main__':
     print("正在啟動所有服務...")
     print("=" * 50)
 
-    # 啟動所有子服務
-    start_web_app()
-    start_web_app22()
+    # 啟動所有子服務（已在本進程掛載的除外）
+    if '/korean-app' not in mounted_services:
+        start_web_app()
+    if '/chinese-app' not in mounted_services:
+        start_web_app22()
 
     print("\n" + "=" * 50)
     print("所有服務已啟動：")
     print("  - 用戶系統: http://localhost:8080")
-    print("  - 韓文新聞: http://localhost:5000 (代理: /korean-app)")
-    print("  - 中文詞彙: http://localhost:5001 (代理: /chinese-app)")
+    if '/korean-app' in mounted_services:
+        print("  - 韓文新聞: http://localhost:8080/korean-app (本進程)")
+    else:
+        print("  - 韓文新聞: http://localhost:5000 (代理: /korean-app)")
+    if '/chinese-app' in mounted_services:
+        print("  - 中文詞彙: http://localhost:8080/chinese-app (本進程)")
+    else:
+        print("  - 中文詞彙: http://localhost:5001 (代理: /chinese-app)")
     print("  - Gemini TTS: http://localhost:8080/tts (Flask 內建)")
     print("=" * 50)
     print("\n按 Ctrl+C 停止所有服務\n")
@@ -0,0 +1,174 @@
+"""
+用戶頭像儲存
+上傳的 base64 圖片只在上傳時解碼並縮圖一次（需要 Pillow；未安裝時保存原圖），
+以內容的 SHA-256 命名存成二進位檔，users.avatar 只記錄 /avatars/<名稱> 網址；
+相同內容的網址永遠不變，因此可以長期快取
+
+儲存後端可替換：
+- local（預設）：AVATAR_STORE_PATH 目錄，依雜湊前兩碼分子目錄。
+  未設定 AVATAR_STORE_PATH 時使用專案內的 cache/avatars，而 Railway 的容器磁碟是暫時性的，
+  每次重新部署都會清空；此時視為非持久儲存（durable=False），users.avatar 仍保存原本的 data URI，
+  不改寫為網址。把 AVATAR_STORE_PATH 指到掛載的 Volume 才視為持久儲存
+- supabase：Supabase Storage 的 AVATAR_BUCKET，重新部署後仍然保留
+"""
+import base64
+import binascii
+import hashlib
+import io
+import os
+import re
+
+try:
+    from PIL import Image, ImageOps
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'avatars')
+AVATAR_URL_PREFIX = '/avatars/'
+AVATAR_MAX_PIXELS = 256          # 縮圖後的最長邊
+MAX_UPLOAD_BYTES = 2 * 1024 * 1024
+
+CONTENT_TYPES = {
+    'png': 'image/png',
+    'jpg': 'image/jpeg',
+    'gif': 'image/gif',
+    'webp': 'image/webp'
+}
+_EXTENSIONS = {'image/jpeg': 'jpg', 'image/jpg': 'jpg', 'image/png': 'png', 'image/gif': 'gif', 'image/webp': 'webp'}
+_DATA_URI = re.compile(r'^data:(image/[\w.+-]+);base64,(.*)$', re.DOTALL)
+AVATAR_NAME = re.compile(r'^[0-9a-f]{64}\.(png|jpg|gif|webp)$')
+
+
+class LocalAvatarBackend:
+    def __init__(self, root=DEFAULT_STORE_PATH, durable=False):
+        self.root = root
+        self.durable = durable
+
+    def _path(self, name):
+        return os.path.join(self.root, name[:2], name)
+
+    def exists(self, name):
+        return os.path.exists(self._path(name))
+
+    def put(self, name, data, content_type):
+        path = self._path(name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先寫暫存檔再改名，並行上傳同一張圖也不會讀到寫一半的檔案
+        tmp = f"{path}.{os.getpid()}.tmp"
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, name):
+        try:
+            with open(self._path(name), 'rb') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+
+class SupabaseAvatarBackend:
+    durable = True
+
+    def __init__(self, bucket='avatars'):
+        from supabase_utils import get_supabase_client
+        self.bucket = get_supabase_client().storage.from_(bucket)
+
+    def exists(self, name):
+        # 內容定址：同名即同內容，重複上傳以 upsert 覆寫即可
+        return False
+
+    def put(self, name, data, content_type):
+        self.bucket.upload(name, data, {'content-type': content_type, 'upsert': 'true'})
+
+    def get(self, name):
+        try:
+            return self.bucket.download(name)
+        except Exception as e:
+            print(f"Error downloading avatar {name}: {e}")
+            return None
+
+
+def decode_data_uri(avatar_data):
+    """解析 data:image/...;base64,... 回傳 (bytes, content_type)；格式錯誤時回傳 None"""
+    match = _DATA_URI.match(avatar_data or '')
+    if not match or match.group(1) not in _EXTENSIONS:
+        return None
+    try:
+        return base64.b64decode(match.group(2), validate=False), match.group(1)
+    except (binascii.Error, ValueError):
+        return None
+
+
+def _thumbnail(data, content_type):
+    """縮圖到最長邊 AVATAR_MAX_PIXELS；動畫 GIF 與無法解析的圖片保持原樣"""
+    if not PIL_AVAILABLE:
+        return data, _EXTENSIONS[content_type]
+    try:
+        image = Image.open(io.BytesIO(data))
+        if getattr(image, 'is_animated', False):
+            return data, _EXTENSIONS[content_type]
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((AVATAR_MAX_PIXELS, AVATAR_MAX_PIXELS))
+        output = io.BytesIO()
+        if image.mode in ('RGBA', 'LA', 'P'):
+            image.save(output, format='PNG', optimize=True)
+            return output.getvalue(), 'png'
+        image.convert('RGB').save(output, format='JPEG', quality=85, optimize=True)
+        return output.getvalue(), 'jpg'
+    except Exception as e:
+        print(f"Error resizing avatar: {e}")
+        return data, _EXTENSIONS[content_type]
+
+
+class AvatarStore:
+    def __init__(self, backend):
+        self.backend = backend
+
+    @property
+    def durable(self):
+        """重新部署後檔案是否仍在；False 時不可讓 users.avatar 只記錄網址"""
+        return self.backend.durable
+
+    def save_data_uri(self, avatar_data):
+        """儲存上傳的 data URI，回傳 /avatars/<名稱>；格式錯誤或過大時拋出 ValueError"""
+        decoded = decode_data_uri(avatar_data)
+        if decoded is None:
+            raise ValueError('無效的圖片格式')
+        data, content_type = decoded
+        if len(data) > MAX_UPLOAD_BYTES:
+            raise ValueError('圖片大小超過 2MB 限制')
+        data, extension = _thumbnail(data, content_type)
+        name = f"{hashlib.sha256(data).hexdigest()}.{extension}"
+        if not self.backend.exists(name):
+            self.backend.put(name, data, CONTENT_TYPES[extension])
+        return AVATAR_URL_PREFIX + name
+
+    def load(self, name):
+        """回傳 (bytes, content_type)；名稱無效或不存在時回傳 None"""
+        match = AVATAR_NAME.match(name)
+        if not match:
+            return None
+        data = self.backend.get(name)
+        return (data, CONTENT_TYPES[match.group(1)]) if data is not None else None
+
+
+# 全局實例
+avatar_store = None
+
+def get_avatar_store():
+    """獲取全局頭像儲存實例（AVATAR_BACKEND=local|supabase）"""
+    global avatar_store
+    if avatar_store is None:
+        if os.environ.get('AVATAR_BACKEND') == 'supabase':
+            backend = SupabaseAvatarBackend(os.environ.get('AVATAR_BUCKET', 'avatars'))
+        elif os.environ.get('AVATAR_STORE_PATH'):
+            backend = LocalAvatarBackend(os.environ['AVATAR_STORE_PATH'], durable=True)
+        else:
+            backend = LocalAvatarBackend(DEFAULT_STORE_PATH)
+            print("✗ 頭像存於暫時性磁碟（未設定 AVATAR_BACKEND=supabase 或 AVATAR_STORE_PATH），"
+                  "資料庫保留原始圖片資料")
+        avatar_store = AvatarStore(backend)
+    return avatar_store
@@ -0,0 +1,69 @@
+"""
+Gemini 客戶端登錄表
+同一進程內每個 API key 只建立一次 genai.Client（或 smolagents 的 LiteLLMModel），
+之後所有分析與 TTS 請求都重用同一個物件與其 HTTP 連線池，避免每次請求重新握手
+"""
+import os
+import threading
+from collections import OrderedDict
+
+try:
+    from google import genai
+    GENAI_AVAILABLE = True
+except ImportError:
+    GENAI_AVAILABLE = False
+
+try:
+    from smolagents import LiteLLMModel
+    SMOLAGENTS_AVAILABLE = True
+except ImportError:
+    SMOLAGENTS_AVAILABLE = False
+
+
+DEFAULT_LITELLM_MODEL = "gemini/gemini-2.0-flash"
+# 用戶自帶 API key 的 TTS 請求也會建立客戶端，上限內以最近使用順序保留
+MAX_CLIENTS = 32
+
+_lock = threading.Lock()
+_clients = OrderedDict()   # api_key -> genai.Client
+_models = OrderedDict()    # (model_id, api_key) -> LiteLLMModel
+
+
+def _get_or_create(registry, key, factory):
+    with _lock:
+        instance = registry.get(key)
+        if instance is not None:
+            registry.move_to_end(key)
+            return instance
+        instance = factory()
+        registry[key] = instance
+        while len(registry) > MAX_CLIENTS:
+            registry.popitem(last=False)
+        return instance
+
+
+def get_gemini_client(api_key=None):
+    """取得共用的 genai.Client；未指定 api_key 時使用 GEMINI_API_KEY 環境變數"""
+    if not GENAI_AVAILABLE:
+        raise RuntimeError("google-genai SDK 未安裝")
+    api_key = api_key or os.environ.get('GEMINI_API_KEY')
+    if not api_key:
+        raise ValueError("需要 GEMINI_API_KEY 環境變數")
+    return _get_or_create(_clients, api_key, lambda: genai.Client(api_key=api_key))
+
+
+def get_litellm_model(model_id=DEFAULT_LITELLM_MODEL, api_key=None):
+    """取得共用的 smolagents LiteLLMModel（web_app / web_app22 的分析工具使用）"""
+    if not SMOLAGENTS_AVAILABLE:
+        raise RuntimeError("smolagents 未安裝")
+    api_key = api_key or os.environ.get('GEMINI_API_KEY')
+    if not api_key:
+        raise ValueError("需要 GEMINI_API_KEY 環境變數")
+    return _get_or_create(
+        _models, (model_id, api_key), lambda: LiteLLMModel(model_id=model_id, token=api_key)
+    )
+
+
+def registry_stats():
+    with _lock:
+        return {'clients': len(_clients), 'models': len(_models)}
@@ -23,10 +23,10 @@ from supabase_utils import (
     create_user,
     update_last_login
 )
+from gemini_clients import get_gemini_client
 
 # Gemini TTS 相關
 try:
-    from google import genai
     from google.genai import types
     GEMINI_AVAILABLE = True
 except ImportError:
@@ -271,8 +271,8 @@ def generate_from_url():
         if not url or not api_key:
             return jsonify({'error': '缺少必要參數'}), 400
 
-        # 初始化 client
-        client = genai.Client(api_key=api_key)
+        # 取得 client（同一 API key 重用連線）
+        client = get_gemini_client(api_key)
 
         # Step 1: 抓取網頁
         webpage_content = fetch_webpage(url)
@@ -361,8 +361,8 @@ def generate_manual():
         if not conversation or not api_key:
             return jsonify({'error': '缺少必要參數'}), 400
 
-        # 初始化 client
-        client = genai.Client(api_key=api_key)
+        # 取得 client（同一 API key 重用連線）
+        client = get_gemini_client(api_key)
 
         # 生成 TTS
         prompt = f"TTS the following conversation between {speaker1_name} and {speaker2_name}:\n{conversation}"
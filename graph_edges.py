@@ -0,0 +1,196 @@
+"""
+知識圖譜連線建立
+依詞彙之間的實際關係計算連線，取代隨機連線：
+- 共用字元（字元集合的 Jaccard 相似度）
+- 字元 n-gram 相似度（雙字／三字組的餘弦相似度）
+- 相同 TOCFL 級數、相同 TOCFL 情境（僅中文）
+- 在原文同一句中共同出現
+
+所有分數以 NumPy 矩陣一次計算（n×n），再對每個詞只保留分數最高的 top-k 條連線；
+Python 迴圈只走訪每個詞的字元與選出的連線，不會逐對比較
+"""
+import re
+
+import numpy as np
+
+
+# 各項關係的權重；未提供的關係（例如韓文沒有 TOCFL 級數）不參與加權
+EDGE_WEIGHTS = {
+    'chars': 0.3,
+    'ngrams': 0.2,
+    'level': 0.1,
+    'situation': 0.15,
+    'cooccurrence': 0.25
+}
+DEFAULT_TOP_K = 3
+DEFAULT_MIN_SCORE = 0.05
+# n-gram 長度（單字已由 chars 計算）
+_NGRAM_SIZES = (2, 3)
+# 原文切句（中文與韓文標點皆適用）
+_SENTENCE_SPLIT = re.compile(r'[。！？!?；;.\n]+')
+# 「核心詞」涵蓋大量基礎詞，不代表特定情境
+_GENERIC_SITUATIONS = {'核心詞'}
+
+
+def _incidence(rows_items, n):
+    """將每列的項目集合轉成 n×m 的 0/1 矩陣"""
+    vocab = {}
+    rows, cols = [], []
+    for i, items in enumerate(rows_items):
+        for item in set(items):
+            rows.append(i)
+            cols.append(vocab.setdefault(item, len(vocab)))
+    matrix = np.zeros((n, max(len(vocab), 1)), dtype=np.float32)
+    if rows:
+        matrix[rows, cols] = 1.0
+    return matrix
+
+
+def _jaccard(a, b):
+    """集合 Jaccard 相似度：|A∩B| / |A∪B|"""
+    inter = a @ b.T
+    union = a.sum(axis=1)[:, None] + b.sum(axis=1)[None, :] - inter
+    return np.divide(inter, union, out=np.zeros_like(inter), where=union > 0)
+
+
+def _normalize(matrix):
+    norms = np.linalg.norm(matrix, axis=1)
+    return np.divide(matrix, norms[:, None], out=np.zeros_like(matrix), where=norms[:, None] > 0)
+
+
+def _cosine(a, b):
+    return _normalize(a) @ _normalize(b).T
+
+
+def _ngrams(word):
+    return [word[i:i + size] for size in _NGRAM_SIZES for i in range(len(word) - size + 1)]
+
+
+def _same_category(values, others):
+    """相同類別矩陣；空值（未分級、無情境）不與任何詞相同"""
+    codes = {}
+    a = np.array([codes.setdefault(v, len(codes)) if v else -1 for v in values])
+    b = np.array([codes.setdefault(v, len(codes)) if v else -1 for v in others])
+    return ((a[:, None] == b[None, :]) & (a[:, None] >= 0)).astype(np.float32)
+
+
+def _specific_situations(situations):
+    return [s if s not in _GENERIC_SITUATIONS else None for s in situations]
+
+
+def _cooccurrence(words, text):
+    """原文同句共現：詞 × 句子的出現矩陣，相似度以餘弦正規化
+
+    所有詞合併成一個正則（長詞優先），以前瞻方式掃描每一句一次，
+    因此不需要逐詞逐句比對
+    """
+    unique = sorted({w for w in words if w}, key=len, reverse=True)
+    if not unique:
+        return None
+    pattern = re.compile('(?=(' + '|'.join(map(re.escape, unique)) + '))')
+    index = {}
+    for i, word in enumerate(words):
+        index.setdefault(word, []).append(i)
+
+    sentences = [s for s in _SENTENCE_SPLIT.split(text) if s.strip()]
+    rows_items = [[] for _ in words]
+    for s, sentence in enumerate(sentences):
+        for match in pattern.finditer(sentence):
+            for i in index.get(match.group(1), ()):
+                rows_items[i].append(s)
+    if not any(rows_items):
+        return None
+    occurrence = _incidence(rows_items, len(words))
+    return _cosine(occurrence, occurrence)
+
+
+def _features(words, others, levels, other_levels, situations, other_situations):
+    """字元、n-gram、級數、情境四項關係（len(words) × len(others)）"""
+    n = len(words)
+    combined = list(words) + list(others)
+    chars = _incidence(combined, len(combined))
+    ngrams = _incidence([_ngrams(w) for w in combined], len(combined))
+    features = {
+        'chars': _jaccard(chars[:n], chars[n:]),
+        'ngrams': _cosine(ngrams[:n], ngrams[n:])
+    }
+    if levels is not None and other_levels is not None:
+        features['level'] = _same_category(levels, other_levels)
+    if situations is not None and other_situations is not None:
+        features['situation'] = _same_category(
+            _specific_situations(situations), _specific_situations(other_situations)
+        )
+    return features
+
+
+def _combine(features, weights):
+    total_weight = sum(weights[name] for name in features)
+    return sum(weights[name] * matrix for name, matrix in features.items()) / total_weight
+
+
+def score_rows(words, others, levels=None, other_levels=None, situations=None, other_situations=None,
+               weights=EDGE_WEIGHTS):
+    """words 中每個詞對 others 中每個詞的關係分數（len(words) × len(others)）
+
+    供增量更新使用（例如新收藏的詞對既有收藏），不含原文共現
+    """
+    return _combine(_features(words, others, levels, other_levels, situations, other_situations), weights)
+
+
+def score_matrix(words, text=None, levels=None, situations=None, weights=EDGE_WEIGHTS):
+    """計算詞彙兩兩之間的關係分數（0～1），對角線為 0"""
+    features = _features(words, words, levels, levels, situations, situations)
+    if text:
+        cooccurrence = _cooccurrence(words, text)
+        if cooccurrence is not None:
+            features['cooccurrence'] = cooccurrence
+
+    scores = _combine(features, weights)
+    np.fill_diagonal(scores, 0.0)
+    return scores
+
+
+def top_k_neighbours(scores, top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+    """每列保留分數最高的 top_k 欄，回傳 (列索引, 欄索引, 分數) 三個陣列"""
+    rows, cols = scores.shape
+    k = min(top_k, cols)
+    if rows == 0 or k == 0:
+        empty = np.array([], dtype=int)
+        return empty, empty, np.array([], dtype=scores.dtype)
+    neighbours = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    sources = np.repeat(np.arange(rows), k)
+    targets = neighbours.ravel()
+    picked = scores[sources, targets]
+    keep = picked > min_score
+    return sources[keep], targets[keep], picked[keep]
+
+
+def link_values(scores):
+    """關係分數換算為 1～3 的線寬等級"""
+    return np.clip(np.ceil(np.asarray(scores) * 3), 1, 3).astype(int)
+
+
+def build_links(words, text=None, levels=None, situations=None,
+                top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+    """建立圖譜連線 [{'source', 'target', 'value', 'score'}]
+
+    每個詞保留分數最高的 top_k 個鄰居（低於 min_score 的捨棄），
+    兩端互選的連線只保留一條；value 為 1～3 的線寬等級
+    """
+    n = len(words)
+    if n < 2:
+        return []
+    scores = score_matrix(words, text=text, levels=levels, situations=situations)
+    sources, targets, picked = top_k_neighbours(scores, top_k, min_score)
+
+    # 無向邊去重：以 (小索引, 大索引) 編碼
+    low = np.minimum(sources, targets)
+    high = np.maximum(sources, targets)
+    codes, first = np.unique(low * n + high, return_index=True)
+    edge_scores = picked[first]
+    values = link_values(edge_scores)
+
+    return [
+        {'source': int(code // n), 'target': int(code % n), 'value': int(value), 'score': round(float(score), 3)}
+        for code, value, score in zip(codes, values, edge_scores)
+    ]
@@ -0,0 +1,129 @@
+"""
+知識圖譜檢視
+分析結果以 JSON 存在結果快取，圖譜頁面只有一個與圖譜 ID 無關的檢視頁（templates/graph/），
+由瀏覽器讀取 /…/graph/<id>.json 後執行 static/graph/ 中共用的 CSS/JS；
+檢視頁與 CSS/JS 可由瀏覽器快取，圖譜資料則以 ETag 驗證
+
+個人詞彙總圖譜（/…/my-graph）使用同一個檢視頁，資料改由 vocab_graph 依頁數或級數取出子圖
+"""
+import hashlib
+import json
+import os
+import re
+from flask import render_template, request, jsonify, make_response, send_file
+from result_cache import get_result_cache
+from graph_layout import add_layout
+from vocab_graph import get_vocab_graph, DEFAULT_PAGE_SIZE
+
+
+ASSET_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'static', 'graph')
+
+GRAPH_VIEWER_MAX_AGE = 3600          # 檢視頁與圖譜 ID 無關，可讓瀏覽器（公開頁面另含 CDN）快取
+
+MY_GRAPH_SOURCE = '我的詞彙（全部收藏）'
+
+# 舊版分析結果輸出的 HTML 檔名（只允許讀取這種檔案）
+_LEGACY_GRAPH_FILE = re.compile(r'^(korean|chinese)_graph_\d+words_\d{8}_\d{6}\.html$')
+
+
+def _asset_version():
+    """以共用 CSS/JS 的最後修改時間作為版本參數，檔案更新後瀏覽器會重新下載"""
+    try:
+        return str(int(max(os.path.getmtime(os.path.join(ASSET_DIR, name)) for name in os.listdir(ASSET_DIR))))
+    except (OSError, ValueError):
+        return '0'
+
+
+ASSET_VERSION = _asset_version()
+
+
+def save_graph_result(graph_id, message, source, graph):
+    """把圖譜資料寫入結果快取（有保留期限與容量上限）；大型圖譜先在伺服器端計算佈局"""
+    add_layout(graph)
+    get_result_cache().put(graph_id, {
+        'message': message,
+        'source': source,
+        'word_count': len(graph['nodes']),
+        'graph': graph
+    })
+
+
+def graph_viewer_response(template_name, urls, private=False):
+    """單一圖譜檢視頁：不含資料，由瀏覽器依網址讀取 /…/graph/<id>.json
+
+    需要登入的頁面（例如 /…/my-graph）傳入 private=True，只允許瀏覽器快取，共用快取不可保存
+    """
+    response = make_response(render_template(template_name, urls=urls, asset_version=ASSET_VERSION))
+    if private:
+        response.cache_control.private = True
+    else:
+        response.cache_control.public = True
+    response.cache_control.max_age = GRAPH_VIEWER_MAX_AGE
+    return response
+
+
+def graph_data_response(graph_id, scope_prefix):
+    """回傳結果快取中的圖譜資料，支援 ETag / If-None-Match
+
+    圖譜 ID 只是輸入文字的雜湊，同一 ID 的圖譜可能被重新分析改寫，
+    因此 ETag 取自實際回傳的資料，且每次都需向伺服器確認
+    """
+    if not graph_id.startswith(scope_prefix):
+        return jsonify({'error': '圖譜不存在'}), 404
+    # 檢視圖譜不是分析結果的重複使用：唯讀查詢，不影響命中統計與淘汰順序
+    result = get_result_cache().peek(graph_id)
+    if not result:
+        return jsonify({'error': '圖譜不存在或已過期'}), 404
+
+    response = jsonify(dict(result['graph'], source=result['source']))
+    response.set_etag(hashlib.sha256(response.get_data()).hexdigest()[:32])
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
+def vocab_graph_response(user_id, language, load_words):
+    """個人詞彙總圖譜的一頁子圖（?page=&page_size=&level=&category=）
+
+    第一次查詢時以 load_words(user_id) 取得的收藏清單建立圖譜，之後由收藏變更增量更新；
+    ETag 含圖譜版本號，收藏未變時直接回應 304
+    """
+    graph = get_vocab_graph()
+    version = graph.version(user_id, language)
+    if version is None:
+        if not graph.build(user_id, language, load_words):
+            # 建立期間收藏一直在變動
+            response = jsonify({'error': '圖譜建立中，請稍後再試'})
+            response.status_code = 503
+            response.headers['Retry-After'] = '5'
+            return response
+        version = graph.version(user_id, language)
+
+    page = request.args.get('page', 1, type=int)
+    page_size = request.args.get('page_size', DEFAULT_PAGE_SIZE, type=int)
+    level = request.args.get('level') or None
+    category = request.args.get('category') or None
+    etag = hashlib.sha256(
+        json.dumps([user_id, language, version, page, page_size, level, category], ensure_ascii=False).encode('utf-8')
+    ).hexdigest()[:32]
+
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        subgraph = add_layout(graph.subgraph(user_id, language, page, page_size, level, category))
+        response = jsonify(dict(subgraph, source=MY_GRAPH_SOURCE))
+    response.set_etag(etag)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def legacy_graph_file_response(filename, language):
+    """提供舊版寫入磁碟的圖譜 HTML 檔案"""
+    match = _LEGACY_GRAPH_FILE.match(filename)
+    if not match or match.group(1) != language:
+        return jsonify({'error': '文件未找到'}), 404
+    try:
+        return send_file(filename, as_attachment=False, mimetype='text/html; charset=utf-8')
+    except FileNotFoundError:
+        return jsonify({'error': '文件未找到'}), 404
@@ -0,0 +1,144 @@
+"""
+分析任務排程器
+固定數量的 worker 執行緒依提交順序（FIFO）取出任務，並限制每位用戶同時排隊/執行的任務數；
+佇列已滿或用戶超過上限時拒絕新任務，由路由以 queue_rejection_response 回應 HTTP 429
+"""
+import os
+import threading
+from collections import deque
+
+from flask import jsonify
+
+
+DEFAULT_MAX_WORKERS = 4
+DEFAULT_MAX_QUEUE = 100
+DEFAULT_PER_USER_LIMIT = 2
+
+
+class JobScheduler:
+    def __init__(self, max_workers=DEFAULT_MAX_WORKERS, max_queue=DEFAULT_MAX_QUEUE,
+                 per_user_limit=DEFAULT_PER_USER_LIMIT, name='job'):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.per_user_limit = per_user_limit
+        self.name = name
+
+        self._cond = threading.Condition()
+        self._queue = deque()     # 排隊中的 job_id，依提交順序
+        self._jobs = {}           # job_id -> (user_id, fn, args)
+        self._user_jobs = {}      # user_id -> 排隊中 + 執行中的任務數
+        self._running = 0
+        self._workers = []
+
+    def _start_workers(self):
+        # 第一次提交任務時才啟動執行緒，避免 gunicorn fork 前就建立執行緒
+        while len(self._workers) < self.max_workers:
+            worker = threading.Thread(
+                target=self._worker_loop,
+                name=f"{self.name}-worker-{len(self._workers)}",
+                daemon=True
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def submit(self, job_id, user_id, fn, args=()):
+        """提交任務，依提交順序執行
+
+        回傳 {'accepted': True, 'queue_position': n}，
+        或 {'accepted': False, 'error': 'user_limit' | 'queue_full', 'queue_position': n}
+        """
+        with self._cond:
+            if self._user_jobs.get(user_id, 0) >= self.per_user_limit:
+                return {
+                    'accepted': False,
+                    'error': 'user_limit',
+                    'queue_position': self._user_position(user_id)
+                }
+            if len(self._queue) >= self.max_queue:
+                return {
+                    'accepted': False,
+                    'error': 'queue_full',
+                    'queue_position': len(self._queue) + 1
+                }
+
+            self._queue.append(job_id)
+            self._jobs[job_id] = (user_id, fn, args)
+            self._user_jobs[user_id] = self._user_jobs.get(user_id, 0) + 1
+            self._start_workers()
+            self._cond.notify()
+            return {'accepted': True, 'queue_position': len(self._queue)}
+
+    def _position(self, job_id):
+        return self._queue.index(job_id) + 1
+
+    def _user_position(self, user_id):
+        """該用戶最前面一個排隊中任務的位置；全部都在執行時回傳 0"""
+        return next((i + 1 for i, job_id in enumerate(self._queue) if self._jobs[job_id][0] == user_id), 0)
+
+    def position(self, job_id):
+        """任務在佇列中的位置（從 1 開始）；已開始執行或不存在時回傳 None"""
+        with self._cond:
+            if job_id not in self._jobs:
+                return None
+            return self._position(job_id)
+
+    def with_queue_position(self, job_id, status):
+        """仍在排隊的任務在處理狀態上附加即時排隊位置（供 /status 與 SSE 使用）"""
+        position = self.position(job_id)
+        if position:
+            status = dict(status, message=f'排隊中，前面還有 {position - 1} 個任務...', queue_position=position)
+        return status
+
+    def _worker_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+                job_id = self._queue.popleft()
+                user_id, fn, args = self._jobs.pop(job_id)
+                self._running += 1
+
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"[{self.name}] 任務 {job_id} 執行失敗: {e}")
+            finally:
+                with self._cond:
+                    self._running -= 1
+                    remaining = self._user_jobs.get(user_id, 1) - 1
+                    if remaining > 0:
+                        self._user_jobs[user_id] = remaining
+                    else:
+                        self._user_jobs.pop(user_id, None)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'workers': self.max_workers,
+                'running': self._running,
+                'queued': len(self._queue),
+                'max_queue': self.max_queue,
+                'per_user_limit': self.per_user_limit
+            }
+
+
+def queue_rejection_response(result):
+    """排程器拒絕任務時回應 429 與目前排隊位置"""
+    if result['error'] == 'user_limit':
+        message = '您已有分析任務正在處理，請等待完成後再提交'
+    else:
+        message = '系統忙碌中，請稍後再試'
+    response = jsonify({'error': message, 'queue_position': result['queue_position']})
+    response.status_code = 429
+    response.headers['Retry-After'] = '10'
+    return response
+
+
+def create_scheduler_from_env(name='analysis'):
+    """依環境變數（ANALYSIS_WORKERS / ANALYSIS_MAX_QUEUE / ANALYSIS_PER_USER_LIMIT）建立排程器"""
+    return JobScheduler(
+        max_workers=int(os.environ.get('ANALYSIS_WORKERS', DEFAULT_MAX_WORKERS)),
+        max_queue=int(os.environ.get('ANALYSIS_MAX_QUEUE', DEFAULT_MAX_QUEUE)),
+        per_user_limit=int(os.environ.get('ANALYSIS_PER_USER_LIMIT', DEFAULT_PER_USER_LIMIT)),
+        name=name
+    )
@@ -0,0 +1,207 @@
+"""
+任務狀態儲存
+processing_status 的可替換後端，介面與 dict 相同（store[id] = {...}、store.get(id)）：
+- MemoryJobStore：單一進程內存，逾時自動淘汰
+- SQLiteJobStore：WAL 模式的本地 SQLite 檔，多個 worker 進程共用
+- RedisJobStore：Redis（需安裝 redis 套件），多台機器共用
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import MutableMapping
+
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
+
+DEFAULT_STORE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'job_store.sqlite3')
+DEFAULT_TTL = 3600  # 最後一次更新後保留 1 小時
+_SWEEP_INTERVAL = 60
+
+
+class _ChangeNotifier:
+    """狀態更新通知（供 SSE 推送使用）
+
+    同進程內的寫入會立即喚醒等待者；其他進程寫入的更新則靠 wait_for_change 的逾時補足
+    """
+
+    def _init_notifier(self):
+        self._changed = threading.Condition()
+        self.version = 0
+
+    def _notify(self):
+        with self._changed:
+            self.version += 1
+            self._changed.notify_all()
+
+    def wait_for_change(self, last_version, timeout):
+        """等待到有新寫入或逾時，回傳目前的版本號"""
+        with self._changed:
+            if self.version == last_version:
+                self._changed.wait(timeout)
+            return self.version
+
+
+class MemoryJobStore(_ChangeNotifier, MutableMapping):
+    def __init__(self, ttl=DEFAULT_TTL):
+        self._init_notifier()
+        self.ttl = ttl
+        self._data = {}  # job_id -> (updated_at, status)
+        self._lock = threading.Lock()
+        self._last_sweep = time.time()
+
+    def _sweep(self, now):
+        if now - self._last_sweep < _SWEEP_INTERVAL:
+            return
+        self._last_sweep = now
+        expired = [k for k, (updated_at, _) in self._data.items() if now - updated_at > self.ttl]
+        for k in expired:
+            del self._data[k]
+
+    def __getitem__(self, job_id):
+        with self._lock:
+            updated_at, status = self._data[job_id]
+            if time.time() - updated_at > self.ttl:
+                del self._data[job_id]
+                raise KeyError(job_id)
+            return status
+
+    def __setitem__(self, job_id, status):
+        now = time.time()
+        with self._lock:
+            self._data[job_id] = (now, status)
+            self._sweep(now)
+        self._notify()
+
+    def __delitem__(self, job_id):
+        with self._lock:
+            del self._data[job_id]
+
+    def __iter__(self):
+        with self._lock:
+            return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+
+class SQLiteJobStore(_ChangeNotifier, MutableMapping):
+    def __init__(self, path=DEFAULT_STORE_PATH, ttl=DEFAULT_TTL):
+        self._init_notifier()
+        self.path = path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._last_sweep = 0.0
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_jobs_updated_at ON jobs (updated_at)')
+        self._conn.commit()
+
+    def __getitem__(self, job_id):
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM jobs WHERE job_id = ? AND updated_at >= ?',
+                (job_id, time.time() - self.ttl)
+            ).fetchone()
+        if row is None:
+            raise KeyError(job_id)
+        return json.loads(row[0])
+
+    def __setitem__(self, job_id, status):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO jobs (job_id, data, updated_at) VALUES (?, ?, ?)',
+                (job_id, json.dumps(status, ensure_ascii=False), now)
+            )
+            if now - self._last_sweep >= _SWEEP_INTERVAL:
+                self._last_sweep = now
+                self._conn.execute('DELETE FROM jobs WHERE updated_at < ?', (now - self.ttl,))
+            self._conn.commit()
+        self._notify()
+
+    def __delitem__(self, job_id):
+        with self._lock:
+            cursor = self._conn.execute('DELETE FROM jobs WHERE job_id = ?', (job_id,))
+            self._conn.commit()
+        if cursor.rowcount == 0:
+            raise KeyError(job_id)
+
+    def __iter__(self):
+        with self._lock:
+            rows = self._conn.execute(
+                'SELECT job_id FROM jobs WHERE updated_at >= ?', (time.time() - self.ttl,)
+            ).fetchall()
+        return iter([row[0] for row in rows])
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute(
+                'SELECT COUNT(*) FROM jobs WHERE updated_at >= ?', (time.time() - self.ttl,)
+            ).fetchone()[0]
+
+
+class RedisJobStore(_ChangeNotifier, MutableMapping):
+    def __init__(self, url, ttl=DEFAULT_TTL, prefix='job:'):
+        self._init_notifier()
+        self.ttl = ttl
+        self.prefix = prefix
+        self._redis = redis.Redis.from_url(url)
+
+    def __getitem__(self, job_id):
+        data = self._redis.get(self.prefix + job_id)
+        if data is None:
+            raise KeyError(job_id)
+        return json.loads(data)
+
+    def __setitem__(self, job_id, status):
+        # 由 Redis 的 EX 負責逾時淘汰
+        self._redis.set(self.prefix + job_id, json.dumps(status, ensure_ascii=False), ex=self.ttl)
+        self._notify()
+
+    def __delitem__(self, job_id):
+        if not self._redis.delete(self.prefix + job_id):
+            raise KeyError(job_id)
+
+    def __iter__(self):
+        for key in self._redis.scan_iter(match=self.prefix + '*'):
+            yield key.decode('utf-8')[len(self.prefix):]
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+
+def create_job_store():
+    """依環境變數 JOB_STORE（memory / sqlite / redis）建立任務狀態儲存"""
+    backend = os.environ.get('JOB_STORE', 'sqlite')
+    ttl = int(os.environ.get('JOB_STATE_TTL', DEFAULT_TTL))
+
+    if backend == 'redis':
+        if REDIS_AVAILABLE and os.environ.get('REDIS_URL'):
+            return RedisJobStore(os.environ['REDIS_URL'], ttl=ttl)
+        print("✗ JOB_STORE=redis 但未安裝 redis 或未設定 REDIS_URL，改用 SQLite")
+        backend = 'sqlite'
+
+    if backend == 'sqlite':
+        try:
+            return SQLiteJobStore(os.environ.get('JOB_STORE_PATH', DEFAULT_STORE_PATH), ttl=ttl)
+        except Exception as e:
+            # 唯讀檔案系統等環境退回單一進程內存
+            print(f"✗ 無法開啟 SQLite 任務狀態儲存，改用內存: {e}")
+
+    return MemoryJobStore(ttl=ttl)
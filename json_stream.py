@@ -0,0 +1,85 @@
+"""
+串流 JSON 陣列解析器
+Gemini 以串流方式回傳 `[{...}, {...}]` 時，每收到一段文字就餵給解析器，
+每個物件一結束（大括號閉合）就立即解出，不必等整個陣列產生完畢
+"""
+import json
+
+
+class JSONArrayStreamParser:
+    def __init__(self):
+        self.started = False    # 是否已遇到最外層的 '['
+        self._opening = False   # 剛看到 '['，尚未確認是否為物件陣列的開頭
+        self.finished = False   # 是否已遇到最外層的 ']'
+        self.count = 0
+        self._buffer = []       # 目前物件已收到的字元
+        self._depth = 0         # 目前物件內的大括號／中括號深度
+        self._in_string = False
+        self._escape = False
+
+    def feed(self, chunk):
+        """餵入一段文字，回傳這段文字中完成的物件列表
+
+        '[' 之前的內容（例如 ```json 標記或說明文字）與 ']' 之後的內容都會被略過；
+        說明文字中的 '['（例如「[注意]」）後面不是 '{' 或 ']' 時不視為陣列開頭；
+        陣列中不是物件的元素（數字、字串）不會被回傳
+        """
+        objects = []
+        for ch in chunk:
+            if self.finished:
+                break
+            if not self.started:
+                if self._opening and not ch.isspace():
+                    # '[' 後第一個非空白字元是 '{' 或 ']' 才是物件陣列的開頭
+                    self._opening = False
+                    self.started = ch in '{]'
+                if ch == '[':
+                    self._opening = True
+                if not self.started:
+                    continue
+
+            if self._depth == 0:
+                # 物件之間：只關心下一個物件的開頭或陣列結尾
+                if ch == '{':
+                    self._depth = 1
+                    self._buffer = [ch]
+                elif ch == ']':
+                    self.finished = True
+                continue
+
+            self._buffer.append(ch)
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif ch == '"':
+                self._in_string = True
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    objects.append(json.loads(''.join(self._buffer)))
+                    self._buffer = []
+                    self.count += 1
+        return objects
+
+    def close(self):
+        """串流結束時呼叫；從未出現 JSON 陣列、或陣列被截斷（沒有 ']' 或物件不完整）時拋出 ValueError"""
+        if not self.started:
+            raise ValueError("無法找到有效的JSON數組")
+        if not self.finished or self._depth > 0:
+            raise ValueError(f"JSON數組不完整（已解析 {self.count} 個物件）")
+
+
+def parse_json_array(text):
+    """一次解析完整文字中的 JSON 陣列（非串流模式使用同一套規則）；沒有任何物件時拋出 ValueError"""
+    parser = JSONArrayStreamParser()
+    objects = parser.feed(text)
+    parser.close()
+    if not objects:
+        raise ValueError("JSON數組中沒有任何詞彙")
+    return objects
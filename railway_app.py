@@ -3,20 +3,34 @@ Railway 部署應用 - 整合韓文和中文知識圖譜系統
 包含：韓文新聞、中文詞彙、收藏單字、複習遊戲
 """
 
-from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, send_file
+from flask import Flask, render_template, request, jsonify, session, redirect, url_for, Response, stream_with_context
 import hashlib
 import os
-from datetime import datetime
 import requests
 import re
 import urllib.parse
-import threading
 import time
 import json
+import uuid
 from translations import get_translation
-from korean_analysis import generate_graph_html
-from chinese_analysis import generate_chinese_graph_html
+from korean_analysis import build_graph_data as build_korean_graph_data, DEFAULT_GRAPH_URLS as KOREAN_GRAPH_URLS
+from chinese_analysis import (
+    build_graph_data as build_chinese_graph_data,
+    DEFAULT_GRAPH_URLS as CHINESE_GRAPH_URLS,
+    select_candidate_words,
+    build_word_enrichment_prompt
+)
+from graph_viewer import (
+    save_graph_result, graph_viewer_response, graph_data_response, legacy_graph_file_response, vocab_graph_response
+)
+from saved_words_api import saved_words_response, batch_save_response, batch_delete_response
 from tocfl_loader import get_tocfl_vocab
+from word_cache import get_word_cache
+from result_cache import get_result_cache, result_cache_key
+from job_queue import create_scheduler_from_env, queue_rejection_response
+from job_store import create_job_store
+from json_stream import JSONArrayStreamParser, parse_json_array
+from gemini_clients import get_gemini_client, registry_stats as gemini_client_stats, GENAI_AVAILABLE
 
 # 載入環境變數
 try:
@@ -28,6 +42,7 @@ except ImportError:
 # Supabase 用戶操作
 from supabase_utils import (
     get_user_by_username,
+    load_user_profile,
     get_user_by_email,
     create_user,
     update_user,
@@ -40,15 +55,12 @@ from supabase_utils import (
     delete_korean_word,
     get_chinese_words,
     add_chinese_word,
-    delete_chinese_word
+    delete_chinese_word,
+    get_word_list_cache
 )
 
-# Google GenAI - 直接使用 Google SDK (跟 TTS 一樣)
-try:
-    from google import genai
-    GENAI_AVAILABLE = True
-except ImportError:
-    GENAI_AVAILABLE = False
+# Google GenAI - 直接使用 Google SDK (跟 TTS 一樣)，客戶端由 gemini_clients 建立
+if not GENAI_AVAILABLE:
     print("Warning: google-genai not installed")
 
 from markdownify import markdownify
@@ -65,8 +77,25 @@ app.config['SESSION_COOKIE_SECURE'] = True  # HTTPS only
 app.config['SESSION_COOKIE_HTTPONLY'] = True
 app.config['PERMANENT_SESSION_LIFETIME'] = 3600  # 1 小時
 
-# 處理狀態追蹤
-processing_status = {}
+# 處理狀態追蹤（可跨 worker 進程共用，逾時自動清除；後端由 JOB_STORE 環境變數決定）
+processing_status = create_job_store()
+
+# SSE 進度推送設定（秒）
+SSE_POLL_INTERVAL = 1.0       # 等待更新的最長間隔（跨進程寫入靠此輪詢本地儲存）
+SSE_HEARTBEAT_INTERVAL = 15   # 無更新時送出 keep-alive 註解，避免代理中斷連線
+SSE_MAX_DURATION = 600        # 單一連線最長時間，之後由瀏覽器自動重連
+
+# Gemini 串流模式：每產生完一個詞彙就推送給前端，不必等整個回應結束
+GEMINI_STREAMING = os.environ.get('GEMINI_STREAMING', '1') != '0'
+
+# 分析任務排程器（韓文、中文共用固定數量的 worker）
+analysis_scheduler = create_scheduler_from_env('analysis')
+
+# 中文分析模式：'local' = 本地 TOCFL 分詞選詞，只請 Gemini 翻譯選出的詞；'gemini' = 整篇文章交給 Gemini
+CHINESE_ANALYSIS_MODE = os.environ.get('CHINESE_ANALYSIS_MODE', 'local')
+CHINESE_ANALYSIS_MODES = ('local', 'gemini')
+# 本地選出的候選詞少於此數量時，改回整篇交給 Gemini
+LOCAL_MIN_CANDIDATES = 5
 
 # ==================== AI Agent 初始化 ====================
 
@@ -78,7 +107,7 @@ try:
         raise ValueError("需要 GEMINI_API_KEY 環境變數")
 
     if GENAI_AVAILABLE:
-        gemini_client = genai.Client(api_key=gemini_api_key)
+        gemini_client = get_gemini_client(gemini_api_key)
         print("✓ Gemini Client 初始化成功 (使用 google.genai SDK)")
         AGENTS_AVAILABLE = True
     else:
@@ -91,8 +120,50 @@ except Exception as e:
     korean_agent = None
     chinese_agent = None
 
+# ==================== 任務排程輔助函數 ====================
+
+def get_processing_status(process_id):
+    """查詢處理狀態；仍在排隊的任務附上即時排隊位置"""
+    return analysis_scheduler.with_queue_position(process_id, processing_status.get(process_id, {'status': 'not_found'}))
+
+def stream_processing_status(process_id):
+    """以 Server-Sent Events 推送處理進度，任務結束（completed/error/not_found）後關閉"""
+    def generate():
+        yield "retry: 2000\n\n"
+        last_sent = None
+        last_write = time.time()
+        deadline = last_write + SSE_MAX_DURATION
+        version = processing_status.version
+        while time.time() < deadline:
+            status = get_processing_status(process_id)
+            if status != last_sent:
+                yield f"data: {json.dumps(status, ensure_ascii=False)}\n\n"
+                last_sent = status
+                last_write = time.time()
+                if status.get('status') != 'processing':
+                    return
+            elif time.time() - last_write >= SSE_HEARTBEAT_INTERVAL:
+                yield ": keep-alive\n\n"
+                last_write = time.time()
+            version = processing_status.wait_for_change(version, SSE_POLL_INTERVAL)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # ==================== 路由 ====================
 
+@app.after_request
+def cache_graph_assets(response):
+    """知識圖譜共用的 CSS/JS 帶有版本參數，內容更新時網址也會改變，可長期快取"""
+    if request.path.startswith('/static/graph/') and request.args.get('v'):
+        response.cache_control.no_cache = None
+        response.cache_control.public = True
+        response.cache_control.max_age = 31536000
+    return response
+
 @app.route('/')
 def index():
     if 'username' in session:
@@ -116,7 +187,7 @@ def dashboard():
     if 'username' not in session:
         return redirect(url_for('login'))
 
-    user = get_user_by_username(session['username'])
+    user = load_user_profile(session['username'])
     lang = user.get('language', 'zh-TW') if user else 'zh-TW'
     translations = get_translation(lang)
 
@@ -198,7 +269,7 @@ def korean_page():
     if username_param:
         # 驗證用戶是否存在
         try:
-            user = get_user_by_username(username_param)
+            user = load_user_profile(username_param)
             print(f"[DEBUG] /korean - user lookup result: {user}")
             print(f"[DEBUG] /korean - user found: {user is not None}")
 
@@ -266,8 +337,7 @@ def get_korean_saved_words():
         return jsonify({'error': 'Unauthorized'}), 401
 
     user_id = session.get('user_id', session['username'])
-    words = get_korean_words(user_id)
-    return jsonify({'words': words})
+    return saved_words_response('ko', user_id)
 
 @app.route('/korean/save-word', methods=['POST'])
 def save_korean_word():
@@ -306,6 +376,16 @@ def delete_korean_word_route(korean=None):
     result = delete_korean_word(user_id, korean)
     return jsonify(result)
 
+@app.route('/korean/api/saved-words/batch', methods=['POST', 'DELETE'])
+def korean_saved_words_batch():
+    if 'username' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    user_id = session.get('user_id', session['username'])
+    if request.method == 'DELETE':
+        return batch_delete_response('ko', user_id)
+    return batch_save_response('ko', user_id)
+
 @app.route('/korean/review')
 def korean_review():
     # 支援從 Vercel 傳遞用戶名
@@ -314,7 +394,7 @@ def korean_review():
 
     if username_param:
         try:
-            user = get_user_by_username(username_param)
+            user = load_user_profile(username_param)
             if user:
                 username = username_param
                 session.clear()
@@ -352,36 +432,170 @@ def korean_process():
     if not url and not text:
         return jsonify({'error': '請提供網址或純文字'}), 400
 
-    # 生成唯一的處理ID
-    process_id = str(int(time.time() * 1000))
+    # 生成唯一的處理ID（同一毫秒內的多個請求也不會衝突）
+    process_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
     processing_status[process_id] = {
         'status': 'processing',
         'message': '正在處理中...',
         'progress': 0
     }
 
-    # 在背景執行處理
+    # 交給排程器在背景執行
+    user_id = session.get('user_id', session['username'])
     if input_type == 'text' and text:
-        thread = threading.Thread(target=process_text_analysis, args=(text, process_id))
+        result = analysis_scheduler.submit(process_id, user_id, process_text_analysis, (text, process_id))
     else:
         if not url.startswith('http'):
             url = 'https://' + url
-        thread = threading.Thread(target=process_korean_url_analysis, args=(url, process_id))
-    thread.start()
+        result = analysis_scheduler.submit(process_id, user_id, process_korean_url_analysis, (url, process_id))
 
-    return jsonify({'process_id': process_id})
+    if not result['accepted']:
+        processing_status.pop(process_id, None)
+        return queue_rejection_response(result)
+
+    return jsonify({'process_id': process_id, 'queue_position': result['queue_position']})
 
 @app.route('/korean/status/<process_id>')
 def korean_status(process_id):
-    status = processing_status.get(process_id, {'status': 'not_found'})
-    return jsonify(status)
+    return jsonify(get_processing_status(process_id))
+
+@app.route('/korean/events/<process_id>')
+def korean_events(process_id):
+    return stream_processing_status(process_id)
+
+@app.route('/korean/graph/<graph_id>')
+def korean_graph(graph_id):
+    return graph_viewer_response('graph/korean_graph.html', KOREAN_GRAPH_URLS)
+
+@app.route('/korean/graph/<graph_id>.json')
+def korean_graph_data(graph_id):
+    return graph_data_response(graph_id, 'ko-')
 
 @app.route('/korean/result/<filename>')
 def korean_result(filename):
-    try:
-        return send_file(filename, as_attachment=False, mimetype='text/html; charset=utf-8')
-    except FileNotFoundError:
-        return jsonify({'error': '文件未找到'}), 404
+    return legacy_graph_file_response(filename, 'korean')
+
+@app.route('/korean/my-graph')
+def korean_my_graph():
+    if 'username' not in session:
+        return redirect(url_for('login'))
+    return graph_viewer_response('graph/korean_graph.html', KOREAN_GRAPH_URLS, private=True)
+
+@app.route('/korean/my-graph.json')
+def korean_my_graph_data():
+    if 'username' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    user_id = session.get('user_id', session['username'])
+    return vocab_graph_response(user_id, 'ko', get_korean_words)
+
+def serve_cached_result(cache_key, process_id):
+    """若相同內容已分析過，直接以既有結果完成處理，回傳是否命中"""
+    if not cache_key:
+        return False
+    cached = get_result_cache().get(cache_key)
+    if not cached:
+        return False
+
+    processing_status[process_id] = {
+        'status': 'completed',
+        'message': cached['message'],
+        'progress': 100,
+        'graph_id': cache_key,
+        'word_count': cached['word_count'],
+        'cached': True
+    }
+    return True
+
+def fetch_article(url, cache_scope, process_id):
+    """抓取網頁並轉為 markdown；ETag 未變且已有分析結果時直接完成處理並回傳 None"""
+    result_cache = get_result_cache()
+    known = result_cache.get_url(cache_scope, url)
+
+    headers = {}
+    if known:
+        headers['If-None-Match'] = known['etag']
+    response = requests.get(url, timeout=20, headers=headers)
+    if response.status_code == 304:
+        if serve_cached_result(known['key'], process_id):
+            return None
+        response = requests.get(url, timeout=20)
+    response.raise_for_status()
+
+    content = markdownify(response.text).strip()[:10000]
+    etag = response.headers.get('ETag')
+    if etag:
+        result_cache.put_url(cache_scope, url, etag, result_cache_key(cache_scope, content))
+    return content
+
+def generate_word_list(prompt, process_id, message, progress_start, progress_end, prepare=None):
+    """請 Gemini 產生詞彙 JSON 陣列
+
+    串流模式下每解析出一個完整詞彙就更新處理狀態（含目前已產生的詞彙列表），
+    讓 SSE 立即推送給前端；prepare 可在推送前補充欄位（例如 TOCFL 級數）
+    """
+    if not GEMINI_STREAMING:
+        response = gemini_client.models.generate_content(
+            model="gemini-2.5-flash",
+            contents=prompt
+        )
+        words = parse_json_array(response.text or '')
+        if prepare:
+            for word in words:
+                prepare(word)
+        return words
+
+    parser = JSONArrayStreamParser()
+    words = []
+    for chunk in gemini_client.models.generate_content_stream(
+        model="gemini-2.5-flash",
+        contents=prompt
+    ):
+        new_words = parser.feed(chunk.text or '')
+        if not new_words:
+            continue
+        for word in new_words:
+            if prepare:
+                prepare(word)
+            words.append(word)
+        processing_status[process_id] = {
+            'status': 'processing',
+            'message': f'{message}（已產生 {len(words)} 個詞彙）',
+            'progress': min(progress_end, progress_start + len(words) * 4),
+            'words': words
+        }
+    parser.close()
+    if not words:
+        raise ValueError("JSON數組中沒有任何詞彙")
+    return words
+
+def complete_korean_analysis(words, source, content, process_id, cache_key):
+    """建立韓文知識圖譜資料、寫入結果儲存並更新處理狀態"""
+    # 沒有詞彙的結果不寫入結果快取，否則相同內容會在保留期限內一直回傳空圖譜
+    if not words:
+        processing_status[process_id] = {
+            'status': 'error',
+            'message': '分析失敗：沒有產生任何詞彙'
+        }
+        return
+
+    processing_status[process_id] = {
+        'status': 'processing',
+        'message': '正在生成知識圖譜...',
+        'progress': 90
+    }
+
+    message = f'成功生成 {len(words)} 個韓文詞彙的知識圖譜'
+    # 結果以 JSON 存在結果快取，圖譜 ID 即內容定址鍵
+    save_graph_result(cache_key, message, source, build_korean_graph_data(words, content))
+
+    processing_status[process_id] = {
+        'status': 'completed',
+        'message': message,
+        'progress': 100,
+        'graph_id': cache_key,
+        'word_count': len(words)
+    }
 
 def process_text_analysis(text, process_id):
     """處理純文字輸入的韓文分析 (使用 google.genai SDK)"""
@@ -401,6 +615,11 @@ def process_text_analysis(text, process_id):
 
         content = text[:10000]
 
+        # 相同內容已分析過則直接回傳
+        cache_key = result_cache_key('ko', content)
+        if serve_cached_result(cache_key, process_id):
+            return
+
         # 使用 Gemini API 分析（跟 TTS 一樣）
         prompt = f"""Analyze the following Korean text and extract important vocabulary words.
 
@@ -426,50 +645,10 @@ Extract 10-15 important words. Korean text:
 {content}
 """
 
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-
-        words_json_str = response.text.strip()
-
-        processing_status[process_id] = {
-            'status': 'processing',
-            'message': '正在解析分析結果...',
-            'progress': 60
-        }
+        words = generate_word_list(prompt, process_id, '正在進行韓文詞彙分析...', 20, 85)
+        get_word_cache().put_many('ko', {w['korean']: w for w in words if w.get('korean')})
 
-        # 解析JSON
-        cleaned_json = words_json_str.strip()
-        start_idx = cleaned_json.find('[')
-        end_idx = cleaned_json.rfind(']')
-
-        if start_idx != -1 and end_idx != -1:
-            json_part = cleaned_json[start_idx:end_idx+1]
-            words = json.loads(json_part)
-
-            processing_status[process_id] = {
-                'status': 'processing',
-                'message': '正在生成知識圖譜...',
-                'progress': 90
-            }
-
-            html_content = generate_graph_html(words, '純文字輸入')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"korean_graph_{len(words)}words_{timestamp}.html"
-
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-
-            processing_status[process_id] = {
-                'status': 'completed',
-                'message': f'成功生成 {len(words)} 個韓文詞彙的知識圖譜',
-                'progress': 100,
-                'filename': filename,
-                'word_count': len(words)
-            }
-        else:
-            raise ValueError("無法找到有效的JSON數組")
+        complete_korean_analysis(words, '純文字輸入', content, process_id, cache_key)
 
     except Exception as e:
         processing_status[process_id] = {
@@ -495,15 +674,20 @@ def process_korean_url_analysis(url, process_id):
 
         # 抓取網頁內容
         try:
-            response = requests.get(url, timeout=20)
-            response.raise_for_status()
-            content = markdownify(response.text).strip()[:10000]
+            content = fetch_article(url, 'ko', process_id)
         except Exception as e:
             processing_status[process_id] = {
                 'status': 'error',
                 'message': f'抓取網頁失敗: {str(e)}'
             }
             return
+        if content is None:
+            return
+
+        # 相同內容已分析過則直接回傳
+        cache_key = result_cache_key('ko', content)
+        if serve_cached_result(cache_key, process_id):
+            return
 
         processing_status[process_id] = {
             'status': 'processing',
@@ -536,52 +720,10 @@ Extract 10-15 important words. Korean text:
 {content}
 """
 
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-
-        words_json_str = response.text.strip()
-
-        processing_status[process_id] = {
-            'status': 'processing',
-            'message': '正在解析分析結果...',
-            'progress': 70
-        }
-
-        # 解析JSON
-        cleaned_json = words_json_str.strip()
-        # 移除可能的 markdown 代碼塊標記
-        cleaned_json = cleaned_json.replace('```json', '').replace('```', '')
-        start_idx = cleaned_json.find('[')
-        end_idx = cleaned_json.rfind(']')
-
-        if start_idx != -1 and end_idx != -1:
-            json_part = cleaned_json[start_idx:end_idx+1]
-            words = json.loads(json_part)
+        words = generate_word_list(prompt, process_id, '正在進行韓文詞彙分析...', 40, 85)
+        get_word_cache().put_many('ko', {w['korean']: w for w in words if w.get('korean')})
 
-            processing_status[process_id] = {
-                'status': 'processing',
-                'message': '正在生成知識圖譜...',
-                'progress': 90
-            }
-
-            html_content = generate_graph_html(words, url)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"korean_graph_{len(words)}words_{timestamp}.html"
-
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-
-            processing_status[process_id] = {
-                'status': 'completed',
-                'message': f'成功生成 {len(words)} 個韓文詞彙的知識圖譜',
-                'progress': 100,
-                'filename': filename,
-                'word_count': len(words)
-            }
-        else:
-            raise ValueError("無法找到有效的JSON數組")
+        complete_korean_analysis(words, url, content, process_id, cache_key)
 
     except Exception as e:
         processing_status[process_id] = {
@@ -602,7 +744,7 @@ def chinese_page():
     if username_param:
         # 驗證用戶是否存在
         try:
-            user = get_user_by_username(username_param)
+            user = load_user_profile(username_param)
             if user:
                 username = username_param
                 session.clear()
@@ -657,8 +799,7 @@ def get_chinese_saved_words():
         return jsonify({'error': 'Unauthorized'}), 401
 
     user_id = session.get('user_id', session['username'])
-    words = get_chinese_words(user_id)
-    return jsonify({'words': words})
+    return saved_words_response('zh', user_id)
 
 @app.route('/chinese/save-word', methods=['POST'])
 def save_chinese_word():
@@ -695,6 +836,16 @@ def delete_chinese_word_route(chinese=None):
     result = delete_chinese_word(user_id, chinese)
     return jsonify(result)
 
+@app.route('/chinese/api/saved-words/batch', methods=['POST', 'DELETE'])
+def chinese_saved_words_batch():
+    if 'username' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    user_id = session.get('user_id', session['username'])
+    if request.method == 'DELETE':
+        return batch_delete_response('zh', user_id)
+    return batch_save_response('zh', user_id)
+
 @app.route('/chinese/review')
 def chinese_review():
     # 支援從 Vercel 傳遞用戶名
@@ -703,7 +854,7 @@ def chinese_review():
 
     if username_param:
         try:
-            user = get_user_by_username(username_param)
+            user = load_user_profile(username_param)
             if user:
                 username = username_param
                 session.clear()
@@ -737,42 +888,155 @@ def chinese_process():
     url = data.get('url')
     text = data.get('text')
     input_type = data.get('type', 'url')
+    mode = data.get('mode', CHINESE_ANALYSIS_MODE)
 
     if not url and not text:
         return jsonify({'error': '請提供網址或純文字'}), 400
 
-    # 生成唯一的處理ID
-    process_id = str(int(time.time() * 1000))
+    # mode 會成為快取鍵與圖譜 ID 的一部分，只接受已知的分析模式
+    if mode not in CHINESE_ANALYSIS_MODES:
+        return jsonify({'error': f"不支援的分析模式：{mode}（可用：{', '.join(CHINESE_ANALYSIS_MODES)}）"}), 400
+
+    # 生成唯一的處理ID（同一毫秒內的多個請求也不會衝突）
+    process_id = f"{int(time.time() * 1000)}-{uuid.uuid4().hex[:8]}"
     processing_status[process_id] = {
         'status': 'processing',
         'message': '正在處理中...',
         'progress': 0
     }
 
-    # 在背景執行處理
+    # 交給排程器在背景執行
+    user_id = session.get('user_id', session['username'])
     if input_type == 'text' and text:
-        thread = threading.Thread(target=process_chinese_text_analysis, args=(text, process_id))
+        result = analysis_scheduler.submit(process_id, user_id, process_chinese_text_analysis, (text, process_id, mode))
     else:
         if not url.startswith('http'):
             url = 'https://' + url
-        thread = threading.Thread(target=process_chinese_url_analysis, args=(url, process_id))
-    thread.start()
+        result = analysis_scheduler.submit(process_id, user_id, process_chinese_url_analysis, (url, process_id, mode))
+
+    if not result['accepted']:
+        processing_status.pop(process_id, None)
+        return queue_rejection_response(result)
 
-    return jsonify({'process_id': process_id})
+    return jsonify({'process_id': process_id, 'queue_position': result['queue_position']})
 
 @app.route('/chinese/status/<process_id>')
 def chinese_status(process_id):
-    status = processing_status.get(process_id, {'status': 'not_found'})
-    return jsonify(status)
+    return jsonify(get_processing_status(process_id))
+
+@app.route('/chinese/events/<process_id>')
+def chinese_events(process_id):
+    return stream_processing_status(process_id)
+
+@app.route('/chinese/graph/<graph_id>')
+def chinese_graph(graph_id):
+    return graph_viewer_response('graph/chinese_graph.html', CHINESE_GRAPH_URLS)
+
+@app.route('/chinese/graph/<graph_id>.json')
+def chinese_graph_data(graph_id):
+    return graph_data_response(graph_id, 'zh-')
 
 @app.route('/chinese/result/<filename>')
 def chinese_result(filename):
-    try:
-        return send_file(filename, as_attachment=False, mimetype='text/html; charset=utf-8')
-    except FileNotFoundError:
-        return jsonify({'error': '文件未找到'}), 404
+    return legacy_graph_file_response(filename, 'chinese')
+
+@app.route('/chinese/my-graph')
+def chinese_my_graph():
+    if 'username' not in session:
+        return redirect(url_for('login'))
+    return graph_viewer_response('graph/chinese_graph.html', CHINESE_GRAPH_URLS, private=True)
 
-def process_chinese_text_analysis(text, process_id):
+@app.route('/chinese/my-graph.json')
+def chinese_my_graph_data():
+    if 'username' not in session:
+        return jsonify({'error': 'Unauthorized'}), 401
+
+    user_id = session.get('user_id', session['username'])
+    return vocab_graph_response(user_id, 'zh', get_chinese_words)
+
+def add_tocfl_level(word):
+    """為 Gemini 產生的詞彙補上 TOCFL 級數"""
+    tocfl_level = get_tocfl_vocab().get_level_display(word.get('chinese', ''))
+    word['tocfl_level'] = tocfl_level if tocfl_level else '未分級'
+
+def analyze_chinese_words_local(content, process_id):
+    """本地 TOCFL 分詞選詞，只請 Gemini 翻譯選出的詞彙；候選詞不足時回傳 None"""
+    processing_status[process_id] = {
+        'status': 'processing',
+        'message': '正在進行 TOCFL 本地分詞...',
+        'progress': 45
+    }
+
+    candidates = select_candidate_words(content)
+    if len(candidates) < LOCAL_MIN_CANDIDATES:
+        return None
+
+    # 先查單字快取，只把未命中的詞送給 Gemini
+    word_cache = get_word_cache()
+    entries = word_cache.get_many('zh', [c['chinese'] for c in candidates])
+    misses = [c for c in candidates if c['chinese'] not in entries]
+
+    if misses:
+        processing_status[process_id] = {
+            'status': 'processing',
+            'message': f'正在翻譯 {len(misses)} 個詞彙...',
+            'progress': 55
+        }
+
+        generated = {
+            entry.get('chinese'): entry
+            for entry in generate_word_list(
+                build_word_enrichment_prompt(misses), process_id,
+                f'正在翻譯 {len(misses)} 個詞彙...', 55, 85, prepare=add_tocfl_level
+            )
+            if entry.get('chinese')
+        }
+        word_cache.put_many('zh', generated)
+        entries.update(generated)
+
+    # 詞彙與 TOCFL 級數以本地結果為準，Gemini 只提供翻譯與例句
+    words = []
+    for candidate in candidates:
+        entry = entries.get(candidate['chinese'], {})
+        words.append({
+            'chinese': candidate['chinese'],
+            'english': entry.get('english', 'N/A'),
+            'definition': entry.get('definition', 'N/A'),
+            'example_chinese': entry.get('example_chinese', 'N/A'),
+            'example_english': entry.get('example_english', 'N/A'),
+            'tocfl_level': candidate['tocfl_level']
+        })
+    return words
+
+def complete_chinese_analysis(words, source, content, process_id, cache_key):
+    """建立中文知識圖譜資料、寫入結果儲存並更新處理狀態"""
+    # 沒有詞彙的結果不寫入結果快取，否則相同內容會在保留期限內一直回傳空圖譜
+    if not words:
+        processing_status[process_id] = {
+            'status': 'error',
+            'message': '分析失敗：沒有產生任何詞彙'
+        }
+        return
+
+    processing_status[process_id] = {
+        'status': 'processing',
+        'message': '正在生成知識圖譜...',
+        'progress': 90
+    }
+
+    message = f'成功生成 {len(words)} 個中文詞彙的知識圖譜'
+    # 結果以 JSON 存在結果快取，圖譜 ID 即內容定址鍵
+    save_graph_result(cache_key, message, source, build_chinese_graph_data(words, content))
+
+    processing_status[process_id] = {
+        'status': 'completed',
+        'message': message,
+        'progress': 100,
+        'graph_id': cache_key,
+        'word_count': len(words)
+    }
+
+def process_chinese_text_analysis(text, process_id, mode=CHINESE_ANALYSIS_MODE):
     """處理純文字輸入的中文分析 (使用 google.genai SDK)"""
     try:
         if not gemini_client:
@@ -790,6 +1054,18 @@ def process_chinese_text_analysis(text, process_id):
 
         content = text[:10000]
 
+        # 相同內容已分析過則直接回傳
+        cache_key = result_cache_key(f'zh:{mode}', content)
+        if serve_cached_result(cache_key, process_id):
+            return
+
+        # 本地模式：只把選出的詞送給 Gemini
+        if mode == 'local':
+            words = analyze_chinese_words_local(content, process_id)
+            if words:
+                complete_chinese_analysis(words, '純文字輸入', content, process_id, cache_key)
+                return
+
         # 使用 Gemini API 分析
         prompt = f"""Analyze the following Chinese text and extract vocabulary words.
 
@@ -819,63 +1095,11 @@ Extract 10-15 important words. Chinese text:
 {content}
 """
 
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-
-        words_json_str = response.text.strip()
-
-        processing_status[process_id] = {
-            'status': 'processing',
-            'message': '正在解析分析結果...',
-            'progress': 70
-        }
-
-        # 解析JSON
-        cleaned_json = words_json_str.strip()
-        start_idx = cleaned_json.find('[')
-        end_idx = cleaned_json.rfind(']')
-
-        if start_idx != -1 and end_idx != -1:
-            json_part = cleaned_json[start_idx:end_idx+1]
-            words = json.loads(json_part)
-
-            processing_status[process_id] = {
-                'status': 'processing',
-                'message': '正在添加 TOCFL 級數...',
-                'progress': 85
-            }
-
-            # 添加 TOCFL 級數
-            tocfl = get_tocfl_vocab()
-            for word in words:
-                chinese = word.get('chinese', '')
-                tocfl_level = tocfl.get_level_display(chinese)
-                word['tocfl_level'] = tocfl_level if tocfl_level else '未分級'
-
-            processing_status[process_id] = {
-                'status': 'processing',
-                'message': '正在生成知識圖譜...',
-                'progress': 90
-            }
+        words = generate_word_list(prompt, process_id, '正在進行中文詞彙分析...', 20, 85,
+                                   prepare=add_tocfl_level)
+        get_word_cache().put_many('zh', {w['chinese']: w for w in words if w.get('chinese')})
 
-            html_content = generate_chinese_graph_html(words, '純文字輸入')
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"chinese_graph_{len(words)}words_{timestamp}.html"
-
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(html_content)
-
-            processing_status[process_id] = {
-                'status': 'completed',
-                'message': f'成功生成 {len(words)} 個中文詞彙的知識圖譜',
-                'progress': 100,
-                'filename': filename,
-                'word_count': len(words)
-            }
-        else:
-            raise ValueError("無法找到有效的JSON數組")
+        complete_chinese_analysis(words, '純文字輸入', content, process_id, cache_key)
 
     except Exception as e:
         processing_status[process_id] = {
@@ -883,7 +1107,7 @@ Extract 10-15 important words. Chinese text:
             'message': f'處理失敗: {str(e)}'
         }
 
-def process_chinese_url_analysis(url, process_id):
+def process_chinese_url_analysis(url, process_id, mode=CHINESE_ANALYSIS_MODE):
     """處理URL輸入的中文分析 (使用 google.genai SDK)"""
     try:
         if not gemini_client:
@@ -900,16 +1124,29 @@ def process_chinese_url_analysis(url, process_id):
         }
 
         # 抓取網頁內容
+        cache_scope = f'zh:{mode}'
         try:
-            response = requests.get(url, timeout=20)
-            response.raise_for_status()
-            content = markdownify(response.text).strip()[:10000]
+            content = fetch_article(url, cache_scope, process_id)
         except Exception as e:
             processing_status[process_id] = {
                 'status': 'error',
                 'message': f'抓取網頁失敗: {str(e)}'
             }
             return
+        if content is None:
+            return
+
+        # 相同內容已分析過則直接回傳
+        cache_key = result_cache_key(cache_scope, content)
+        if serve_cached_result(cache_key, process_id):
+            return
+
+        # 本地模式：只把選出的詞送給 Gemini
+        if mode == 'local':
+            words = analyze_chinese_words_local(content, process_id)
+            if words:
+                complete_chinese_analysis(words, url, content, process_id, cache_key)
+                return
 
         processing_status[process_id] = {
             'status': 'processing',
@@ -946,64 +1183,11 @@ Extract 10-15 important words. Chinese text:
 {content}
 """
 
-        response = gemini_client.models.generate_content(
-            model="gemini-2.5-flash",
-            contents=prompt
-        )
-
-        words_json_str = response.text.strip()
-
-        processing_status[process_id] = {
-            'status': 'processing',
-            'message': '正在解析分析結果...',
-            'progress': 70
-        }
-
-        # 解析JSON - 清理可能的 markdown 代碼塊標記
-        cleaned_json = words_json_str.strip()
-        cleaned_json = cleaned_json.replace('```json', '').replace('```', '')
-        start_idx = cleaned_json.find('[')
-        end_idx = cleaned_json.rfind(']')
-
-        if start_idx != -1 and end_idx != -1:
-            json_part = cleaned_json[start_idx:end_idx+1]
-            words = json.loads(json_part)
-
-            processing_status[process_id] = {
-                'status': 'processing',
-                'message': '正在添加 TOCFL 級數...',
-                'progress': 85
-            }
-
-            # 添加 TOCFL 級數
-            tocfl = get_tocfl_vocab()
-            for word in words:
-                chinese = word.get('chinese', '')
-                tocfl_level = tocfl.get_level_display(chinese)
-                word['tocfl_level'] = tocfl_level if tocfl_level else '未分級'
-
-            processing_status[process_id] = {
-                'status': 'processing',
-                'message': '正在生成知識圖譜...',
-                'progress': 90
-            }
-
-            html_content = generate_chinese_graph_html(words, url)
-            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-            filename = f"chinese_graph_{len(words)}words_{timestamp}.html"
-
-            with open(filename, 'w', encoding='utf-8') as f:
-                f.write(html_content)
+        words = generate_word_list(prompt, process_id, '正在進行中文詞彙分析...', 40, 85,
+                                   prepare=add_tocfl_level)
+        get_word_cache().put_many('zh', {w['chinese']: w for w in words if w.get('chinese')})
 
-            processing_status[process_id] = {
-                'status': 'completed',
-                'message': f'成功生成 {len(words)} 個中文詞彙的知識圖譜',
-                'progress': 100,
-                'filename': filename,
-                'word_count': len(words)
-            }
-        else:
-            raise ValueError("無法找到有效的JSON數組")
+        complete_chinese_analysis(words, url, content, process_id, cache_key)
 
     except Exception as e:
         processing_status[process_id] = {
@@ -1021,7 +1205,7 @@ def games_menu():
 
     if username_param:
         try:
-            user = get_user_by_username(username_param)
+            user = load_user_profile(username_param)
             if user:
                 username = username_param
                 session.clear()
@@ -1084,6 +1268,13 @@ def games_listening():
 
 # ==================== 健康檢查 ====================
 
+def _cache_stats(get_cache):
+    """快取統計；快取檔無法開啟（例如唯讀或不存在的檔案系統）時回報錯誤，不讓健康檢查失敗"""
+    try:
+        return get_cache().stats()
+    except Exception as e:
+        return {'error': str(e)}
+
 @app.route('/health')
 def health():
     gemini_key = os.getenv("GEMINI_API_KEY")
@@ -1094,7 +1285,12 @@ def health():
         'chinese_agent': chinese_agent is not None,
         'gemini_key_exists': gemini_key is not None,
         'gemini_key_length': len(gemini_key) if gemini_key else 0,
-        'gemini_key_preview': gemini_key[:10] + '...' if gemini_key else 'NOT SET'
+        'gemini_key_preview': gemini_key[:10] + '...' if gemini_key else 'NOT SET',
+        'word_cache': _cache_stats(get_word_cache),
+        'result_cache': _cache_stats(get_result_cache),
+        'saved_words_cache': _cache_stats(get_word_list_cache),
+        'analysis_queue': analysis_scheduler.stats(),
+        'gemini_clients': gemini_client_stats()
     })
 
 # ==================== 啟動應用 ====================
@@ -0,0 +1,173 @@
+"""
+整篇分析結果快取
+以正規化後文字的 SHA-256 為鍵，保存已產生的知識圖譜資料（JSON），
+相同文章（或 ETag 未變的同一網址）再次提交時直接回傳既有結果；
+鍵同時作為圖譜 ID，供 /…/graph/<id>.json 查詢
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'result_cache.sqlite3')
+DEFAULT_MAX_ENTRIES = 2000
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024  # 64MB
+DEFAULT_TTL = 7 * 24 * 3600  # 7 天
+
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_text(text):
+    """正規化文字：NFKC、合併空白、去除前後空白"""
+    return _WHITESPACE.sub(' ', unicodedata.normalize('NFKC', text)).strip()
+
+
+def result_cache_key(scope, text):
+    """計算內容定址鍵；scope 區分語言與分析模式（例如 'ko'、'zh:local'）
+
+    鍵只含英數字與連字號（例如 'zh-local-<sha256>'），可直接放在網址中
+    """
+    digest = hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+    return f"{scope.replace(':', '-')}-{digest}"
+
+
+class ResultCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES,
+                 max_bytes=DEFAULT_MAX_BYTES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # WAL 模式讓多個 worker 進程共用同一個快取檔
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_results_last_used ON results (last_used)')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS url_etags (
+                scope TEXT NOT NULL,
+                url TEXT NOT NULL,
+                etag TEXT NOT NULL,
+                key TEXT NOT NULL,
+                PRIMARY KEY (scope, url)
+            )
+        ''')
+        self._conn.commit()
+
+    def get(self, key):
+        """查詢分析結果，未命中或已過期時回傳 None"""
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM results WHERE key = ? AND created_at >= ?',
+                (key, now - self.ttl)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE results SET last_used = ? WHERE key = ?', (now, key))
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def peek(self, key):
+        """唯讀查詢：不計入命中統計，也不更新最近使用時間（不寫入資料庫）"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT data FROM results WHERE key = ? AND created_at >= ?',
+                (key, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put(self, key, result):
+        """寫入分析結果，超過筆數或容量上限時淘汰最久未使用的項目"""
+        now = time.time()
+        data = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO results (key, data, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)',
+                (key, data, len(data.encode('utf-8')), now, now)
+            )
+            self._conn.execute('DELETE FROM results WHERE created_at < ?', (now - self.ttl,))
+            self._evict()
+            self._conn.commit()
+
+    def invalidate(self, key):
+        """移除分析結果"""
+        with self._lock:
+            self._conn.execute('DELETE FROM results WHERE key = ?', (key,))
+            self._conn.commit()
+
+    def _evict(self):
+        count, total = self._conn.execute('SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results').fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        # 依最近使用時間由舊到新淘汰，直到同時低於筆數與容量上限
+        doomed = []
+        for key, size in self._conn.execute('SELECT key, size FROM results ORDER BY last_used').fetchall():
+            if count <= self.max_entries and total <= self.max_bytes:
+                break
+            doomed.append((key,))
+            count -= 1
+            total -= size
+        self._conn.executemany('DELETE FROM results WHERE key = ?', doomed)
+        self._conn.execute('DELETE FROM url_etags WHERE key NOT IN (SELECT key FROM results)')
+
+    def get_url(self, scope, url):
+        """查詢網址上次抓取時的 ETag 與對應的內容鍵"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT etag, key FROM url_etags WHERE scope = ? AND url = ?', (scope, url)
+            ).fetchone()
+        return {'etag': row[0], 'key': row[1]} if row else None
+
+    def put_url(self, scope, url, etag, key):
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO url_etags (scope, url, etag, key) VALUES (?, ?, ?, ?)',
+                (scope, url, etag, key)
+            )
+            self._conn.commit()
+
+    def stats(self):
+        """命中統計（hits/misses 為本進程累計）"""
+        with self._lock:
+            count, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results'
+            ).fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': count, 'bytes': total}
+
+
+# 全局實例
+result_cache = None
+
+def get_result_cache():
+    """獲取全局分析結果快取實例"""
+    global result_cache
+    if result_cache is None:
+        result_cache = ResultCache(
+            path=os.environ.get('RESULT_CACHE_PATH', DEFAULT_CACHE_PATH),
+            max_entries=int(os.environ.get('RESULT_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+            max_bytes=int(os.environ.get('RESULT_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES)),
+            ttl=int(os.environ.get('RESULT_CACHE_TTL', DEFAULT_TTL))
+        )
+    return result_cache
@@ -0,0 +1,112 @@
+"""
+收藏清單 API 回應
+/korean/api/saved-words、/chinese/api/saved-words 與 web_app / web_app22 的 /api/saved-words 共用：
+清單經由 supabase_utils 的收藏清單快取讀取。設定共用快取（SAVED_WORDS_CACHE=redis）時
+回應帶 ETag（由資料庫中的筆數與最大 id 計算，見 word_list_etag），瀏覽器帶 If-None-Match
+且清單未變時直接由快取回應 304，不查詢資料庫；進程內快取無法得知其他進程的寫入，不提供 ETag
+
+帶 limit / cursor / fields 任一參數時改為分頁回應：依 saved_at 由新到舊的游標分頁，
+只回傳 fields 指定的欄位（例如 ?fields=chinese,english&limit=50），回應含 next_cursor
+
+批次收藏／刪除（…/api/saved-words/batch 的 POST / DELETE）各只對 Supabase 發出一次多列操作
+
+提供收藏功能的服務（railway_app、web_app、web_app22）都匯入本模組，
+個人詞彙總圖譜的收藏變更回呼在這裡統一註冊，任何一個服務寫入收藏都會更新圖譜
+"""
+from flask import request, jsonify, make_response
+from supabase_utils import (
+    get_saved_words, get_saved_words_page, decode_cursor, add_words, delete_words, add_word_listener,
+    MAX_BATCH_WORDS, HEADWORD_FIELDS, SAVED_WORD_FIELDS, DEFAULT_PAGE_LIMIT, MAX_PAGE_LIMIT
+)
+from vocab_graph import vocab_graph_listener
+
+# 收藏增刪時同步更新個人詞彙總圖譜
+add_word_listener(vocab_graph_listener)
+
+_PAGE_PARAMS = ('limit', 'cursor', 'fields')
+
+
+def saved_words_page_response(language, user_id):
+    """GET ?fields=a,b&limit=N&cursor=...：分頁與欄位投影"""
+    args = request.args
+    fields = None
+    if args.get('fields'):
+        fields = list(dict.fromkeys(f.strip() for f in args['fields'].split(',') if f.strip()))
+        unknown = [f for f in fields if f not in SAVED_WORD_FIELDS[language]]
+        if unknown or not fields:
+            return jsonify({
+                'error': f"不支援的欄位：{', '.join(unknown)}",
+                'fields': list(SAVED_WORD_FIELDS[language])
+            }), 400
+
+    try:
+        limit = int(args.get('limit', DEFAULT_PAGE_LIMIT))
+    except ValueError:
+        return jsonify({'error': 'limit 必須是整數'}), 400
+    if not 1 <= limit <= MAX_PAGE_LIMIT:
+        return jsonify({'error': f'limit 必須介於 1 到 {MAX_PAGE_LIMIT}'}), 400
+
+    cursor = None
+    if args.get('cursor'):
+        cursor = decode_cursor(args['cursor'])
+        if cursor is None:
+            return jsonify({'error': '無效的 cursor'}), 400
+
+    result = get_saved_words_page(language, user_id, fields=fields, limit=limit, cursor=cursor)
+    if result.get('success') is False:
+        return jsonify(result), 500
+    response = jsonify(result)
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def saved_words_response(language, user_id):
+    if any(param in request.args for param in _PAGE_PARAMS):
+        return saved_words_page_response(language, user_id)
+    words, etag = get_saved_words(language, user_id)
+    if etag and request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        response = jsonify({'words': words})
+    if etag:
+        response.set_etag(etag)
+    # 每次都需向伺服器確認（清單隨時可能變動），但未變動時只回 304
+    response.cache_control.private = True
+    response.cache_control.no_cache = True
+    return response
+
+
+def _batch_items(key):
+    """讀取 JSON body 中的清單；格式錯誤或超過上限時回傳 (None, 錯誤回應)"""
+    items = (request.get_json(silent=True) or {}).get(key)
+    if not isinstance(items, list) or not items:
+        return None, (jsonify({'error': f'需要非空的 {key} 清單'}), 400)
+    if len(items) > MAX_BATCH_WORDS:
+        return None, (jsonify({'error': f'單次最多 {MAX_BATCH_WORDS} 個單字'}), 400)
+    return items, None
+
+
+def batch_save_response(language, user_id):
+    """POST {"words": [{...}, ...]}：批次收藏"""
+    words, error = _batch_items('words')
+    if error:
+        return error
+    words = [word for word in words if isinstance(word, dict)]
+    result = add_words(language, user_id, words)
+    if result.get('success') is False:
+        return jsonify(result), 500
+    return jsonify(result)
+
+
+def batch_delete_response(language, user_id):
+    """DELETE {"words": ["詞1", ...]}（也接受 {"words": [{...}, ...]}）：批次刪除"""
+    words, error = _batch_items('words')
+    if error:
+        return error
+    field = HEADWORD_FIELDS[language]
+    headwords = [word.get(field) if isinstance(word, dict) else word for word in words]
+    result = delete_words(language, user_id, [h for h in headwords if isinstance(h, str)])
+    if result.get('success') is False:
+        return jsonify(result), 500
+    return jsonify(result)
@@ -0,0 +1,60 @@
+"""
+單一進程模式
+把韓文（web_app）與中文（web_app22）系統以 WSGI 分派直接掛載在 auth_app 之下：
+/korean-app、/chinese-app 的請求不再經由 HTTP 代理轉發到 5000/5001，
+也不必啟動兩個子進程並各等待 2 秒
+
+掛載的應用與代理模式看到的請求相同：未登入時導向 /login，
+X-User-ID / X-Username 由 auth_app 的 session 填入（忽略瀏覽器傳入的值）
+"""
+import urllib.parse
+
+from flask import Request, redirect
+from werkzeug.middleware.dispatcher import DispatcherMiddleware
+
+
+MOUNTS = {
+    '/korean-app': 'web_app',
+    '/chinese-app': 'web_app22'
+}
+
+
+class SessionAuthMiddleware:
+    """以 auth_app 的 session 驗證登入並注入用戶標頭"""
+
+    def __init__(self, auth_app, mounted_app):
+        self.auth_app = auth_app
+        self.mounted_app = mounted_app
+
+    def __call__(self, environ, start_response):
+        session = self.auth_app.session_interface.open_session(self.auth_app, Request(environ))
+        if not session or 'username' not in session:
+            return redirect('/login')(environ, start_response)
+
+        username = session.get('username', '')
+        environ['HTTP_X_USER_ID'] = session.get('user_id', '')
+        # URL 編碼 username 以避免中文字符導致 Latin-1 編碼錯誤
+        environ['HTTP_X_USERNAME'] = urllib.parse.quote(username) if username else ''
+        # /korean-app 與 /korean-app/ 同樣對應掛載應用的首頁（與代理模式相同，不多一次轉址）
+        environ['PATH_INFO'] = environ.get('PATH_INFO') or '/'
+        return self.mounted_app(environ, start_response)
+
+
+def mount_services(auth_app):
+    """把韓文／中文系統掛載到 auth_app.wsgi_app；回傳已掛載的前綴"""
+    import importlib
+
+    mounts = {}
+    for prefix, module_name in MOUNTS.items():
+        try:
+            module = importlib.import_module(module_name)
+        except Exception as e:
+            # 缺少依賴時保留該前綴的 HTTP 代理路由
+            print(f"✗ 無法載入 {module_name}: {e}")
+            continue
+        mounts[prefix] = SessionAuthMiddleware(auth_app, module.app)
+        print(f"✓ {module_name} 已掛載於 {prefix}")
+
+    if mounts:
+        auth_app.wsgi_app = DispatcherMiddleware(auth_app.wsgi_app, mounts)
+    return list(mounts)
@@ -0,0 +1,326 @@
+// 韓文詞彙知識圖譜
+// 樣式與程式為共用的靜態檔案（可由瀏覽器快取）；圖譜資料由檢視頁讀取 /…/graph/<id>.json 後放在 window.graphData
+const graphData = window.graphData;
+const nodes = graphData.nodes;
+const links = graphData.links;
+const urls = graphData.urls;
+
+// 資料來源與詞彙數
+const sourceLink = document.getElementById('graphSource');
+sourceLink.textContent = graphData.source;
+if (/^https?:\/\//.test(graphData.source)) {
+    sourceLink.href = graphData.source;
+}
+document.getElementById('graphWordCount').textContent = nodes.length;
+
+// 經由代理（例如 /korean-app）存取時，API 路徑需加上前綴
+const basePath = urls.base_path && window.location.pathname.startsWith(urls.base_path) ? urls.base_path : '';
+document.getElementById('reviewLink').href = basePath + urls.review;
+
+const width = document.getElementById('graph-container').clientWidth;
+const height = document.getElementById('graph-container').clientHeight;
+
+// 伺服器已預先計算佈局（graph_layout.py）時，座標以 (0, 0) 為中心，平移到畫面中央
+if (graphData.layout) {
+    nodes.forEach(d => {
+        d.x += width / 2;
+        d.y += height / 2;
+    });
+}
+
+const svg = d3.select("#graph-container")
+    .append("svg")
+    .attr("width", width)
+    .attr("height", height);
+
+const g = svg.append("g");
+
+// 添加縮放功能
+const zoom = d3.zoom()
+    .scaleExtent([0.1, 4])
+    .on('zoom', function(event) {
+        g.attr('transform', event.transform);
+    });
+
+svg.call(zoom);
+
+// 顏色比例尺
+const color = d3.scaleOrdinal()
+    .domain([0, 1, 2, 3, 4])
+    .range(['#FF6B6B', '#4ECDC4', '#45B7D1', '#96CEB4', '#FFEAA7']);
+
+// 力模擬
+const simulation = d3.forceSimulation(nodes)
+    .force("link", d3.forceLink(links).id(d => d.id).distance(100))
+    .force("charge", d3.forceManyBody().strength(-400))
+    .force("center", d3.forceCenter(width / 2, height / 2))
+    .force("collision", d3.forceCollide().radius(40));
+
+// 已接近平衡狀態，只需以低 alpha 跑幾個 tick
+if (graphData.layout) {
+    simulation.alpha(0.1);
+}
+
+// 創建連接線
+const link = g.append("g")
+    .selectAll("line")
+    .data(links)
+    .enter().append("line")
+    .attr("stroke", "rgba(255,255,255,0.3)")
+    .attr("stroke-width", d => Math.sqrt(d.value) * 2);
+
+// 創建節點
+const node = g.append("g")
+    .selectAll("g")
+    .data(nodes)
+    .enter().append("g")
+    .call(d3.drag()
+        .on("start", dragstarted)
+        .on("drag", dragged)
+        .on("end", dragended));
+
+// 節點圓圈
+node.append("circle")
+    .attr("r", 25)
+    .attr("fill", d => color(d.group))
+    .attr("stroke", "#fff")
+    .attr("stroke-width", 3);
+
+// 節點文字（韓文）
+node.append("text")
+    .text(d => d.korean)
+    .attr("x", 0)
+    .attr("y", 0)
+    .attr("text-anchor", "middle")
+    .attr("dominant-baseline", "middle")
+    .attr("font-size", "12px")
+    .attr("font-weight", "bold")
+    .attr("fill", "white")
+    .attr("pointer-events", "none");
+
+// 中文翻譯標籤
+node.append("text")
+    .text(d => d.chinese)
+    .attr("x", 0)
+    .attr("y", 35)
+    .attr("text-anchor", "middle")
+    .attr("font-size", "10px")
+    .attr("fill", "#ffeb3b")
+    .attr("pointer-events", "none");
+
+// 工具提示
+const tooltip = d3.select("body").append("div")
+    .attr("class", "tooltip")
+    .style("opacity", 0);
+
+// 顯示通知
+function showNotification(message, isSuccess = true) {
+    const notification = document.createElement('div');
+    notification.className = 'notification';
+    notification.style.borderColor = isSuccess ? '#4ecdc4' : '#ff6b6b';
+    notification.textContent = message;
+    document.body.appendChild(notification);
+
+    setTimeout(() => {
+        notification.remove();
+    }, 3000);
+}
+
+// 收藏單字功能
+function saveWord(wordData) {
+    console.log('[收藏] 開始收藏單字:', wordData);
+
+    fetch(basePath + urls.save, {
+        method: 'POST',
+        headers: {
+            'Content-Type': 'application/json',
+        },
+        body: JSON.stringify({ word: wordData })
+    })
+    .then(response => {
+        console.log('[收藏] HTTP 狀態:', response.status);
+        if (!response.ok) {
+            if (response.status === 401) {
+                throw new Error('未登入，請先登入');
+            }
+            throw new Error('HTTP ' + response.status);
+        }
+        return response.json();
+    })
+    .then(data => {
+        console.log('[收藏] 後端回應:', data);
+        if (data.error) {
+            showNotification('❌ ' + data.error, false);
+        } else if (data.exists) {
+            showNotification('⚠️ 單字已在收藏中', false);
+        } else {
+            showNotification('✅ 單字已收藏！');
+            markNodeAsSaved(wordData.korean);
+        }
+    })
+    .catch(error => {
+        console.error('[收藏] 錯誤:', error);
+        showNotification('❌ 收藏失敗: ' + error.message, false);
+    });
+}
+
+// 節點資料轉為收藏格式
+function toSavedWord(d) {
+    return {
+        korean: d.korean,
+        chinese: d.chinese,
+        definition: d.definition,
+        example_korean: d.example_korean,
+        example_chinese: d.example_chinese
+    };
+}
+
+// 一次收藏圖譜中的所有單字（單一批次請求）
+// 每個批次請求的詞數上限（對應伺服器的 MAX_BATCH_WORDS）
+const SAVE_BATCH_SIZE = 200;
+
+function saveAllWords() {
+    const words = nodes.map(toSavedWord);
+    const chunks = [];
+    for (let i = 0; i < words.length; i += SAVE_BATCH_SIZE) {
+        chunks.push(words.slice(i, i + SAVE_BATCH_SIZE));
+    }
+    Promise.all(chunks.map(chunk =>
+        fetch(basePath + urls.save_all, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify({ words: chunk })
+        })
+        .then(response => {
+            if (response.status === 401) {
+                throw new Error('未登入，請先登入');
+            }
+            return response.json();
+        })
+    ))
+    .then(results => {
+        const failed = results.find(data => data.error);
+        if (failed) {
+            showNotification('❌ ' + failed.error, false);
+            return;
+        }
+        const saved = results.reduce((sum, data) => sum + data.saved, 0);
+        const exists = results.reduce((sum, data) => sum + data.exists, 0);
+        showNotification(`✅ 已收藏 ${saved} 個單字` + (exists ? `（${exists} 個已在收藏中）` : ''));
+        nodes.forEach(d => markNodeAsSaved(d.korean));
+    })
+    .catch(error => {
+        console.error('[收藏] 錯誤:', error);
+        showNotification('❌ 收藏失敗: ' + error.message, false);
+    });
+}
+
+// 標記節點為已收藏
+function markNodeAsSaved(korean) {
+    node.each(function(d) {
+        if (d.korean === korean) {
+            const nodeGroup = d3.select(this);
+            if (nodeGroup.select('.saved-indicator').empty()) {
+                nodeGroup.append('text')
+                    .attr('class', 'saved-indicator')
+                    .text('⭐')
+                    .attr('x', 20)
+                    .attr('y', -20)
+                    .attr('font-size', '16px')
+                    .attr('pointer-events', 'none');
+            }
+        }
+    });
+}
+
+// 載入已收藏的單字並標記
+(function() {
+    fetch(basePath + urls.saved_words)
+        .then(response => response.json())
+        .then(data => {
+            const savedKoreans = data.words.map(w => w.korean);
+            savedKoreans.forEach(korean => {
+                markNodeAsSaved(korean);
+            });
+        })
+        .catch(error => console.error('Error loading saved words:', error));
+})();
+
+// 節點事件
+node.on("mouseover", function(event, d) {
+    tooltip.transition()
+        .duration(200)
+        .style("opacity", .9);
+    tooltip.html(`
+        <div class="korean">${d.korean}</div>
+        <div class="chinese">${d.chinese}</div>
+        <div class="definition"><strong>定義:</strong> ${d.definition}</div>
+        <div class="example"><strong>例句:</strong> ${d.example_korean}</div>
+        <div class="example"><strong>翻譯:</strong> ${d.example_chinese}</div>
+        <div style="margin-top: 10px; font-size: 10px; color: #4ecdc4;">💡 雙擊節點收藏單字</div>
+    `)
+        .style("left", (event.pageX + 10) + "px")
+        .style("top", (event.pageY - 28) + "px");
+})
+.on("mouseout", function(d) {
+    tooltip.transition()
+        .duration(500)
+        .style("opacity", 0);
+})
+.on("dblclick", function(event, d) {
+    event.stopPropagation();
+    saveWord(toSavedWord(d));
+});
+
+// 模擬更新
+simulation.on("tick", () => {
+    link
+        .attr("x1", d => d.source.x)
+        .attr("y1", d => d.source.y)
+        .attr("x2", d => d.target.x)
+        .attr("y2", d => d.target.y);
+
+    node
+        .attr("transform", d => `translate(${d.x},${d.y})`);
+});
+
+// 拖拽功能
+function dragstarted(event, d) {
+    if (!event.active) simulation.alphaTarget(0.3).restart();
+    d.fx = d.x;
+    d.fy = d.y;
+}
+
+function dragged(event, d) {
+    d.fx = event.x;
+    d.fy = event.y;
+}
+
+function dragended(event, d) {
+    if (!event.active) simulation.alphaTarget(0);
+    d.fx = null;
+    d.fy = null;
+}
+
+// 控制功能
+function restartSimulation() {
+    simulation.alpha(1).restart();
+}
+
+function centerGraph() {
+    const transform = d3.zoomIdentity.translate(width / 2, height / 2).scale(1);
+    svg.transition().duration(750).call(zoom.transform, transform);
+}
+
+// 使用說明彈窗控制
+function openHelpModal() {
+    document.getElementById('helpModal').classList.add('show');
+    document.getElementById('modalOverlay').classList.add('show');
+}
+
+function closeHelpModal() {
+    document.getElementById('helpModal').classList.remove('show');
+    document.getElementById('modalOverlay').classList.remove('show');
+}
@@ -3,11 +3,25 @@ Supabase 工具模塊
 提供單字收藏的數據庫操作功能
 """
 
+import base64
+import hashlib
+import json
 import os
-from typing import List, Dict, Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Dict, Optional, Tuple
 from datetime import datetime
+from flask import g, has_request_context
 from supabase import create_client, Client
 
+try:
+    import redis
+    REDIS_AVAILABLE = True
+except ImportError:
+    REDIS_AVAILABLE = False
+
 # 只在本地開發時加載 .env
 try:
     from dotenv import load_dotenv
@@ -41,55 +55,319 @@ def get_supabase_client() -> Client:
         _supabase_client = create_client(url, key)
     return _supabase_client
 
-# ==================== 韓文單字操作 ====================
+# ==================== 收藏變更通知 ====================
+
+_word_listeners = []
+
+def add_word_listener(listener):
+    """註冊收藏變更回呼 listener(language, user_id, action, words)
+
+    language 為 'ko' / 'zh'；action 為 'add'（words 為新增的資料列）或 'delete'（words 為詞彙字串）
+    """
+    if listener not in _word_listeners:
+        _word_listeners.append(listener)
+
+def _notify_word_change(language: str, user_id: str, action: str, words: List) -> None:
+    # 收藏清單快取一律先失效，再通知其他監聽者
+    get_word_list_cache().invalidate(language, user_id)
+    for listener in _word_listeners:
+        try:
+            listener(language, user_id, action, words)
+        except Exception as e:
+            print(f"Error in word listener: {e}")
+
+# ==================== 收藏清單快取 ====================
+
+# 各語言收藏所在的資料表與詞彙欄位
+WORD_TABLES = {'ko': 'korean_words', 'zh': 'chinese_words'}
+HEADWORD_FIELDS = {'ko': 'korean', 'zh': 'chinese'}
+
+def word_list_etag(count: int, max_id: Optional[int]) -> str:
+    """收藏清單的 ETag：由資料庫中的筆數與最大 id 計算
+
+    收藏只會新增或刪除（不修改既有資料列），新增必定使最大 id 變大、刪除必定使筆數變少，
+    因此兩者相同即代表清單相同
+    """
+    return hashlib.sha256(f"{count}:{max_id}".encode('utf-8')).hexdigest()[:32]
+
+class WordListCache:
+    """每位用戶收藏清單的讀取快取（read-through）
+
+    預設存在進程內存（LRU + TTL），只有本進程的增刪會讓它失效，因此 get_saved_words
+    每次讀取前仍向資料庫確認版本，且不對外提供 ETag。
+    設定 SAVED_WORDS_CACHE=redis 與 REDIS_URL 時改存 Redis（shared），所有進程共用同一份清單與失效，
+    命中時不必查詢資料庫，ETag 也可直接用來回應 304
+    """
+
+    def __init__(self, ttl: int = 300, max_entries: int = 1000, redis_url: Optional[str] = None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # (language, user_id) -> (expires_at, etag, words)
+        self._redis = redis.Redis.from_url(redis_url) if redis_url else None
+
+    @property
+    def shared(self) -> bool:
+        """快取是否跨進程共用（失效會同步到所有進程）"""
+        return self._redis is not None
+
+    @staticmethod
+    def _redis_key(language: str, user_id: str) -> str:
+        return f"saved_words:{language}:{user_id}"
+
+    def get(self, language: str, user_id: str) -> Optional[Tuple[List[Dict], str]]:
+        """回傳 (words, etag)，未命中或已過期時回傳 None"""
+        if self._redis is not None:
+            data = self._redis.get(self._redis_key(language, user_id))
+            entry = json.loads(data) if data else None
+            result = (entry['words'], entry['etag']) if entry else None
+        else:
+            with self._lock:
+                entry = self._entries.get((language, user_id))
+                if entry and entry[0] < time.time():
+                    del self._entries[(language, user_id)]
+                    entry = None
+                if entry:
+                    self._entries.move_to_end((language, user_id))
+                result = (entry[2], entry[1]) if entry else None
+        if result is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return result
+
+    def put(self, language: str, user_id: str, words: List[Dict]) -> str:
+        """寫入清單並回傳其 ETag（見 word_list_etag）"""
+        etag = word_list_etag(len(words), max((w['id'] for w in words), default=None))
+        if self._redis is not None:
+            self._redis.set(
+                self._redis_key(language, user_id),
+                json.dumps({'etag': etag, 'words': words}, ensure_ascii=False, default=str),
+                ex=self.ttl
+            )
+        else:
+            with self._lock:
+                self._entries[(language, user_id)] = (time.time() + self.ttl, etag, words)
+                self._entries.move_to_end((language, user_id))
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return etag
+
+    def invalidate(self, language: str, user_id: str) -> None:
+        if self._redis is not None:
+            self._redis.delete(self._redis_key(language, user_id))
+        else:
+            with self._lock:
+                self._entries.pop((language, user_id), None)
+
+    def stats(self) -> Dict:
+        """命中統計（hits/misses 為本進程累計）"""
+        return {
+            'backend': 'redis' if self._redis is not None else 'memory',
+            'hits': self.hits,
+            'misses': self.misses,
+            'entries': len(self._entries)
+        }
+
+# 全局實例
+_word_list_cache: Optional[WordListCache] = None
+
+def get_word_list_cache() -> WordListCache:
+    """獲取全局收藏清單快取實例"""
+    global _word_list_cache
+    if _word_list_cache is None:
+        redis_url = None
+        if os.environ.get('SAVED_WORDS_CACHE') == 'redis':
+            if REDIS_AVAILABLE and os.environ.get('REDIS_URL'):
+                redis_url = os.environ['REDIS_URL']
+            else:
+                print("✗ SAVED_WORDS_CACHE=redis 但未安裝 redis 或未設定 REDIS_URL，改用內存")
+        _word_list_cache = WordListCache(
+            ttl=int(os.environ.get('SAVED_WORDS_CACHE_TTL', 300)),
+            max_entries=int(os.environ.get('SAVED_WORDS_CACHE_MAX_ENTRIES', 1000)),
+            redis_url=redis_url
+        )
+    return _word_list_cache
+
+def _cached_word_list(language: str, user_id: str) -> Optional[Tuple[List[Dict], str]]:
+    try:
+        return get_word_list_cache().get(language, user_id)
+    except Exception as e:
+        print(f"Error reading word list cache: {e}")
+        return None
+
+def _current_word_list_etag(language: str, user_id: str) -> Optional[str]:
+    """向 Supabase 查詢目前清單的 ETag（只取筆數與最大 id，一次往返）；失敗時回傳 None"""
+    try:
+        response = get_supabase_client().table(WORD_TABLES[language])\
+            .select('id', count='exact')\
+            .eq('user_id', user_id)\
+            .order('id', desc=True)\
+            .limit(1)\
+            .execute()
+        max_id = response.data[0]['id'] if response.data else None
+        return word_list_etag(response.count or 0, max_id)
+    except Exception as e:
+        print(f"Error fetching {WORD_TABLES[language]} version: {e}")
+        return None
+
+def get_saved_words(language: str, user_id: str) -> Tuple[List[Dict], Optional[str]]:
+    """獲取用戶的收藏清單與 ETag（依收藏時間由新到舊）
+
+    只有共用快取（Redis）會回傳 ETag：命中時不查詢資料庫，If-None-Match 可直接回應 304。
+    進程內快取收不到其他進程的失效，每次先以一列的計數查詢確認版本，一致才使用快取，
+    ETag 為 None（回應 304 前仍需查詢資料庫，沒有意義）。
+    未命中才查詢完整清單；查詢失敗時回傳空清單且 ETag 為 None（不寫入快取）
+    """
+    shared = get_word_list_cache().shared
+    if shared:
+        cached = _cached_word_list(language, user_id)
+        if cached is not None:
+            return cached
+    else:
+        etag = _current_word_list_etag(language, user_id)
+        cached = _cached_word_list(language, user_id) if etag else None
+        if cached is not None and cached[1] == etag:
+            return cached[0], None
 
-def get_korean_words(user_id: str) -> List[Dict]:
-    """獲取用戶的所有韓文單字"""
     try:
         supabase = get_supabase_client()
-        response = supabase.table('korean_words')\
+        response = supabase.table(WORD_TABLES[language])\
             .select('*')\
             .eq('user_id', user_id)\
             .order('saved_at', desc=True)\
+            .order('id', desc=True)\
             .execute()
-        return response.data if response.data else []
+        words = response.data if response.data else []
     except Exception as e:
-        print(f"Error fetching Korean words: {e}")
-        return []
+        print(f"Error fetching {WORD_TABLES[language]}: {e}")
+        return [], None
+
+    try:
+        etag = get_word_list_cache().put(language, user_id, words)
+        return words, etag if shared else None
+    except Exception as e:
+        print(f"Error writing word list cache: {e}")
+        return words, None
+
+# ==================== 收藏清單分頁與欄位投影 ====================
+
+# 可透過 fields= 選取的欄位
+SAVED_WORD_FIELDS = {
+    'ko': ('id', 'korean', 'chinese', 'definition', 'example_korean', 'example_chinese', 'saved_at'),
+    'zh': ('id', 'chinese', 'english', 'definition', 'example_chinese', 'example_english',
+           'level', 'level_category', 'level_number', 'saved_at')
+}
+DEFAULT_PAGE_LIMIT = 100
+MAX_PAGE_LIMIT = 500
+# 游標中的 saved_at 會放進 PostgREST 的 or 篩選字串，只接受 ISO-8601 時間（不可含引號或逗號）
+_CURSOR_TIMESTAMP = re.compile(r'^\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(\.\d{1,6})?(Z|[+-]\d{2}:?\d{2})?$')
+
+def encode_cursor(word: Dict) -> str:
+    """以最後一筆的 (saved_at, id) 作為下一頁的游標"""
+    raw = json.dumps([word.get('saved_at'), word.get('id')], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+def decode_cursor(cursor: str) -> Optional[Tuple[str, int]]:
+    """解析游標，格式錯誤時回傳 None"""
+    try:
+        saved_at, word_id = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        if (isinstance(saved_at, str) and _CURSOR_TIMESTAMP.fullmatch(saved_at)
+                and isinstance(word_id, int) and not isinstance(word_id, bool)):
+            return saved_at, word_id
+    except (ValueError, TypeError):
+        pass
+    return None
+
+def get_saved_words_page(language: str, user_id: str, fields: Optional[List[str]] = None,
+                         limit: int = DEFAULT_PAGE_LIMIT, cursor: Optional[Tuple[str, int]] = None) -> Dict:
+    """依 (saved_at, id) 由新到舊的鍵集分頁（keyset pagination），只回傳 fields 指定的欄位
+
+    共用快取（Redis）中已有完整清單時直接在記憶體中切出該頁；否則只向 Supabase 查詢這一頁與所需欄位，
+    查詢量不隨收藏總數增加。回傳 {'words': [...], 'next_cursor': 游標或 None}
+    """
+    table = WORD_TABLES[language]
+    limit = max(1, min(limit, MAX_PAGE_LIMIT))
+    # 計算下一頁游標需要 saved_at 與 id
+    columns = list(dict.fromkeys([*(fields or SAVED_WORD_FIELDS[language]), 'saved_at', 'id']))
+
+    # 進程內快取可能已被其他進程的寫入淘汰，只信任共用快取
+    cached = _cached_word_list(language, user_id) if get_word_list_cache().shared else None
+    if cached is not None:
+        rows = cached[0]
+        if cursor:
+            rows = [w for w in rows if (w.get('saved_at') or '', w.get('id') or 0) < cursor]
+        rows = rows[:limit + 1]
+    else:
+        try:
+            supabase = get_supabase_client()
+            query = supabase.table(table)\
+                .select(','.join(columns))\
+                .eq('user_id', user_id)
+            if cursor:
+                saved_at, word_id = cursor
+                query = query.or_(f'saved_at.lt."{saved_at}",and(saved_at.eq."{saved_at}",id.lt.{word_id})')
+            response = query\
+                .order('saved_at', desc=True)\
+                .order('id', desc=True)\
+                .limit(limit + 1)\
+                .execute()
+            rows = response.data if response.data else []
+        except Exception as e:
+            print(f"Error fetching {table} page: {e}")
+            return {'error': str(e), 'success': False}
+
+    # 多取一筆判斷是否還有下一頁
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    wanted = fields or SAVED_WORD_FIELDS[language]
+    return {
+        'words': [{field: row.get(field) for field in wanted} for row in rows],
+        'next_cursor': encode_cursor(rows[-1]) if has_more and rows else None
+    }
+
+# ==================== 韓文單字操作 ====================
+
+def get_korean_words(user_id: str) -> List[Dict]:
+    """獲取用戶的所有韓文單字（經由收藏清單快取）"""
+    return get_saved_words('ko', user_id)[0]
+
+def _korean_row(user_id: str, word_data: Dict) -> Dict:
+    return {
+        'user_id': user_id,
+        'korean': word_data.get('korean'),
+        'chinese': word_data.get('chinese'),
+        'definition': word_data.get('definition'),
+        'example_korean': word_data.get('example_korean'),
+        'example_chinese': word_data.get('example_chinese'),
+        'saved_at': datetime.now().isoformat()
+    }
 
 def add_korean_word(user_id: str, word_data: Dict) -> Dict:
     """添加韓文單字到收藏"""
     try:
         supabase = get_supabase_client()
 
-        # 檢查是否已存在
-        existing = supabase.table('korean_words')\
-            .select('id')\
-            .eq('user_id', user_id)\
-            .eq('korean', word_data.get('korean'))\
-            .execute()
-
-        if existing.data:
-            return {'message': '單字已存在於收藏中', 'exists': True}
-
         # 準備數據（韓文不需要分級）
-        data = {
-            'user_id': user_id,
-            'korean': word_data.get('korean'),
-            'chinese': word_data.get('chinese'),
-            'definition': word_data.get('definition'),
-            'example_korean': word_data.get('example_korean'),
-            'example_chinese': word_data.get('example_chinese'),
-            'saved_at': datetime.now().isoformat()
-        }
+        data = _korean_row(user_id, word_data)
 
         print(f"[DB] 準備插入的韓文資料: {data}")
 
-        # 插入數據
-        response = supabase.table('korean_words').insert(data).execute()
+        # 以 (user_id, korean) 唯一約束做 insert-on-conflict：一次往返完成檢查與寫入，
+        # 重複點擊同時送出也只會有一筆；已收藏時不新增資料列，回傳的 data 為空
+        response = supabase.table('korean_words')\
+            .upsert(data, on_conflict='user_id,korean', ignore_duplicates=True)\
+            .execute()
+
+        if not response.data:
+            return {'message': '單字已存在於收藏中', 'exists': True}
 
         print(f"[DB] 插入成功: {response.data}")
 
+        _notify_word_change('ko', user_id, 'add', response.data)
+
         return {'message': '單字已收藏', 'exists': False, 'data': response.data}
 
     except Exception as e:
@@ -107,6 +385,7 @@ def delete_korean_word(user_id: str, korean: str) -> Dict:
             .eq('korean', korean)\
             .execute()
 
+        _notify_word_change('ko', user_id, 'delete', [korean])
         return {'message': '單字已移除'}
 
     except Exception as e:
@@ -116,55 +395,46 @@ def delete_korean_word(user_id: str, korean: str) -> Dict:
 # ==================== 中文單字操作 ====================
 
 def get_chinese_words(user_id: str) -> List[Dict]:
-    """獲取用戶的所有中文單字"""
-    try:
-        supabase = get_supabase_client()
-        response = supabase.table('chinese_words')\
-            .select('*')\
-            .eq('user_id', user_id)\
-            .order('saved_at', desc=True)\
-            .execute()
-        return response.data if response.data else []
-    except Exception as e:
-        print(f"Error fetching Chinese words: {e}")
-        return []
+    """獲取用戶的所有中文單字（經由收藏清單快取）"""
+    return get_saved_words('zh', user_id)[0]
+
+def _chinese_row(user_id: str, word_data: Dict) -> Dict:
+    return {
+        'user_id': user_id,
+        'chinese': word_data.get('chinese'),
+        'english': word_data.get('english'),
+        'definition': word_data.get('definition'),
+        'example_chinese': word_data.get('example_chinese'),
+        'example_english': word_data.get('example_english'),
+        'level': word_data.get('level', '未分級'),
+        'level_category': word_data.get('level_category', '未分級'),
+        'level_number': word_data.get('level_number', ''),
+        'saved_at': datetime.now().isoformat()
+    }
 
 def add_chinese_word(user_id: str, word_data: Dict) -> Dict:
     """添加中文單字到收藏"""
     try:
         supabase = get_supabase_client()
 
-        # 檢查是否已存在
-        existing = supabase.table('chinese_words')\
-            .select('id')\
-            .eq('user_id', user_id)\
-            .eq('chinese', word_data.get('chinese'))\
-            .execute()
-
-        if existing.data:
-            return {'message': '單字已存在於收藏中', 'exists': True}
-
         # 準備數據
-        data = {
-            'user_id': user_id,
-            'chinese': word_data.get('chinese'),
-            'english': word_data.get('english'),
-            'definition': word_data.get('definition'),
-            'example_chinese': word_data.get('example_chinese'),
-            'example_english': word_data.get('example_english'),
-            'level': word_data.get('level', '未分級'),
-            'level_category': word_data.get('level_category', '未分級'),
-            'level_number': word_data.get('level_number', ''),
-            'saved_at': datetime.now().isoformat()
-        }
+        data = _chinese_row(user_id, word_data)
 
         print(f"[DB] 準備插入的資料: {data}")
 
-        # 插入數據
-        response = supabase.table('chinese_words').insert(data).execute()
+        # 以 (user_id, chinese) 唯一約束做 insert-on-conflict：一次往返完成檢查與寫入，
+        # 重複點擊同時送出也只會有一筆；已收藏時不新增資料列，回傳的 data 為空
+        response = supabase.table('chinese_words')\
+            .upsert(data, on_conflict='user_id,chinese', ignore_duplicates=True)\
+            .execute()
+
+        if not response.data:
+            return {'message': '單字已存在於收藏中', 'exists': True}
 
         print(f"[DB] 插入成功: {response.data}")
 
+        _notify_word_change('zh', user_id, 'add', response.data)
+
         return {'message': '單字已收藏', 'exists': False, 'data': response.data}
 
     except Exception as e:
@@ -182,20 +452,93 @@ def delete_chinese_word(user_id: str, chinese: str) -> Dict:
             .eq('chinese', chinese)\
             .execute()
 
+        _notify_word_change('zh', user_id, 'delete', [chinese])
         return {'message': '單字已移除'}
 
     except Exception as e:
         print(f"Error deleting Chinese word: {e}")
         return {'error': str(e), 'success': False}
 
+# ==================== 批次收藏操作 ====================
+
+# 單次批次操作的詞數上限
+MAX_BATCH_WORDS = 200
+
+_ROW_BUILDERS = {'ko': _korean_row, 'zh': _chinese_row}
+
+def add_words(language: str, user_id: str, words_data: List[Dict]) -> Dict:
+    """批次收藏：一次多列 insert-on-conflict，已收藏的詞略過
+
+    回傳 {'message', 'saved': 新增數, 'exists': 已存在數, 'data': 新增的資料列}
+    """
+    table = WORD_TABLES[language]
+    field = HEADWORD_FIELDS[language]
+    try:
+        # 同一批內的重複詞只保留第一個（同一指令中重複的衝突鍵會讓 upsert 失敗）
+        rows = {}
+        for word_data in words_data:
+            headword = word_data.get(field)
+            if headword and headword not in rows:
+                rows[headword] = _ROW_BUILDERS[language](user_id, word_data)
+        if not rows:
+            return {'message': '沒有可收藏的單字', 'saved': 0, 'exists': 0, 'data': []}
+
+        supabase = get_supabase_client()
+        response = supabase.table(table)\
+            .upsert(list(rows.values()), on_conflict=f'user_id,{field}', ignore_duplicates=True)\
+            .execute()
+        inserted = response.data or []
+
+        print(f"[DB] 批次收藏 {table}: 新增 {len(inserted)} / {len(rows)}")
+
+        if inserted:
+            _notify_word_change(language, user_id, 'add', inserted)
+        return {
+            'message': f'已收藏 {len(inserted)} 個單字',
+            'saved': len(inserted),
+            'exists': len(rows) - len(inserted),
+            'data': inserted
+        }
+
+    except Exception as e:
+        print(f"Error adding {table} in batch: {e}")
+        return {'error': str(e), 'success': False}
+
+def delete_words(language: str, user_id: str, headwords: List[str]) -> Dict:
+    """批次刪除：一次 DELETE ... WHERE headword IN (...)"""
+    table = WORD_TABLES[language]
+    field = HEADWORD_FIELDS[language]
+    try:
+        headwords = list(dict.fromkeys(h for h in headwords if h))
+        if not headwords:
+            return {'message': '沒有要移除的單字', 'deleted': 0}
+
+        supabase = get_supabase_client()
+        response = supabase.table(table)\
+            .delete()\
+            .eq('user_id', user_id)\
+            .in_(field, headwords)\
+            .execute()
+        deleted = [row.get(field) for row in (response.data or [])]
+
+        _notify_word_change(language, user_id, 'delete', headwords)
+        return {'message': f'已移除 {len(deleted)} 個單字', 'deleted': len(deleted), 'words': deleted}
+
+    except Exception as e:
+        print(f"Error deleting {table} in batch: {e}")
+        return {'error': str(e), 'success': False}
+
 # ==================== 用戶帳號操作 ====================
 
+# 不含 avatar（base64 圖片可達數 MB）；登入與改密碼需要 password
+USER_COLUMNS = 'id,username,password,email,language,created_at,last_login'
+
 def get_user_by_username(username: str) -> Optional[Dict]:
-    """根據用戶名獲取用戶資料"""
+    """根據用戶名獲取用戶資料（不經快取，含密碼雜湊，供登入驗證使用）"""
     try:
         supabase = get_supabase_client()
         response = supabase.table('users')\
-            .select('*')\
+            .select(USER_COLUMNS)\
             .eq('username', username)\
             .execute()
 
@@ -206,12 +549,85 @@ def get_user_by_username(username: str) -> Optional[Dict]:
         print(f"Error fetching user by username: {e}")
         return None
 
+def get_user_avatar(username: str) -> Optional[str]:
+    """只查詢用戶頭像欄位"""
+    try:
+        supabase = get_supabase_client()
+        response = supabase.table('users')\
+            .select('avatar')\
+            .eq('username', username)\
+            .execute()
+
+        if response.data and len(response.data) > 0:
+            return response.data[0].get('avatar')
+        return None
+    except Exception as e:
+        print(f"Error fetching user avatar: {e}")
+        return None
+
+# ==================== 用戶資料快取 ====================
+
+# 頁面渲染只需要這些欄位（不含密碼與頭像）
+USER_PROFILE_COLUMNS = 'id,username,email,language,created_at,last_login'
+# 多個 worker 進程各自快取，其他進程的 update_user 最多延遲 TTL 秒生效
+USER_PROFILE_CACHE_TTL = int(os.environ.get('USER_PROFILE_CACHE_TTL', 30))
+USER_PROFILE_CACHE_MAX_ENTRIES = 1000
+
+_profile_lock = threading.Lock()
+_profiles = OrderedDict()   # username -> (expires_at, profile)
+
+def load_user_profile(username: str) -> Optional[Dict]:
+    """獲取用戶資料（不含密碼與頭像）
+
+    同一個請求內只查一次（flask.g），跨請求以短 TTL 的進程快取保存；
+    update_user 會使快取失效。查無用戶時不寫入進程快取
+    """
+    memo = g.setdefault('_user_profiles', {}) if has_request_context() else None
+    if memo is not None and username in memo:
+        return memo[username]
+
+    with _profile_lock:
+        entry = _profiles.get(username)
+        if entry and entry[0] < time.time():
+            del _profiles[username]
+            entry = None
+        profile = entry[1] if entry else None
+
+    if entry is None:
+        try:
+            supabase = get_supabase_client()
+            response = supabase.table('users')\
+                .select(USER_PROFILE_COLUMNS)\
+                .eq('username', username)\
+                .execute()
+            profile = response.data[0] if response.data else None
+        except Exception as e:
+            print(f"Error fetching user profile: {e}")
+            return None
+        if profile is not None:
+            with _profile_lock:
+                _profiles[username] = (time.time() + USER_PROFILE_CACHE_TTL, profile)
+                _profiles.move_to_end(username)
+                while len(_profiles) > USER_PROFILE_CACHE_MAX_ENTRIES:
+                    _profiles.popitem(last=False)
+
+    if memo is not None:
+        memo[username] = profile
+    return profile
+
+def invalidate_user_profile(username: str) -> None:
+    """移除用戶資料快取（本進程與本次請求）"""
+    with _profile_lock:
+        _profiles.pop(username, None)
+    if has_request_context():
+        g.get('_user_profiles', {}).pop(username, None)
+
 def get_user_by_email(email: str) -> Optional[Dict]:
-    """根據 email 獲取用戶資料"""
+    """根據 email 獲取用戶資料（欄位同 get_user_by_username，不含頭像）"""
     try:
         supabase = get_supabase_client()
         response = supabase.table('users')\
-            .select('*')\
+            .select(USER_COLUMNS)\
             .eq('email', email)\
             .execute()
 
@@ -259,17 +675,21 @@ def create_user(username: str, password_hash: str, email: str = None, language:
         return {'success': False, 'error': str(e)}
 
 def update_user(username: str, updates: Dict) -> Dict:
-    """更新用戶資料"""
+    """更新用戶資料
+
+    不回傳更新後的資料列（避免每次更新都傳回整列與頭像），以受影響列數判斷是否成功
+    """
     try:
         supabase = get_supabase_client()
 
         response = supabase.table('users')\
-            .update(updates)\
+            .update(updates, count='exact', returning='minimal')\
             .eq('username', username)\
             .execute()
+        invalidate_user_profile(username)
 
-        if response.data:
-            return {'success': True, 'user': response.data[0]}
+        if response.count:
+            return {'success': True}
         return {'success': False, 'error': 'update_failed'}
 
     except Exception as e:
@@ -0,0 +1,176 @@
+import os
+import sys
+
+import pytest
+
+# 測試直接匯入專案根目錄的模組
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class FakeResponse:
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+class FakeQuery:
+    """supabase-py 查詢建構器的最小替身：在記憶體中的資料列上執行 eq / neq / in_ / order / limit"""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.op = 'select'
+        self.columns = '*'
+        self.payload = None
+        self.options = {}
+        self.filters = []
+        self.or_filters = []
+        self.orders = []
+        self.row_limit = None
+
+    def select(self, columns='*', count=None):
+        self.columns = columns
+        self.options['count'] = count
+        return self
+
+    def insert(self, rows, **options):
+        self.op, self.payload, self.options = 'insert', rows, options
+        return self
+
+    def upsert(self, rows, **options):
+        self.op, self.payload, self.options = 'upsert', rows, options
+        return self
+
+    def update(self, values, **options):
+        self.op, self.payload, self.options = 'update', values, options
+        return self
+
+    def delete(self, **options):
+        self.op, self.options = 'delete', options
+        return self
+
+    def eq(self, field, value):
+        self.filters.append(lambda row: row.get(field) == value)
+        return self
+
+    def neq(self, field, value):
+        self.filters.append(lambda row: row.get(field) != value)
+        return self
+
+    def in_(self, field, values):
+        self.filters.append(lambda row: row.get(field) in values)
+        return self
+
+    def or_(self, expression):
+        # 只記錄，鍵集分頁的篩選由呼叫端檢查字串
+        self.or_filters.append(expression)
+        return self
+
+    def order(self, field, desc=False):
+        self.orders.append((field, desc))
+        return self
+
+    def limit(self, n):
+        self.row_limit = n
+        return self
+
+    def _project(self, row):
+        if self.columns == '*':
+            return dict(row)
+        return {column: row.get(column) for column in self.columns.split(',')}
+
+    def execute(self):
+        self.client.queries.append(self)
+        rows = self.client.tables.setdefault(self.table, [])
+        matched = [row for row in rows if all(f(row) for f in self.filters)]
+        returning = str(self.options.get('returning') or 'representation')
+        minimal = returning.endswith('minimal')
+
+        if self.op == 'select':
+            for field, desc in reversed(self.orders):
+                matched.sort(key=lambda row: row.get(field), reverse=desc)
+            count = len(matched) if self.options.get('count') else None
+            if self.row_limit is not None:
+                matched = matched[:self.row_limit]
+            return FakeResponse([self._project(row) for row in matched], count)
+
+        if self.op in ('insert', 'upsert'):
+            new_rows = self.payload if isinstance(self.payload, list) else [self.payload]
+            keys = self.options.get('on_conflict', '').split(',') if self.op == 'upsert' else []
+            inserted = []
+            for row in new_rows:
+                if keys and any(all(old.get(k) == row.get(k) for k in keys) for old in rows):
+                    continue
+                row = dict(row, id=self.client.next_id())
+                rows.append(row)
+                inserted.append(row)
+            return FakeResponse([] if minimal else inserted)
+
+        if self.op == 'update':
+            for row in matched:
+                row.update(self.payload)
+            count = len(matched) if self.options.get('count') else None
+            return FakeResponse([] if minimal else [dict(row) for row in matched], count)
+
+        self.client.tables[self.table] = [row for row in rows if row not in matched]
+        return FakeResponse([] if minimal else matched)
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value, ex=None):
+        self.data[key] = value.encode('utf-8')
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+
+class FakeSupabase:
+    def __init__(self):
+        self.tables = {}
+        self.queries = []
+        self._id = 0
+
+    def next_id(self):
+        self._id += 1
+        return self._id
+
+    def table(self, name):
+        return FakeQuery(self, name)
+
+
+@pytest.fixture
+def fake_supabase(monkeypatch):
+    """以記憶體中的假 Supabase 取代 supabase_utils 的客戶端，並清空各種快取"""
+    import supabase_utils
+    client = FakeSupabase()
+    monkeypatch.setattr(supabase_utils, '_supabase_client', client)
+    monkeypatch.setattr(supabase_utils, '_word_list_cache', None)
+    monkeypatch.setattr(supabase_utils, '_profiles', type(supabase_utils._profiles)())
+    monkeypatch.setattr(supabase_utils, '_word_listeners', [])
+    monkeypatch.delenv('SAVED_WORDS_CACHE', raising=False)
+    return client
+
+
+@pytest.fixture
+def railway_client(tmp_path, monkeypatch):
+    monkeypatch.setenv('JOB_STORE', 'memory')
+    monkeypatch.setenv('RESULT_CACHE_PATH', str(tmp_path / 'results.sqlite3'))
+    monkeypatch.setenv('WORD_CACHE_PATH', str(tmp_path / 'words.sqlite3'))
+    monkeypatch.setenv('VOCAB_GRAPH_PATH', str(tmp_path / 'graph.sqlite3'))
+    railway_app = pytest.importorskip('railway_app')
+    # 全局快取實例改用本次測試的暫存檔
+    import result_cache, vocab_graph, word_cache
+    monkeypatch.setattr(result_cache, 'result_cache', None)
+    monkeypatch.setattr(word_cache, 'word_cache', None)
+    monkeypatch.setattr(vocab_graph, 'vocab_graph', None)
+    client = railway_app.app.test_client()
+    with client.session_transaction() as session:
+        session['username'] = 'tester'
+        session['user_id'] = 'u1'
+    return railway_app, client
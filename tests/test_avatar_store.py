@@ -0,0 +1,74 @@
+import base64
+import hashlib
+
+import pytest
+
+import avatar_store
+from avatar_store import (
+    AVATAR_NAME, AVATAR_URL_PREFIX, MAX_UPLOAD_BYTES, AvatarStore, LocalAvatarBackend, decode_data_uri
+)
+
+
+def data_uri(data, content_type='image/png'):
+    return f"data:{content_type};base64,{base64.b64encode(data).decode('ascii')}"
+
+
+def test_decode_data_uri():
+    assert decode_data_uri(data_uri(b'abc')) == (b'abc', 'image/png')
+    assert decode_data_uri(data_uri(b'abc', 'image/jpg')) == (b'abc', 'image/jpg')
+
+
+@pytest.mark.parametrize('value', [
+    None, '', 'abc', 'data:image/png,abc', 'data:text/plain;base64,YWJj',
+    'data:image/svg+xml;base64,YWJj', 'data:image/png;base64,YWJ'
+])
+def test_decode_data_uri_rejects_invalid(value):
+    assert decode_data_uri(value) is None
+
+
+def test_avatar_name_pattern():
+    digest = hashlib.sha256(b'x').hexdigest()
+    assert AVATAR_NAME.match(f'{digest}.png')
+    assert AVATAR_NAME.match(f'{digest}.webp')
+    for name in (f'{digest}.svg', f'{digest[:-1]}.png', f'{digest.upper()}.png',
+                 f'../{digest}.png', f'{digest}.png/..', 'index.sqlite3'):
+        assert not AVATAR_NAME.match(name)
+
+
+def test_local_round_trip(tmp_path):
+    store = AvatarStore(LocalAvatarBackend(str(tmp_path)))
+    url = store.save_data_uri(data_uri(b'not really a png'))
+    assert url.startswith(AVATAR_URL_PREFIX)
+    name = url[len(AVATAR_URL_PREFIX):]
+    data, content_type = store.load(name)
+    assert content_type == 'image/png'
+    assert name == f'{hashlib.sha256(data).hexdigest()}.png'
+    # 同內容再次上傳得到同一個網址
+    assert store.save_data_uri(data_uri(b'not really a png')) == url
+
+
+def test_load_rejects_unknown_and_invalid_names(tmp_path):
+    store = AvatarStore(LocalAvatarBackend(str(tmp_path)))
+    assert store.load(f"{hashlib.sha256(b'missing').hexdigest()}.png") is None
+    assert store.load('../../etc/passwd') is None
+
+
+def test_rejects_invalid_format_and_oversized_upload(tmp_path):
+    store = AvatarStore(LocalAvatarBackend(str(tmp_path)))
+    with pytest.raises(ValueError):
+        store.save_data_uri('data:text/plain;base64,YWJj')
+    with pytest.raises(ValueError):
+        store.save_data_uri(data_uri(b'\0' * (MAX_UPLOAD_BYTES + 1)))
+    assert not any(tmp_path.iterdir())
+
+
+def test_default_local_backend_is_not_durable(monkeypatch, tmp_path):
+    monkeypatch.setattr(avatar_store, 'avatar_store', None)
+    monkeypatch.delenv('AVATAR_BACKEND', raising=False)
+    monkeypatch.delenv('AVATAR_STORE_PATH', raising=False)
+    assert not avatar_store.get_avatar_store().durable
+
+    monkeypatch.setattr(avatar_store, 'avatar_store', None)
+    monkeypatch.setenv('AVATAR_STORE_PATH', str(tmp_path))
+    store = avatar_store.get_avatar_store()
+    assert store.durable and store.backend.root == str(tmp_path)
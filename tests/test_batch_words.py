@@ -0,0 +1,73 @@
+import pytest
+from flask import Flask
+
+import supabase_utils
+from saved_words_api import batch_delete_response, batch_save_response
+from supabase_utils import MAX_BATCH_WORDS, add_words, delete_words
+
+
+def test_add_words_dedups_within_batch_and_counts_existing(fake_supabase):
+    add_words('zh', 'u1', [{'chinese': '學生'}])
+    fake_supabase.queries.clear()
+
+    result = add_words('zh', 'u1', [
+        {'chinese': '學生'}, {'chinese': '老師', 'english': 'teacher'},
+        {'chinese': '老師', 'english': 'duplicate'}, {'chinese': ''}, {'english': 'no headword'}
+    ])
+
+    assert (result['saved'], result['exists']) == (1, 1)
+    assert [row['chinese'] for row in result['data']] == ['老師']
+    # 同一批只送出一次多列 upsert，批內重複只保留第一個
+    assert len(fake_supabase.queries) == 1
+    assert [row['chinese'] for row in fake_supabase.queries[0].payload] == ['學生', '老師']
+    assert [row['english'] for row in fake_supabase.tables['chinese_words'] if row['chinese'] == '老師'] == ['teacher']
+
+
+def test_add_words_without_headwords_skips_database(fake_supabase):
+    assert add_words('ko', 'u1', [{'chinese': '學生'}]) == {
+        'message': '沒有可收藏的單字', 'saved': 0, 'exists': 0, 'data': []
+    }
+    assert fake_supabase.queries == []
+
+
+def test_add_words_notifies_only_new_rows(fake_supabase):
+    changes = []
+    supabase_utils.add_word_listener(lambda *change: changes.append(change))
+    add_words('ko', 'u1', [{'korean': '학생'}])
+    add_words('ko', 'u1', [{'korean': '학생'}])
+    assert [(language, action, [row['korean'] for row in words]) for language, _, action, words in changes] == [
+        ('ko', 'add', ['학생'])
+    ]
+
+
+def test_delete_words_dedups_and_counts_deleted(fake_supabase):
+    add_words('ko', 'u1', [{'korean': '학생'}, {'korean': '학교'}])
+    add_words('ko', 'u2', [{'korean': '학생'}])
+
+    result = delete_words('ko', 'u1', ['학생', '학생', '', '없음'])
+
+    assert (result['deleted'], result['words']) == (1, ['학생'])
+    assert sorted((row['user_id'], row['korean']) for row in fake_supabase.tables['korean_words']) == [
+        ('u1', '학교'), ('u2', '학생')
+    ]
+    assert delete_words('ko', 'u1', ['']) == {'message': '沒有要移除的單字', 'deleted': 0}
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_batch_cap_rejects_oversized_requests(app, fake_supabase):
+    words = [{'chinese': f'詞{i}'} for i in range(MAX_BATCH_WORDS + 1)]
+    with app.test_request_context(json={'words': words}):
+        response, status = batch_save_response('zh', 'u1')
+    assert status == 400
+    with app.test_request_context(method='DELETE', json={'words': [w['chinese'] for w in words]}):
+        response, status = batch_delete_response('zh', 'u1')
+    assert status == 400
+    assert fake_supabase.queries == []
+
+    with app.test_request_context(json={'words': words[:MAX_BATCH_WORDS]}):
+        response = batch_save_response('zh', 'u1')
+    assert response.get_json()['saved'] == MAX_BATCH_WORDS
@@ -0,0 +1,70 @@
+import numpy as np
+
+from graph_edges import build_links, link_values, score_matrix, top_k_neighbours
+
+
+WORDS = ['學生', '學校', '大學', '老師', '老人', '人生', '生日', '日本', '本子', '桌子']
+
+
+def edge_set(links):
+    return {(link['source'], link['target']) for link in links}
+
+
+def test_links_have_no_self_or_duplicate_edges():
+    links = build_links(WORDS, top_k=3, min_score=0.0)
+    pairs = [(link['source'], link['target']) for link in links]
+    assert all(s < t for s, t in pairs)
+    assert len(pairs) == len(set(pairs))
+    assert all(0 <= s < len(WORDS) and 0 <= t < len(WORDS) for s, t in pairs)
+
+
+def test_every_edge_is_in_top_k_of_one_endpoint():
+    top_k = 2
+    scores = score_matrix(WORDS)
+    links = build_links(WORDS, top_k=top_k, min_score=0.0)
+    assert len(links) <= len(WORDS) * top_k
+    for link in links:
+        s, t = link['source'], link['target']
+        # 某一端的第 top_k 高分數不高於這條連線
+        assert any(scores[a, b] >= np.sort(scores[a])[-top_k] for a, b in ((s, t), (t, s)))
+        assert link['score'] == round(float(scores[s, t]), 3)
+
+
+def test_top_k_neighbours_picks_k_per_row():
+    scores = np.array([
+        [0.0, 0.9, 0.1, 0.5],
+        [0.9, 0.0, 0.2, 0.3],
+        [0.1, 0.2, 0.0, 0.8],
+        [0.5, 0.3, 0.8, 0.0],
+    ], dtype=np.float32)
+    sources, targets, picked = top_k_neighbours(scores, top_k=2, min_score=0.0)
+    chosen = {}
+    for s, t in zip(sources.tolist(), targets.tolist()):
+        chosen.setdefault(s, set()).add(t)
+    assert chosen == {0: {1, 3}, 1: {0, 3}, 2: {1, 3}, 3: {0, 2}}
+    assert np.allclose(picked, scores[sources, targets])
+
+
+def test_min_score_drops_weak_links():
+    sources, _, _ = top_k_neighbours(np.array([[0.0, 0.01], [0.01, 0.0]]), top_k=1, min_score=0.05)
+    assert len(sources) == 0
+    # 完全無關的詞不會被硬接在一起
+    assert build_links(['貓', '跑']) == []
+
+
+def test_links_are_deterministic():
+    assert build_links(WORDS, text='學生去學校。老師在大學。') == build_links(WORDS, text='學生去學校。老師在大學。')
+
+
+def test_cooccurrence_links_words_in_same_sentence():
+    links = build_links(['蘋果', '火車'], text='我在火車上吃蘋果。', top_k=1)
+    assert edge_set(links) == {(0, 1)}
+
+
+def test_link_values_range():
+    assert link_values([0.0, 0.2, 0.5, 1.0]).tolist() == [1, 1, 2, 3]
+
+
+def test_fewer_than_two_words():
+    assert build_links([]) == []
+    assert build_links(['學生']) == []
@@ -0,0 +1,57 @@
+import numpy as np
+import pytest
+
+import graph_layout
+from graph_layout import EXACT_MAX_NODES, add_layout, compute_layout
+
+
+def ring_links(n):
+    return [{'source': i, 'target': (i + 1) % n} for i in range(n)]
+
+
+@pytest.mark.parametrize('n', [12, EXACT_MAX_NODES + 40])
+def test_layout_is_finite_and_one_position_per_node(n):
+    pos = compute_layout(n, ring_links(n), iterations=60)
+    assert pos.shape == (n, 2)
+    assert np.isfinite(pos).all()
+    # forceCenter：質心保持在原點
+    assert np.allclose(pos.mean(axis=0), 0.0, atol=1e-6)
+
+
+@pytest.mark.parametrize('n', [12, EXACT_MAX_NODES + 40])
+def test_layout_is_stable_for_same_input(n):
+    links = ring_links(n)
+    assert np.array_equal(compute_layout(n, links, iterations=60), compute_layout(n, links, iterations=60))
+
+
+def test_grid_path_is_used_above_exact_limit(monkeypatch):
+    calls = []
+    grid = graph_layout._grid_charge
+    monkeypatch.setattr(graph_layout, '_grid_charge', lambda pos, alpha: calls.append(len(pos)) or grid(pos, alpha))
+    compute_layout(EXACT_MAX_NODES + 1, [], iterations=2)
+    compute_layout(EXACT_MAX_NODES, [], iterations=2)
+    assert calls == [EXACT_MAX_NODES + 1] * 2
+
+
+def test_grid_charge_approximates_exact_charge():
+    pos = graph_layout._initial_positions(EXACT_MAX_NODES + 40) * 3
+    exact = graph_layout._exact_charge(pos, 0.5)
+    grid = graph_layout._grid_charge(pos, 0.5)
+    assert np.linalg.norm(grid - exact) / np.linalg.norm(exact) < 0.25
+
+
+def test_linked_nodes_end_near_link_distance():
+    pos = compute_layout(2, [{'source': 0, 'target': 1}])
+    assert np.linalg.norm(pos[0] - pos[1]) == pytest.approx(graph_layout.LINK_DISTANCE, rel=0.5)
+
+
+def test_add_layout_respects_threshold(monkeypatch):
+    monkeypatch.setattr(graph_layout, 'GRAPH_LAYOUT_MIN_NODES', 5)
+    small = {'nodes': [{'id': i} for i in range(4)], 'links': []}
+    assert 'layout' not in add_layout(small) and 'x' not in small['nodes'][0]
+
+    graph = {'nodes': [{'id': i} for i in range(6)], 'links': ring_links(6)}
+    add_layout(graph)
+    assert graph['layout'] is True
+    assert all(isinstance(node['x'], float) and isinstance(node['y'], float) for node in graph['nodes'])
+    assert len({(node['x'], node['y']) for node in graph['nodes']}) == 6
@@ -0,0 +1,23 @@
+import os
+
+import pytest
+from flask import Flask
+
+import graph_viewer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+URLS = {'home': '/', 'review': '/review', 'save': '/save', 'saved_words': '/saved', 'save_all': '/batch', 'base_path': ''}
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__, template_folder=os.path.join(ROOT, 'templates'))
+
+
+@pytest.mark.parametrize('private, expected', [(False, 'public'), (True, 'private')])
+def test_viewer_cache_policy(app, private, expected):
+    with app.test_request_context('/'):
+        response = graph_viewer.graph_viewer_response('graph/korean_graph.html', URLS, private=private)
+    assert expected in response.cache_control
+    assert ('public' in response.cache_control) != private
+    assert response.cache_control.max_age == graph_viewer.GRAPH_VIEWER_MAX_AGE
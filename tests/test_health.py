@@ -0,0 +1,14 @@
+def test_health_reports_cache_errors_instead_of_failing(railway_client, monkeypatch):
+    railway_app, client = railway_client
+
+    def unavailable():
+        raise OSError('read-only file system')
+
+    monkeypatch.setattr(railway_app, 'get_word_cache', unavailable)
+    response = client.get('/health')
+
+    assert response.status_code == 200
+    data = response.get_json()
+    assert data['status'] == 'healthy'
+    assert data['word_cache'] == {'error': 'read-only file system'}
+    assert 'entries' in data['result_cache']
@@ -0,0 +1,95 @@
+import threading
+
+import pytest
+from flask import Flask
+
+from job_queue import JobScheduler, queue_rejection_response
+
+
+@pytest.fixture
+def blocked_scheduler():
+    """worker 全部卡在第一個任務上，之後提交的任務只能排隊"""
+    release = threading.Event()
+    started = threading.Event()
+
+    def block():
+        started.set()
+        release.wait(5)
+
+    scheduler = JobScheduler(max_workers=1, max_queue=2, per_user_limit=2, name='test')
+    assert scheduler.submit('running', 'owner', block)['accepted']
+    assert started.wait(5)
+    yield scheduler
+    release.set()
+
+
+def test_rejects_when_queue_full(blocked_scheduler):
+    assert blocked_scheduler.submit('a', 'u1', lambda: None) == {'accepted': True, 'queue_position': 1}
+    assert blocked_scheduler.submit('b', 'u2', lambda: None) == {'accepted': True, 'queue_position': 2}
+    assert blocked_scheduler.submit('c', 'u3', lambda: None) == {
+        'accepted': False, 'error': 'queue_full', 'queue_position': 3
+    }
+    assert blocked_scheduler.stats()['queued'] == 2
+
+
+def test_rejects_user_over_limit(blocked_scheduler):
+    assert blocked_scheduler.submit('a', 'owner', lambda: None)['accepted']
+    assert blocked_scheduler.submit('b', 'owner', lambda: None) == {
+        'accepted': False, 'error': 'user_limit', 'queue_position': 1
+    }
+    # 其他用戶不受影響
+    assert blocked_scheduler.submit('c', 'other', lambda: None)['accepted']
+
+
+def test_fifo_positions_and_status_overlay(blocked_scheduler):
+    blocked_scheduler.submit('a', 'u1', lambda: None)
+    assert blocked_scheduler.submit('b', 'u2', lambda: None)['queue_position'] == 2
+    assert [blocked_scheduler.position(job) for job in ('a', 'b')] == [1, 2]
+    assert blocked_scheduler.position('running') is None
+
+    status = {'status': 'processing', 'message': '正在處理中...'}
+    assert blocked_scheduler.with_queue_position('b', status) == {
+        'status': 'processing', 'message': '排隊中，前面還有 1 個任務...', 'queue_position': 2
+    }
+    assert blocked_scheduler.with_queue_position('running', status) is status
+
+
+@pytest.mark.parametrize('error, message', [
+    ('queue_full', '系統忙碌中，請稍後再試'),
+    ('user_limit', '您已有分析任務正在處理，請等待完成後再提交')
+])
+def test_queue_rejection_response(error, message):
+    with Flask(__name__).app_context():
+        response = queue_rejection_response({'accepted': False, 'error': error, 'queue_position': 3})
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '10'
+    assert response.get_json() == {'error': message, 'queue_position': 3}
+
+
+def test_user_slot_released_after_job_finishes():
+    scheduler = JobScheduler(max_workers=1, max_queue=1, per_user_limit=1, name='test')
+    done = threading.Event()
+    assert scheduler.submit('a', 'u', done.set)['accepted']
+    assert done.wait(5)
+    # worker 在任務結束後才釋放名額，稍等片刻
+    for _ in range(100):
+        result = scheduler.submit('b', 'u', lambda: None)
+        if result['accepted']:
+            break
+        threading.Event().wait(0.01)
+    assert result['accepted']
+
+
+@pytest.mark.parametrize('path', ['/korean/process', '/chinese/process'])
+def test_process_routes_answer_429_when_queue_full(railway_client, monkeypatch, path):
+    railway_app, client = railway_client
+    monkeypatch.setattr(railway_app, 'analysis_scheduler', JobScheduler(max_queue=0, name='test'))
+    before = dict(railway_app.processing_status)
+
+    response = client.post(path, json={'type': 'text', 'text': '學生'})
+
+    assert response.status_code == 429
+    assert response.headers['Retry-After'] == '10'
+    assert response.get_json()['queue_position'] == 1
+    # 被拒絕的任務不留下處理狀態
+    assert dict(railway_app.processing_status) == before
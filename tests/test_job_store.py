@@ -0,0 +1,78 @@
+import pytest
+
+import job_store
+from job_store import MemoryJobStore, SQLiteJobStore, create_job_store
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('job_store.time.time', lambda: now[0])
+    return now
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryJobStore(ttl=60)
+    return SQLiteJobStore(str(tmp_path / 'jobs.sqlite3'), ttl=60)
+
+
+def test_dict_interface(store):
+    store['a'] = {'status': 'processing', 'progress': 10}
+    store['b'] = {'status': 'completed', 'message': '完成'}
+    assert store['a'] == {'status': 'processing', 'progress': 10}
+    assert store.get('c') is None
+    assert sorted(store) == ['a', 'b'] and len(store) == 2
+    del store['a']
+    assert 'a' not in store
+    with pytest.raises(KeyError):
+        store['a']
+
+
+def test_entries_expire_after_ttl(store, clock):
+    store['a'] = {'status': 'processing'}
+    clock[0] += 60
+    assert store['a'] == {'status': 'processing'}
+    clock[0] += 1
+    assert store.get('a') is None
+    assert len(store) == 0
+
+
+def test_update_refreshes_ttl(store, clock):
+    store['a'] = {'status': 'processing', 'progress': 10}
+    clock[0] += 50
+    store['a'] = {'status': 'processing', 'progress': 50}
+    clock[0] += 50
+    assert store['a']['progress'] == 50
+
+
+def test_sweep_removes_expired_rows(tmp_path, clock):
+    store = SQLiteJobStore(str(tmp_path / 'jobs.sqlite3'), ttl=60)
+    store['old'] = {'status': 'completed'}
+    clock[0] += job_store._SWEEP_INTERVAL + 61
+    store['new'] = {'status': 'processing'}
+    rows = store._conn.execute('SELECT job_id FROM jobs').fetchall()
+    assert rows == [('new',)]
+
+
+def test_sqlite_store_is_shared_between_instances(tmp_path):
+    path = str(tmp_path / 'jobs.sqlite3')
+    writer = SQLiteJobStore(path)
+    reader = SQLiteJobStore(path)
+    writer['job'] = {'status': 'processing', 'progress': 30}
+    assert reader['job'] == {'status': 'processing', 'progress': 30}
+    writer['job'] = {'status': 'completed', 'result': {'graph_id': 'g1'}}
+    assert reader['job']['result'] == {'graph_id': 'g1'}
+    del reader['job']
+    assert writer.get('job') is None
+
+
+def test_create_job_store_from_env(tmp_path, monkeypatch):
+    monkeypatch.setenv('JOB_STORE', 'memory')
+    assert isinstance(create_job_store(), MemoryJobStore)
+    monkeypatch.setenv('JOB_STORE', 'sqlite')
+    monkeypatch.setenv('JOB_STORE_PATH', str(tmp_path / 'jobs.sqlite3'))
+    monkeypatch.setenv('JOB_STATE_TTL', '120')
+    store = create_job_store()
+    assert isinstance(store, SQLiteJobStore) and store.ttl == 120
@@ -0,0 +1,68 @@
+import pytest
+
+from json_stream import JSONArrayStreamParser, parse_json_array
+
+
+def feed_all(chunks):
+    parser = JSONArrayStreamParser()
+    objects = []
+    for chunk in chunks:
+        objects.extend(parser.feed(chunk))
+    parser.close()
+    return objects
+
+
+def test_objects_split_across_chunks():
+    text = '```json\n[{"word": "學生", "level": 1}, {"word": "老師", "level": 2}]\n```'
+    expected = [{'word': '學生', 'level': 1}, {'word': '老師', 'level': 2}]
+    # 逐字元餵入：每個物件的邊界都落在不同的 chunk 中
+    assert feed_all(list(text)) == expected
+    assert feed_all([text[:9], text[9:20], text[20:]]) == expected
+
+
+def test_object_emitted_as_soon_as_it_closes():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"word": "學生"}, {"wo') == [{'word': '學生'}]
+    assert parser.feed('rd": "老師"}]') == [{'word': '老師'}]
+    parser.close()
+
+
+def test_brackets_and_quotes_inside_strings():
+    text = r'[{"word": "a]b}c", "example": "他說\"[注意]{}\""}, {"word": "d"}]'
+    assert feed_all([text]) == [{'word': 'a]b}c', 'example': '他說"[注意]{}"'}, {'word': 'd'}]
+
+
+def test_bracket_in_preamble_is_not_array_start():
+    assert parse_json_array('[注意] 以下是結果：\n[{"word": "學生"}]') == [{'word': '學生'}]
+
+
+def test_nested_values_and_non_object_elements():
+    text = '[{"word": "學生", "tags": ["名詞", {"x": [1]}]}, 3, "s"]'
+    assert feed_all([text]) == [{'word': '學生', 'tags': ['名詞', {'x': [1]}]}]
+
+
+def test_truncated_inside_object_raises():
+    parser = JSONArrayStreamParser()
+    assert parser.feed('[{"word": "學生"}, {"word": "老') == [{'word': '學生'}]
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_missing_closing_bracket_raises():
+    parser = JSONArrayStreamParser()
+    parser.feed('[{"word": "學生"}')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+def test_no_array_raises():
+    parser = JSONArrayStreamParser()
+    parser.feed('抱歉，無法分析這段文字')
+    with pytest.raises(ValueError):
+        parser.close()
+
+
+@pytest.mark.parametrize('text', ['', '[]', '```json\n[]\n```'])
+def test_parse_json_array_rejects_empty(text):
+    with pytest.raises(ValueError):
+        parse_json_array(text)
@@ -0,0 +1,97 @@
+from result_cache import ResultCache, result_cache_key
+
+
+def make_cache(tmp_path, **kwargs):
+    return ResultCache(path=str(tmp_path / 'results.sqlite3'), **kwargs)
+
+
+def test_key_ignores_whitespace_and_width():
+    assert result_cache_key('zh:local', ' 學生\n\n老師 ') == result_cache_key('zh:local', '學生 老師')
+    assert result_cache_key('zh:local', 'ＡＢ') == result_cache_key('zh:local', 'AB')
+    assert result_cache_key('zh:local', '學生') != result_cache_key('zh:gemini', '學生')
+    assert result_cache_key('zh:local', '學生').startswith('zh-local-')
+
+
+def test_pipelines_never_share_keys():
+    # railway_app（ko、zh:local、zh:gemini）與 web_app / web_app22 共用同一個快取檔
+    scopes = ['ko', 'zh:local', 'zh:gemini', 'ko:webapp', 'zh:webapp']
+    for text in ('학생', '學生', ''):
+        keys = [result_cache_key(scope, text) for scope in scopes]
+        assert len(set(keys)) == len(scopes)
+
+
+def test_get_returns_stored_result(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put('k', {'words': ['學生']})
+    assert cache.get('k') == {'words': ['學生']}
+    assert cache.get('missing') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_peek_does_not_touch_stats_or_recency(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('result_cache.time.time', lambda: now[0])
+    cache = make_cache(tmp_path, max_entries=2, ttl=60)
+    cache.put('a', {'key': 'a'})
+    now[0] += 1
+    cache.put('b', {'key': 'b'})
+    now[0] += 1
+    assert cache.peek('a') == {'key': 'a'}
+    assert cache.peek('missing') is None
+    assert (cache.hits, cache.misses) == (0, 0)
+    # peek 不更新最近使用時間：a 仍是最舊的項目
+    cache.put('c', {'key': 'c'})
+    assert cache.peek('a') is None
+    now[0] += 61
+    assert cache.peek('c') is None
+
+
+def test_expired_entries_are_not_returned(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('result_cache.time.time', lambda: now[0])
+    cache = make_cache(tmp_path, ttl=60)
+    cache.put('k', {'n': 1})
+    now[0] += 59
+    assert cache.get('k') == {'n': 1}
+    now[0] += 2
+    assert cache.get('k') is None
+
+
+def test_evicts_least_recently_used_over_max_entries(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('result_cache.time.time', lambda: now[0])
+    cache = make_cache(tmp_path, max_entries=2)
+    for key in ('a', 'b'):
+        cache.put(key, {'key': key})
+        now[0] += 1
+    cache.get('a')  # a 變成最近使用
+    now[0] += 1
+    cache.put('c', {'key': 'c'})
+    assert cache.get('b') is None
+    assert cache.get('a') == {'key': 'a'}
+    assert cache.get('c') == {'key': 'c'}
+    assert cache.stats()['entries'] == 2
+
+
+def test_evicts_until_under_max_bytes(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('result_cache.time.time', lambda: now[0])
+    cache = make_cache(tmp_path, max_bytes=250)
+    for key in ('a', 'b', 'c'):
+        cache.put(key, {'text': key * 100})
+        now[0] += 1
+    assert cache.get('a') is None
+    assert cache.get('b') == {'text': 'b' * 100}
+    assert cache.get('c') == {'text': 'c' * 100}
+    assert cache.stats()['bytes'] <= 250
+
+
+def test_url_etags_dropped_with_evicted_result(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('result_cache.time.time', lambda: now[0])
+    cache = make_cache(tmp_path, max_entries=1)
+    cache.put('a', {})
+    cache.put_url('ko', 'https://example.com', '"v1"', 'a')
+    now[0] += 1
+    cache.put('b', {})
+    assert cache.get_url('ko', 'https://example.com') is None
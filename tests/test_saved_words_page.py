@@ -0,0 +1,83 @@
+import base64
+import json
+
+import pytest
+
+import supabase_utils
+from conftest import FakeRedis
+from supabase_utils import WordListCache, decode_cursor, encode_cursor, get_saved_words_page
+
+
+def raw_cursor(value):
+    return base64.urlsafe_b64encode(json.dumps(value).encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def word(word_id, saved_at):
+    return {'id': word_id, 'user_id': 'u1', 'chinese': f'詞{word_id}', 'english': f'w{word_id}', 'saved_at': saved_at}
+
+
+def test_cursor_round_trip():
+    for saved_at in ('2025-01-02T03:04:05', '2025-01-02T03:04:05.123456', '2025-01-02T03:04:05.123+00:00'):
+        assert decode_cursor(encode_cursor({'saved_at': saved_at, 'id': 42})) == (saved_at, 42)
+
+
+@pytest.mark.parametrize('cursor', [
+    '', '!!!', 'bm90IGpzb24',
+    raw_cursor(['2025-01-02T03:04:05']),
+    raw_cursor(['2025-01-02T03:04:05', '42']),
+    raw_cursor(['2025-01-02T03:04:05', True]),
+    raw_cursor([None, 42]),
+    raw_cursor(['yesterday', 42]),
+    raw_cursor(['2025-01-02T03:04:05",id.gt.0', 42]),
+    raw_cursor(['2025-01-02T03:04:05,and(id.gt.0)', 42]),
+    raw_cursor(['2025-01-02T03:04:05\n', 42]),
+])
+def test_malformed_cursors_are_rejected(cursor):
+    assert decode_cursor(cursor) is None
+
+
+@pytest.fixture
+def words(fake_supabase):
+    rows = [word(i, f'2025-01-0{(i + 1) // 2}T00:00:00') for i in range(1, 8)]
+    fake_supabase.tables['chinese_words'] = rows
+    return rows
+
+
+def walk(limit, **kwargs):
+    pages, cursor = [], None
+    while True:
+        page = get_saved_words_page('zh', 'u1', limit=limit, cursor=cursor and decode_cursor(cursor), **kwargs)
+        pages.append(page['words'])
+        cursor = page['next_cursor']
+        if not cursor:
+            return pages
+
+
+def test_shared_cache_pages_are_sliced_in_memory(fake_supabase, words, monkeypatch):
+    cache = WordListCache()
+    cache._redis = FakeRedis()
+    monkeypatch.setattr(supabase_utils, '_word_list_cache', cache)
+    supabase_utils.get_saved_words('zh', 'u1')
+    fake_supabase.queries.clear()
+
+    pages = walk(3, fields=['chinese'])
+
+    assert pages == [
+        [{'chinese': '詞7'}, {'chinese': '詞6'}, {'chinese': '詞5'}],
+        [{'chinese': '詞4'}, {'chinese': '詞3'}, {'chinese': '詞2'}],
+        [{'chinese': '詞1'}]
+    ]
+    assert fake_supabase.queries == []
+
+
+def test_pages_without_shared_cache_use_keyset_query(fake_supabase, words):
+    page = get_saved_words_page('zh', 'u1', fields=['chinese'], limit=3)
+    assert [w['chinese'] for w in page['words']] == ['詞7', '詞6', '詞5']
+    query = fake_supabase.queries[-1]
+    assert query.columns == 'chinese,saved_at,id'
+    assert query.row_limit == 4
+
+    get_saved_words_page('zh', 'u1', limit=3, cursor=decode_cursor(page['next_cursor']))
+    assert fake_supabase.queries[-1].or_filters == [
+        'saved_at.lt."2025-01-03T00:00:00",and(saved_at.eq."2025-01-03T00:00:00",id.lt.5)'
+    ]
@@ -0,0 +1,105 @@
+import json
+import threading
+import time
+
+import pytest
+
+from job_store import MemoryJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=['memory', 'sqlite'])
+def store(request, tmp_path):
+    if request.param == 'memory':
+        return MemoryJobStore()
+    return SQLiteJobStore(str(tmp_path / 'jobs.sqlite3'))
+
+
+def later(delay, fn):
+    timer = threading.Timer(delay, fn)
+    timer.start()
+    return timer
+
+
+def test_write_wakes_waiter(store):
+    version = store.version
+    timer = later(0.05, lambda: store.__setitem__('a', {'status': 'completed'}))
+    started = time.monotonic()
+    assert store.wait_for_change(version, 5) == version + 1
+    assert time.monotonic() - started < 2
+    timer.join()
+
+
+def test_wait_returns_at_once_when_version_moved(store):
+    version = store.version
+    store['a'] = {'status': 'processing'}
+    started = time.monotonic()
+    assert store.wait_for_change(version, 5) == version + 1
+    assert time.monotonic() - started < 1
+
+
+def test_wait_times_out_without_writes(store):
+    assert store.wait_for_change(store.version, 0.01) == store.version
+
+
+def events(response):
+    """讀取 SSE 串流，回傳 data 事件的 JSON 列表"""
+    body = b''.join(response.response).decode('utf-8')
+    return [json.loads(line[len('data: '):]) for line in body.split('\n') if line.startswith('data: ')]
+
+
+@pytest.fixture
+def sse(railway_client, monkeypatch):
+    railway_app, client = railway_client
+    monkeypatch.setattr(railway_app, 'SSE_MAX_DURATION', 5)
+    return railway_app, client
+
+
+def test_stream_closes_after_completion(sse, monkeypatch):
+    railway_app, client = sse
+    store = MemoryJobStore()
+    monkeypatch.setattr(railway_app, 'processing_status', store)
+    store['job'] = {'status': 'completed', 'result': {'graph_id': 'g1'}}
+    response = client.get('/korean/events/job')
+    assert response.mimetype == 'text/event-stream'
+    assert response.headers['Cache-Control'] == 'no-cache'
+    assert events(response) == [{'status': 'completed', 'result': {'graph_id': 'g1'}}]
+
+
+def test_stream_pushes_same_process_updates_without_polling(sse, monkeypatch):
+    railway_app, client = sse
+    store = MemoryJobStore()
+    monkeypatch.setattr(railway_app, 'processing_status', store)
+    # 輪詢間隔長於測試時間：只有寫入通知能讓串流前進
+    monkeypatch.setattr(railway_app, 'SSE_POLL_INTERVAL', 30)
+    store['job'] = {'status': 'processing', 'progress': 10}
+    timers = [
+        later(0.1, lambda: store.__setitem__('job', {'status': 'processing', 'progress': 60})),
+        later(0.2, lambda: store.__setitem__('job', {'status': 'completed'}))
+    ]
+    started = time.monotonic()
+    response = client.get('/chinese/events/job', buffered=False)
+    received = events(response)
+    assert time.monotonic() - started < 5
+    assert received[0] == {'status': 'processing', 'progress': 10}
+    assert received[-1] == {'status': 'completed'}
+    for timer in timers:
+        timer.join()
+
+
+def test_stream_picks_up_writes_from_another_process(sse, monkeypatch, tmp_path):
+    railway_app, client = sse
+    path = str(tmp_path / 'jobs.sqlite3')
+    # 另一個 worker 進程的寫入不會觸發本進程的通知，靠 SSE_POLL_INTERVAL 重新讀取共用檔案
+    other_worker = SQLiteJobStore(path)
+    monkeypatch.setattr(railway_app, 'processing_status', SQLiteJobStore(path))
+    monkeypatch.setattr(railway_app, 'SSE_POLL_INTERVAL', 0.05)
+    other_worker['job'] = {'status': 'processing', 'progress': 10}
+    timer = later(0.2, lambda: other_worker.__setitem__('job', {'status': 'error', 'error': 'x'}))
+    received = events(client.get('/korean/events/job', buffered=False))
+    assert received[-1] == {'status': 'error', 'error': 'x'}
+    timer.join()
+
+
+def test_stream_reports_unknown_job(sse):
+    _, client = sse
+    assert events(client.get('/korean/events/missing')) == [{'status': 'not_found'}]
@@ -0,0 +1,92 @@
+import os
+
+import pytest
+
+from tocfl_loader import TOCFLLexicon, TOCFLVocab, _parse_csv, compile_lexicon, open_lexicon
+
+
+CSV = (
+    '﻿id,word,deng,ji,situation,wfreq,sfreq,newlink,bopomofo,pinyin\n'
+    '1,愛,基礎,第1級,核心詞,535,681,,ㄞˋ,ài\n'
+    '2,爸爸/爸,基礎 ,第1級 ,家庭,120,98,,ㄅㄚˋ,bàba\n'
+    '3,學生,進階,第3級,學校,300,,,,xuéshēng\n'
+)
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / 'words.csv'
+    path.write_text(CSV, encoding='utf-8')
+    return str(path)
+
+
+def test_parse_csv_splits_variants_and_strips_values(csv_path):
+    vocab = _parse_csv(csv_path)
+    assert set(vocab) == {'愛', '爸爸', '爸', '學生'}
+    assert vocab['爸'] == vocab['爸爸']
+    assert (vocab['爸']['level'], vocab['爸']['grade']) == ('基礎', '第1級')
+    assert vocab['學生']['sfreq'] == 0
+
+
+def test_lexicon_round_trips_csv_loader(csv_path, tmp_path):
+    out = str(tmp_path / 'lexicon.bin')
+    expected = _parse_csv(csv_path)
+    assert compile_lexicon(csv_path, out) == len(expected)
+
+    lexicon = TOCFLLexicon(out)
+    try:
+        assert len(lexicon) == len(expected)
+        assert dict(lexicon.items()) == expected
+        assert list(lexicon) == sorted(expected, key=lambda w: w.encode('utf-8'))
+        assert '老師' not in lexicon and 42 not in lexicon
+        assert lexicon.get('老師') is None
+    finally:
+        lexicon.close()
+
+
+def test_rejects_file_without_magic(tmp_path):
+    path = tmp_path / 'bad.bin'
+    path.write_bytes(b'\0' * 64)
+    with pytest.raises(ValueError):
+        TOCFLLexicon(str(path))
+
+
+def test_open_lexicon_rebuilds_when_older_than_csv(csv_path, tmp_path):
+    out = str(tmp_path / 'lexicon.bin')
+    open_lexicon(csv_path, out).close()
+
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write('4,老師,基礎,第2級,學校,50,40,,,lǎoshī\n')
+    csv_mtime = os.path.getmtime(csv_path)
+    os.utime(out, (csv_mtime - 10, csv_mtime - 10))
+
+    lexicon = open_lexicon(csv_path, out)
+    try:
+        assert lexicon['老師']['grade'] == '第2級'
+        assert os.path.getmtime(out) >= csv_mtime
+    finally:
+        lexicon.close()
+
+
+def test_open_lexicon_keeps_newer_file(csv_path, tmp_path):
+    out = str(tmp_path / 'lexicon.bin')
+    open_lexicon(csv_path, out).close()
+    built = os.path.getmtime(out)
+    csv_mtime = os.path.getmtime(csv_path)
+    os.utime(out, (csv_mtime + 10, csv_mtime + 10))
+
+    with open(csv_path, 'a', encoding='utf-8') as f:
+        f.write('4,老師,基礎,第2級,學校,50,40,,,lǎoshī\n')
+    os.utime(csv_path, (built, built))
+
+    lexicon = open_lexicon(csv_path, out)
+    try:
+        assert '老師' not in lexicon
+    finally:
+        lexicon.close()
+
+
+def test_vocab_level_display(csv_path, tmp_path):
+    vocab = TOCFLVocab(csv_path, str(tmp_path / 'lexicon.bin'))
+    assert vocab.get_level_display('爸') == '基礎 第1級'
+    assert vocab.get_word_info('老師') is None
@@ -0,0 +1,42 @@
+from tocfl_segmenter import TOCFLSegmenter, surface_forms
+
+
+VOCAB = ['研究', '研究生', '生命', '起源', '中文', '學生', '好1', '好2', '沒(有)用']
+
+
+def test_surface_forms():
+    assert surface_forms('好1') == ['好']
+    assert surface_forms('沒(有)用') == ['沒有用', '沒用']
+
+
+def test_forward_and_backward_max_match():
+    segmenter = TOCFLSegmenter(VOCAB)
+    assert segmenter.forward_max_match('研究生命起源') == ['研究生', '命', '起源']
+    assert segmenter.backward_max_match('研究生命起源') == ['研究', '生命', '起源']
+
+
+def test_bidirectional_prefers_fewer_single_characters():
+    segmenter = TOCFLSegmenter(VOCAB)
+    assert segmenter.segment('研究生命起源') == ['研究', '生命', '起源']
+
+
+def test_longest_match_wins_over_prefix():
+    segmenter = TOCFLSegmenter(VOCAB)
+    assert segmenter.segment('研究生') == ['研究生']
+
+
+def test_unknown_characters_become_single_tokens():
+    segmenter = TOCFLSegmenter(VOCAB)
+    assert segmenter.forward_max_match('中文課') == ['中文', '課']
+
+
+def test_tokenize_skips_punctuation_and_keeps_offsets():
+    segmenter = TOCFLSegmenter(VOCAB)
+    assert segmenter.tokenize('學生，沒用 AI2') == [('學生', 0), ('沒用', 3), ('AI2', 6)]
+
+
+def test_lookup_returns_all_homograph_keys():
+    segmenter = TOCFLSegmenter(VOCAB)
+    assert segmenter.lookup('好') == ['好1', '好2']
+    assert segmenter.lookup('沒有用') == ['沒(有)用']
+    assert segmenter.lookup('研') == []
@@ -0,0 +1,45 @@
+from tts_cache import TTSAudioCache, tts_cache_key
+
+
+def test_key_is_stable_and_normalized():
+    key = tts_cache_key('學生', 'zh', 'Kore', 'gemini-2.5-flash-preview-tts')
+    assert key == tts_cache_key('學生', 'zh', 'Kore', 'gemini-2.5-flash-preview-tts')
+    assert key == tts_cache_key('  學生\n', 'zh', 'Kore', 'gemini-2.5-flash-preview-tts')
+    assert len(key) == 64 and all(c in '0123456789abcdef' for c in key)
+
+
+def test_key_depends_on_every_part():
+    base = ('學生', 'zh', 'Kore', 'model-a')
+    key = tts_cache_key(*base)
+    for i, value in enumerate(('老師', 'ko', 'Puck', 'model-b')):
+        parts = list(base)
+        parts[i] = value
+        assert tts_cache_key(*parts) != key
+
+
+def test_key_parts_cannot_run_together():
+    assert tts_cache_key('ab', 'c', 'v', 'm') != tts_cache_key('a', 'bc', 'v', 'm')
+
+
+def test_audio_round_trip_and_etag(tmp_path):
+    cache = TTSAudioCache(directory=str(tmp_path))
+    key = tts_cache_key('學生', 'zh', 'Kore', 'model')
+    assert cache.get(key) is None
+    etag = cache.put(key, b'RIFF-data')
+    assert cache.get(key) == (b'RIFF-data', etag)
+    # 另一個進程開啟同一目錄也能讀到
+    assert TTSAudioCache(directory=str(tmp_path)).get(key) == (b'RIFF-data', etag)
+
+
+def test_evicts_oldest_audio_over_max_bytes(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('tts_cache.time.time', lambda: now[0])
+    cache = TTSAudioCache(directory=str(tmp_path), max_bytes=20)
+    keys = [tts_cache_key(text, 'zh', 'Kore', 'model') for text in ('一', '二', '三')]
+    for key in keys:
+        cache.put(key, b'x' * 8)
+        now[0] += 1
+    assert cache.get(keys[0]) is None
+    assert cache.get(keys[1])[0] == b'x' * 8
+    assert cache.get(keys[2])[0] == b'x' * 8
+    assert cache.stats()['bytes'] == 16
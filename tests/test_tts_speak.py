@@ -0,0 +1,78 @@
+import pytest
+
+auth_app = pytest.importorskip('auth_app')
+asgi_app = pytest.importorskip('asgi_app')
+
+
+def run_steps(data, cached=None, generated=None):
+    """以假快取／假 Gemini 回應執行 tts_speak_steps，回傳 (結果, 經過的步驟名稱)"""
+    steps = auth_app.tts_speak_steps(data)
+    seen, result = [], None
+    while True:
+        try:
+            step = steps.send(result)
+        except StopIteration as done:
+            return done.value, seen
+        seen.append(step[0])
+        if step[0] == 'cache_get':
+            result = cached
+        elif step[0] == 'generate':
+            result = generated
+        else:
+            result = 'etag-new'
+
+
+def test_steps_require_text():
+    assert run_steps({}) == (('error', {'error': 'Text is required'}, 400), [])
+
+
+def test_steps_return_cached_audio_without_generating():
+    assert run_steps({'text': '學生'}, cached=(b'RIFF', 'etag-1')) == (('audio', b'RIFF', 'etag-1'), ['cache_get'])
+
+
+def test_steps_report_missing_api_key(monkeypatch):
+    monkeypatch.setattr(auth_app, 'GEMINI_AVAILABLE', True)
+    monkeypatch.delenv('GEMINI_API_KEY', raising=False)
+    result, seen = run_steps({'text': '學生'})
+    assert result == ('error', {'error': 'GEMINI_API_KEY not configured'}, 500)
+    assert seen == ['cache_get']
+
+
+@pytest.mark.parametrize('header', [
+    '"abc"',
+    'W/"abc"',
+    '"other", W/"abc"',
+    '*',
+])
+def test_not_modified_accepts_weak_and_list_etags(header):
+    assert auth_app.speak_not_modified('GET', header, 'abc')
+
+
+@pytest.mark.parametrize('method, header', [
+    ('GET', None),
+    ('GET', '"abcd"'),
+    ('GET', '"xabc"'),
+    ('POST', '"abc"'),
+])
+def test_not_modified_rejects_other_requests(method, header):
+    assert not auth_app.speak_not_modified(method, header, 'abc')
+
+
+def test_speak_headers_quote_etag():
+    headers = dict(auth_app.speak_headers('abc'))
+    assert headers['ETag'] == '"abc"'
+    assert headers['Cache-Control'] == f'private, max-age={auth_app.TTS_SPEAK_MAX_AGE}'
+
+
+def test_proxy_target_keeps_encoded_path_segments():
+    scope = {
+        'path': '/korean-app/api/word/a/b?#',
+        'raw_path': b'/korean-app/api/word/a%2Fb%3F%23',
+        'query_string': b'lang=ko'
+    }
+    assert asgi_app._target_url(scope, '/korean-app', 'http://up') == 'http://up/api/word/a%2Fb%3F%23?lang=ko'
+
+
+def test_proxy_target_falls_back_to_path():
+    scope = {'path': '/chinese-app/health', 'query_string': b''}
+    assert asgi_app._target_url(scope, '/chinese-app', 'http://up') == 'http://up/health'
@@ -0,0 +1,89 @@
+import pytest
+from flask import Flask
+
+import supabase_utils
+from supabase_utils import (
+    USER_COLUMNS, USER_PROFILE_COLUMNS, get_user_by_email, invalidate_user_profile,
+    load_user_profile, update_user
+)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('supabase_utils.time.time', lambda: now[0])
+    return now
+
+
+@pytest.fixture
+def users(fake_supabase):
+    fake_supabase.tables['users'] = [{
+        'id': 1, 'username': 'amy', 'password': 'hash', 'email': 'amy@example.com',
+        'language': 'zh-TW', 'created_at': '2025-01-01', 'last_login': None, 'avatar': 'data:image/png;base64,AAAA'
+    }]
+    return fake_supabase
+
+
+def user_queries(client):
+    return [q for q in client.queries if q.table == 'users']
+
+
+def test_profile_projects_columns_without_password_or_avatar(users):
+    profile = load_user_profile('amy')
+    assert set(profile) == set(USER_PROFILE_COLUMNS.split(','))
+    assert user_queries(users)[0].columns == USER_PROFILE_COLUMNS
+
+
+def test_profile_is_memoized_per_request(users):
+    app = Flask(__name__)
+    with app.test_request_context():
+        first = load_user_profile('amy')
+        # 清空進程快取後仍由 flask.g 回傳同一份資料
+        supabase_utils._profiles.clear()
+        assert load_user_profile('amy') is first
+    assert len(user_queries(users)) == 1
+
+
+def test_profile_cache_expires_after_ttl(users, clock):
+    load_user_profile('amy')
+    clock[0] += supabase_utils.USER_PROFILE_CACHE_TTL - 1
+    load_user_profile('amy')
+    assert len(user_queries(users)) == 1
+    clock[0] += 2
+    load_user_profile('amy')
+    assert len(user_queries(users)) == 2
+
+
+def test_missing_user_is_not_cached(users):
+    assert load_user_profile('bob') is None
+    assert load_user_profile('bob') is None
+    assert len(user_queries(users)) == 2
+    assert 'bob' not in supabase_utils._profiles
+
+
+def test_update_user_invalidates_profile(users):
+    assert load_user_profile('amy')['language'] == 'zh-TW'
+    assert update_user('amy', {'language': 'ko'}) == {'success': True}
+    assert load_user_profile('amy')['language'] == 'ko'
+
+
+def test_invalidate_clears_request_memo(users):
+    app = Flask(__name__)
+    with app.test_request_context():
+        load_user_profile('amy')
+        invalidate_user_profile('amy')
+        load_user_profile('amy')
+    assert len(user_queries(users)) == 2
+
+
+def test_update_user_returns_minimal(users):
+    update_user('amy', {'language': 'ko'})
+    query = user_queries(users)[-1]
+    assert query.options == {'count': 'exact', 'returning': 'minimal'}
+    assert update_user('bob', {'language': 'ko'}) == {'success': False, 'error': 'update_failed'}
+
+
+def test_user_by_email_projects_columns(users):
+    user = get_user_by_email('amy@example.com')
+    assert set(user) == set(USER_COLUMNS.split(','))
+    assert 'avatar' not in user
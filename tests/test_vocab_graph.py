@@ -0,0 +1,120 @@
+import pytest
+
+import vocab_graph
+from vocab_graph import VocabGraph
+
+
+def word(korean, day):
+    return {'id': day, 'user_id': 'u1', 'korean': korean, 'chinese': korean, 'saved_at': f'2025-01-{day:02d}T00:00:00'}
+
+
+WORDS = [word(w, i + 1) for i, w in enumerate(['학생', '학교', '학원', '선생님', '선물', '생일'])]
+
+
+@pytest.fixture
+def graph(tmp_path, monkeypatch):
+    graph = VocabGraph(path=str(tmp_path / 'graph.sqlite3'), min_score=0.0)
+    monkeypatch.setattr(vocab_graph, 'vocab_graph', graph)
+    return graph
+
+
+def headwords(graph):
+    return sorted(node['korean'] for node in graph.subgraph('u1', 'ko', page_size=500)['nodes'])
+
+
+def edges(graph):
+    return graph._conn.execute('SELECT source, target FROM vocab_edges WHERE user_id = ?', ('u1',)).fetchall()
+
+
+def assert_valid_edges(graph):
+    nodes = set(headwords(graph))
+    pairs = edges(graph)
+    assert all(a in nodes and b in nodes and a < b for a, b in pairs)
+    assert len(pairs) == len(set(pairs))
+
+
+def test_build_creates_nodes_and_links(graph):
+    assert not graph.is_built('u1', 'ko')
+    assert graph.build('u1', 'ko', lambda user_id: WORDS)
+    assert graph.is_built('u1', 'ko')
+    assert headwords(graph) == sorted(w['korean'] for w in WORDS)
+    assert edges(graph)
+    assert_valid_edges(graph)
+
+
+def test_incremental_add_links_only_new_word(graph):
+    graph.build('u1', 'ko', lambda user_id: WORDS[:4])
+    version = graph.version('u1', 'ko')
+    before = set(edges(graph))
+
+    graph.add_words('u1', 'ko', [WORDS[4], WORDS[0]])  # 已存在的詞略過
+
+    assert headwords(graph) == sorted(w['korean'] for w in WORDS[:5])
+    added = set(edges(graph)) - before
+    assert added and all('선물' in pair for pair in added)
+    assert before <= set(edges(graph))
+    assert graph.version('u1', 'ko') > version
+    assert_valid_edges(graph)
+
+
+def test_incremental_remove_drops_node_and_edges(graph):
+    graph.build('u1', 'ko', lambda user_id: WORDS)
+    version = graph.version('u1', 'ko')
+
+    graph.remove_words('u1', 'ko', ['학생', '없는 단어'])
+
+    assert '학생' not in headwords(graph)
+    assert all('학생' not in pair for pair in edges(graph))
+    assert graph.version('u1', 'ko') > version
+    assert_valid_edges(graph)
+
+
+def test_remove_relinks_orphaned_neighbours(graph):
+    graph.top_k = 1
+    graph.build('u1', 'ko', lambda user_id: WORDS)
+    linked = {w for pair in edges(graph) for w in pair}
+    graph.remove_words('u1', 'ko', ['학생'])
+    still_linked = {w for pair in edges(graph) for w in pair}
+    assert (linked - {'학생'}) <= still_linked
+
+
+def test_build_retries_when_words_change_during_load(graph):
+    saved = list(WORDS[:3])
+    calls = []
+
+    def load_words(user_id):
+        calls.append(len(saved))
+        result = list(saved)
+        if len(calls) == 1:
+            # 讀取清單之後、寫入圖譜之前有新的收藏
+            saved.append(WORDS[3])
+            graph.record_change('u1', 'ko')
+        return result
+
+    assert graph.build('u1', 'ko', load_words)
+    assert calls == [3, 4]
+    assert '선생님' in headwords(graph)
+
+
+def test_build_gives_up_when_words_keep_changing(graph):
+    def load_words(user_id):
+        graph.record_change('u1', 'ko')
+        return WORDS
+
+    assert not graph.build('u1', 'ko', load_words, attempts=2)
+    assert not graph.is_built('u1', 'ko')
+
+
+def test_listener_updates_built_graph_in_background(graph):
+    graph.build('u1', 'ko', lambda user_id: WORDS[:3])
+    vocab_graph.vocab_graph_listener('ko', 'u1', 'add', [WORDS[3]])
+    vocab_graph.vocab_graph_listener('ko', 'u1', 'delete', ['학교'])
+    vocab_graph.wait_for_updates()
+    assert headwords(graph) == sorted(['학생', '학원', '선생님'])
+
+
+def test_listener_only_counts_changes_before_build(graph):
+    vocab_graph.vocab_graph_listener('ko', 'u1', 'add', [WORDS[0]])
+    vocab_graph.wait_for_updates()
+    assert not graph.is_built('u1', 'ko')
+    assert graph._changes('u1', 'ko') == 1
@@ -0,0 +1,61 @@
+import pytest
+
+from word_cache import WordCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('word_cache.time.time', lambda: now[0])
+    return now
+
+
+def make_cache(tmp_path, **kwargs):
+    return WordCache(path=str(tmp_path / 'words.sqlite3'), **kwargs)
+
+
+def test_get_many_returns_only_hits_and_counts_stats(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put_many('zh', {'學生': {'english': 'student'}, '老師': {'english': 'teacher'}})
+    assert cache.get_many('zh', ['學生', '學生', '書', '老師']) == {
+        '學生': {'english': 'student'}, '老師': {'english': 'teacher'}
+    }
+    assert cache.get_many('zh', []) == {}
+    assert cache.get_many('ko', ['學生']) == {}
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (2, 2, 2)
+
+
+def test_volatile_fields_are_not_stored(tmp_path):
+    cache = make_cache(tmp_path)
+    cache.put('zh', '學生', {'english': 'student', 'tocfl_level': '基礎 第1級'})
+    assert cache.get('zh', '學生') == {'english': 'student'}
+
+
+def test_expired_entries_are_misses(tmp_path, clock):
+    cache = make_cache(tmp_path, ttl=60)
+    cache.put('zh', '學生', {'english': 'student'})
+    clock[0] += 59
+    assert cache.get('zh', '學生') == {'english': 'student'}
+    clock[0] += 2
+    assert cache.get('zh', '學生') is None
+    # 下一次寫入時清除過期項目
+    cache.put('zh', '老師', {'english': 'teacher'})
+    assert cache.stats()['entries'] == 1
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    cache = make_cache(tmp_path, max_entries=2)
+    cache.put('zh', 'a', {})
+    clock[0] += 1
+    cache.put('zh', 'b', {})
+    clock[0] += 1
+    cache.get_many('zh', ['a'])  # a 變成最近使用
+    clock[0] += 1
+    cache.put('zh', 'c', {})
+    assert set(cache.get_many('zh', ['a', 'b', 'c'])) == {'a', 'c'}
+
+
+def test_entries_shared_between_instances(tmp_path):
+    make_cache(tmp_path).put('ko', '학생', {'chinese': '學生'})
+    assert make_cache(tmp_path).get('ko', '학생') == {'chinese': '學生'}
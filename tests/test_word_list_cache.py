@@ -0,0 +1,106 @@
+import pytest
+
+import supabase_utils
+from conftest import FakeRedis
+from supabase_utils import WordListCache, get_saved_words, word_list_etag
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr('supabase_utils.time.time', lambda: now[0])
+    return now
+
+
+def word(word_id, chinese):
+    return {'id': word_id, 'user_id': 'u1', 'chinese': chinese, 'saved_at': f'2025-01-0{word_id}T00:00:00'}
+
+
+def test_word_list_etag_tracks_count_and_max_id():
+    assert word_list_etag(2, 5) == word_list_etag(2, 5)
+    assert len({word_list_etag(2, 5), word_list_etag(1, 5), word_list_etag(2, 6), word_list_etag(0, None)}) == 4
+
+
+def test_put_returns_etag_of_list():
+    cache = WordListCache()
+    words = [word(3, '學生'), word(1, '老師')]
+    assert cache.put('zh', 'u1', words) == word_list_etag(2, 3)
+    assert cache.put('zh', 'u2', []) == word_list_etag(0, None)
+
+
+def test_entries_expire_after_ttl(clock):
+    cache = WordListCache(ttl=60)
+    etag = cache.put('zh', 'u1', [word(1, '學生')])
+    clock[0] += 59
+    assert cache.get('zh', 'u1') == ([word(1, '學生')], etag)
+    clock[0] += 2
+    assert cache.get('zh', 'u1') is None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = WordListCache(max_entries=2)
+    cache.put('zh', 'a', [])
+    cache.put('zh', 'b', [])
+    cache.get('zh', 'a')
+    cache.put('zh', 'c', [])
+    assert cache.get('zh', 'b') is None
+    assert cache.get('zh', 'a') is not None
+    assert cache.stats()['entries'] == 2
+
+
+def test_invalidate_is_per_language_and_user():
+    cache = WordListCache()
+    for language, user_id in (('zh', 'u1'), ('ko', 'u1'), ('zh', 'u2')):
+        cache.put(language, user_id, [])
+    cache.invalidate('zh', 'u1')
+    assert cache.get('zh', 'u1') is None
+    assert cache.get('ko', 'u1') is not None
+    assert cache.get('zh', 'u2') is not None
+
+
+def test_redis_backend_round_trip():
+    cache = WordListCache()
+    cache._redis = FakeRedis()
+    assert cache.shared
+    etag = cache.put('zh', 'u1', [word(1, '學生')])
+    assert cache.get('zh', 'u1') == ([word(1, '學生')], etag)
+    cache.invalidate('zh', 'u1')
+    assert cache.get('zh', 'u1') is None
+
+
+def test_shared_cache_answers_without_database(fake_supabase, monkeypatch):
+    cache = WordListCache()
+    cache._redis = FakeRedis()
+    monkeypatch.setattr(supabase_utils, '_word_list_cache', cache)
+    fake_supabase.tables['chinese_words'] = [word(1, '學生'), word(2, '老師')]
+
+    words, etag = get_saved_words('zh', 'u1')
+    assert [w['chinese'] for w in words] == ['老師', '學生']
+    assert etag == word_list_etag(2, 2)
+
+    fake_supabase.queries.clear()
+    assert get_saved_words('zh', 'u1') == (words, etag)
+    assert fake_supabase.queries == []
+
+
+def test_in_process_cache_checks_database_and_sends_no_etag(fake_supabase):
+    fake_supabase.tables['chinese_words'] = [word(1, '學生')]
+    assert get_saved_words('zh', 'u1') == ([word(1, '學生')], None)
+
+    # 快取命中時只做一次一列的計數查詢
+    fake_supabase.queries.clear()
+    assert get_saved_words('zh', 'u1') == ([word(1, '學生')], None)
+    assert [(q.columns, q.row_limit) for q in fake_supabase.queries] == [('id', 1)]
+
+    # 其他進程直接寫入資料庫：本進程的快取不會收到失效，但版本比對會發現
+    fake_supabase.tables['chinese_words'].append(word(2, '老師'))
+    words, _ = get_saved_words('zh', 'u1')
+    assert [w['chinese'] for w in words] == ['老師', '學生']
+
+
+def test_writes_invalidate_cached_list(fake_supabase):
+    supabase_utils.add_chinese_word('u1', {'chinese': '學生'})
+    assert [w['chinese'] for w in get_saved_words('zh', 'u1')[0]] == ['學生']
+    supabase_utils.delete_chinese_word('u1', '學生')
+    assert get_saved_words('zh', 'u1')[0] == []
@@ -1,37 +1,200 @@
 """
 TOCFL 詞彙表載入器
+
+CSV 會先編譯成二進位詞典檔（tocfl_lexicon.bin），之後每個 worker 直接以
+mmap 唯讀方式開啟，多個進程共用同一份分頁快取，不必各自重新解析 CSV。
+
+建置：python tocfl_loader.py build
 """
+import bisect
 import csv
+import mmap
 import os
+import struct
+import sys
+from collections.abc import Mapping
+
+
+CSV_FILENAME = '14452詞語表202504.csv'
+LEXICON_FILENAME = 'tocfl_lexicon.bin'
+
+# 檔案格式（little-endian）：
+#   header  : magic, 詞數, 鍵索引位置, 記錄位置, 字串池位置
+#   鍵索引  : 每個詞 (字串池 offset, 長度)，依 UTF-8 位元組排序
+#   記錄    : 每個詞固定 32 bytes — level/grade/situation/pinyin 的字串池參照 + wfreq + sfreq
+#   字串池  : 所有字串（重複值只存一次）
+_MAGIC = b'TOCFLLX1'
+_HEADER = struct.Struct('<8sIIII')
+_KEY = struct.Struct('<IH')
+_RECORD = struct.Struct('<IHIHIHIHII')
+
+
+def _parse_csv(csv_path):
+    """解析 CSV，回傳 {詞: 資訊}；「詞1/詞2」格式分別存儲"""
+    vocab = {}
+    with open(csv_path, 'r', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            word = row.get('word', '').strip()
+            words = word.split('/')
+            for w in words:
+                w = w.strip()
+                if w:
+                    vocab[w] = {
+                        'level': row.get('deng', '').strip(),
+                        'grade': row.get('ji', '').strip(),
+                        'pinyin': row.get('pinyin', '').strip(),
+                        'situation': row.get('situation', '').strip(),
+                        'wfreq': int(row.get('wfreq') or 0),
+                        'sfreq': int(row.get('sfreq') or 0)
+                    }
+    return vocab
+
+
+def compile_lexicon(csv_path, out_path):
+    """將 TOCFL CSV 編譯為可 mmap 的二進位詞典檔，回傳詞數"""
+    vocab = _parse_csv(csv_path)
+    entries = sorted((w.encode('utf-8'), info) for w, info in vocab.items())
+
+    pool = bytearray()
+    interned = {}
+
+    def intern(text):
+        data = text.encode('utf-8')
+        if data not in interned:
+            interned[data] = len(pool)
+            pool.extend(data)
+        return interned[data], len(data)
+
+    keys = bytearray()
+    records = bytearray()
+    for key, info in entries:
+        keys += _KEY.pack(len(pool), len(key))
+        pool.extend(key)
+        records += _RECORD.pack(
+            *intern(info['level']),
+            *intern(info['grade']),
+            *intern(info['situation']),
+            *intern(info['pinyin']),
+            info['wfreq'],
+            info['sfreq']
+        )
+
+    keys_offset = _HEADER.size
+    records_offset = keys_offset + len(keys)
+    pool_offset = records_offset + len(records)
+
+    # 先寫入暫存檔再替換，避免其他進程讀到寫一半的檔案
+    tmp_path = f"{out_path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(_HEADER.pack(_MAGIC, len(entries), keys_offset, records_offset, pool_offset))
+        f.write(keys)
+        f.write(records)
+        f.write(pool)
+    os.replace(tmp_path, out_path)
+    return len(entries)
+
+
+class TOCFLLexicon(Mapping):
+    """以 mmap 唯讀開啟的編譯詞典，介面與 {詞: 資訊} 字典相同"""
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, count, keys_offset, records_offset, pool_offset = _HEADER.unpack_from(self._mm, 0)
+        if magic != _MAGIC:
+            self._mm.close()
+            raise ValueError(f"不是有效的 TOCFL 詞典檔: {path}")
+        self._count = count
+        self._keys_offset = keys_offset
+        self._records_offset = records_offset
+        self._pool_offset = pool_offset
+
+    def _string(self, offset, length):
+        start = self._pool_offset + offset
+        return self._mm[start:start + length]
+
+    def key_bytes(self, i):
+        """第 i 個詞的 UTF-8 位元組"""
+        return self._string(*_KEY.unpack_from(self._mm, self._keys_offset + i * _KEY.size))
+
+    def key_at(self, i):
+        return self.key_bytes(i).decode('utf-8')
+
+    def record_at(self, i):
+        (level_off, level_len, grade_off, grade_len, situation_off, situation_len,
+         pinyin_off, pinyin_len, wfreq, sfreq) = _RECORD.unpack_from(
+            self._mm, self._records_offset + i * _RECORD.size)
+        return {
+            'level': self._string(level_off, level_len).decode('utf-8'),
+            'grade': self._string(grade_off, grade_len).decode('utf-8'),
+            'pinyin': self._string(pinyin_off, pinyin_len).decode('utf-8'),
+            'situation': self._string(situation_off, situation_len).decode('utf-8'),
+            'wfreq': wfreq,
+            'sfreq': sfreq
+        }
+
+    def index_of(self, word):
+        """二分搜尋詞的位置，找不到回傳 -1"""
+        if not isinstance(word, str):
+            return -1
+        target = word.encode('utf-8')
+        i = bisect.bisect_left(range(self._count), target, key=self.key_bytes)
+        if i < self._count and self.key_bytes(i) == target:
+            return i
+        return -1
+
+    def __getitem__(self, word):
+        i = self.index_of(word)
+        if i < 0:
+            raise KeyError(word)
+        return self.record_at(i)
+
+    def __contains__(self, word):
+        return self.index_of(word) >= 0
+
+    def __iter__(self):
+        for i in range(self._count):
+            yield self.key_at(i)
+
+    def __len__(self):
+        return self._count
+
+    def close(self):
+        self._mm.close()
+
+
+def open_lexicon(csv_path, lexicon_path=None):
+    """開啟編譯詞典；檔案不存在或比 CSV 舊時先重新編譯"""
+    if lexicon_path is None:
+        lexicon_path = os.path.join(os.path.dirname(csv_path), LEXICON_FILENAME)
+
+    if not os.path.exists(lexicon_path) or os.path.getmtime(lexicon_path) < os.path.getmtime(csv_path):
+        count = compile_lexicon(csv_path, lexicon_path)
+        print(f"✓ 已編譯 TOCFL 詞典 ({count} 個詞彙) -> {lexicon_path}")
+
+    return TOCFLLexicon(lexicon_path)
 
 
 class TOCFLVocab:
-    def __init__(self, csv_path=None):
+    def __init__(self, csv_path=None, lexicon_path=None):
         if csv_path is None:
             # 預設路徑
-            csv_path = os.path.join(os.path.dirname(__file__), '14452詞語表202504.csv')
+            csv_path = os.path.join(os.path.dirname(__file__), CSV_FILENAME)
 
         self.vocab_dict = {}
-        self.load_vocab(csv_path)
+        try:
+            self.vocab_dict = open_lexicon(csv_path, lexicon_path)
+            print(f"✓ 成功載入 {len(self.vocab_dict)} 個 TOCFL 詞彙 (mmap)")
+        except Exception as e:
+            # 唯讀檔案系統等無法編譯的環境，退回直接解析 CSV
+            print(f"✗ 無法使用編譯詞典，改為解析 CSV: {e}")
+            self.load_vocab(csv_path)
 
     def load_vocab(self, csv_path):
         """載入 TOCFL 詞彙表"""
         try:
-            with open(csv_path, 'r', encoding='utf-8-sig') as f:
-                reader = csv.DictReader(f)
-                for row in reader:
-                    word = row.get('word', '').strip()
-                    # 處理「詞1/詞2」格式，分別存儲
-                    words = word.split('/')
-                    for w in words:
-                        w = w.strip()
-                        if w:
-                            self.vocab_dict[w] = {
-                                'level': row.get('deng', ''),
-                                'grade': row.get('ji', ''),
-                                'pinyin': row.get('pinyin', ''),
-                                'situation': row.get('situation', '')
-                            }
+            self.vocab_dict = _parse_csv(csv_path)
             print(f"✓ 成功載入 {len(self.vocab_dict)} 個 TOCFL 詞彙")
         except Exception as e:
             print(f"✗ 載入 TOCFL 詞彙表失敗: {e}")
@@ -62,3 +225,15 @@ def get_tocfl_vocab():
     if tocfl_vocab is None:
         tocfl_vocab = TOCFLVocab()
     return tocfl_vocab
+
+
+if __name__ == '__main__':
+    # 建置步驟：python tocfl_loader.py build [csv_path] [out_path]
+    if len(sys.argv) < 2 or sys.argv[1] != 'build':
+        print("用法: python tocfl_loader.py build [csv_path] [out_path]")
+        sys.exit(1)
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    src = sys.argv[2] if len(sys.argv) > 2 else os.path.join(base_dir, CSV_FILENAME)
+    dst = sys.argv[3] if len(sys.argv) > 3 else os.path.join(base_dir, LEXICON_FILENAME)
+    count = compile_lexicon(src, dst)
+    print(f"✓ 已編譯 {count} 個 TOCFL 詞彙 -> {dst}")
@@ -0,0 +1,155 @@
+"""
+TOCFL 詞典分詞器
+以 TOCFL 詞彙建立字典樹（trie），對任意中文文字做正向／逆向最大匹配，
+不需呼叫 Gemini 即可在本地完成分詞與級數標註
+"""
+import re
+from tocfl_loader import get_tocfl_vocab
+
+
+# 字典樹中標記「到此為一個完整詞」的鍵，值為對應的詞彙表 key 列表
+_END = '\0'
+
+# 中文字元（含擴充 A 區與相容漢字）連續段落，或英文、數字連續段落
+_TOKEN_RUN = re.compile(r'([㐀-䶿一-鿿豈-﫿]+)|([A-Za-z0-9]+)')
+# 「和1」「好2」等破音字編號
+_HOMOGRAPH_SUFFIX = re.compile(r'\d+$')
+# 「沒(有)用」「有助（於）」等可省略字
+_OPTIONAL_PART = re.compile(r'[(（]([^)）]*)[)）]')
+
+
+def surface_forms(key):
+    """將詞彙表 key 還原為文章中實際出現的寫法"""
+    word = _HOMOGRAPH_SUFFIX.sub('', key)
+    match = _OPTIONAL_PART.search(word)
+    if not match:
+        return [word] if word else []
+    full = word[:match.start()] + match.group(1) + word[match.end():]
+    short = word[:match.start()] + word[match.end():]
+    return [w for w in (full, short) if w]
+
+
+class TOCFLSegmenter:
+    def __init__(self, vocab_keys):
+        self.forward_trie = {}
+        self.backward_trie = {}
+        self.max_word_len = 0
+        count = 0
+        for key in vocab_keys:
+            for form in surface_forms(key):
+                self._insert(self.forward_trie, form, key)
+                self._insert(self.backward_trie, form[::-1], key)
+                self.max_word_len = max(self.max_word_len, len(form))
+                count += 1
+        self.word_count = count
+
+    @staticmethod
+    def _insert(trie, word, key):
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node.setdefault(_END, []).append(key)
+
+    def lookup(self, word):
+        """查詢文章寫法對應的詞彙表 key 列表（例如「好」→ ['好1', '好2']）"""
+        node = self.forward_trie
+        for ch in word:
+            node = node.get(ch)
+            if node is None:
+                return []
+        return node.get(_END, [])
+
+    def forward_max_match(self, text):
+        """正向最大匹配，回傳詞列表；詞典外的字單獨成詞"""
+        tokens = []
+        i = 0
+        n = len(text)
+        while i < n:
+            node = self.forward_trie
+            end = i + 1
+            j = i
+            while j < n:
+                node = node.get(text[j])
+                if node is None:
+                    break
+                j += 1
+                if _END in node:
+                    end = j
+            tokens.append(text[i:end])
+            i = end
+        return tokens
+
+    def backward_max_match(self, text):
+        """逆向最大匹配，回傳詞列表；詞典外的字單獨成詞"""
+        tokens = []
+        i = len(text)
+        while i > 0:
+            node = self.backward_trie
+            start = i - 1
+            j = i
+            while j > 0:
+                node = node.get(text[j - 1])
+                if node is None:
+                    break
+                j -= 1
+                if _END in node:
+                    start = j
+            tokens.append(text[start:i])
+            i = start
+        tokens.reverse()
+        return tokens
+
+    def _segment_han(self, text):
+        """雙向最大匹配：取詞數較少者，同詞數時取單字較少者，再相同時取逆向結果"""
+        forward = self.forward_max_match(text)
+        backward = self.backward_max_match(text)
+        if len(forward) != len(backward):
+            return forward if len(forward) < len(backward) else backward
+        forward_singles = sum(1 for w in forward if len(w) == 1)
+        backward_singles = sum(1 for w in backward if len(w) == 1)
+        return forward if forward_singles < backward_singles else backward
+
+    def tokenize(self, text):
+        """分詞並回傳 (詞, 起始位置) 列表；標點與空白會被略過"""
+        tokens = []
+        for match in _TOKEN_RUN.finditer(text):
+            han_run, alnum_run = match.groups()
+            if han_run is None:
+                tokens.append((alnum_run, match.start()))
+                continue
+            offset = match.start()
+            for word in self._segment_han(han_run):
+                tokens.append((word, offset))
+                offset += len(word)
+        return tokens
+
+    def segment(self, text):
+        """分詞，回傳詞列表"""
+        return [word for word, _ in self.tokenize(text)]
+
+    def annotate(self, text):
+        """分詞並標註 TOCFL 級數；詞典外的詞 tocfl_level 為「未分級」"""
+        vocab = get_tocfl_vocab()
+        results = []
+        for word, start in self.tokenize(text):
+            keys = self.lookup(word)
+            info = vocab.get_word_info(keys[0]) if keys else None
+            results.append({
+                'word': word,
+                'start': start,
+                'end': start + len(word),
+                'vocab_key': keys[0] if keys else None,
+                'tocfl_level': f"{info['level']} {info['grade']}" if info else '未分級'
+            })
+        return results
+
+
+# 全局實例
+tocfl_segmenter = None
+
+def get_tocfl_segmenter():
+    """獲取全局 TOCFL 分詞器實例"""
+    global tocfl_segmenter
+    if tocfl_segmenter is None:
+        tocfl_segmenter = TOCFLSegmenter(get_tocfl_vocab().vocab_dict.keys())
+    return tocfl_segmenter
@@ -0,0 +1,135 @@
+"""
+單字語音快取
+/api/tts/speak 生成的 WAV 以 (文字, 語言, 聲音, 模型) 的 SHA-256 為鍵存到磁碟，
+常用詞彙只需合成一次，之後直接讀檔回傳；索引（大小、最近使用時間、ETag）存在 SQLite，
+總容量超過上限時淘汰最久未使用的音檔。ETag 為音檔內容的雜湊（強 ETag）
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from result_cache import normalize_text
+
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'tts')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256MB
+
+
+def tts_cache_key(text, lang, voice, model):
+    """計算語音快取鍵（64 位十六進位字串，同時作為檔名）"""
+    raw = json.dumps([normalize_text(text), lang, voice, model], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+
+class TTSAudioCache:
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        # WAL 模式讓多個 worker 進程共用同一個索引
+        self._conn = sqlite3.connect(os.path.join(directory, 'index.sqlite3'), check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS audio (
+                key TEXT PRIMARY KEY,
+                etag TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_audio_last_used ON audio (last_used)')
+        self._conn.commit()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], f'{key}.wav')
+
+    def get(self, key):
+        """回傳 (WAV bytes, etag)；未命中時回傳 None"""
+        with self._lock:
+            row = self._conn.execute('SELECT etag FROM audio WHERE key = ?', (key,)).fetchone()
+            if row is not None:
+                try:
+                    with open(self._path(key), 'rb') as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    # 檔案被外部刪除：移除索引，視為未命中
+                    self._conn.execute('DELETE FROM audio WHERE key = ?', (key,))
+                    self._conn.commit()
+                    row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._conn.execute('UPDATE audio SET last_used = ? WHERE key = ?', (time.time(), key))
+            self._conn.commit()
+            self.hits += 1
+        return data, row[0]
+
+    def put(self, key, data):
+        """寫入 WAV 並回傳其 ETag，總容量超過上限時淘汰最久未使用的音檔"""
+        etag = hashlib.sha256(data).hexdigest()[:32]
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # 先寫暫存檔再改名，其他進程不會讀到寫一半的檔案
+        tmp = f'{path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                'INSERT OR REPLACE INTO audio (key, etag, size, created_at, last_used) VALUES (?, ?, ?, ?, ?)',
+                (key, etag, len(data), now, now)
+            )
+            self._evict()
+            self._conn.commit()
+        return etag
+
+    def _evict(self):
+        total = self._conn.execute('SELECT COALESCE(SUM(size), 0) FROM audio').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # 依最近使用時間由舊到新淘汰，直到低於容量上限
+        doomed = []
+        for key, size in self._conn.execute('SELECT key, size FROM audio ORDER BY last_used').fetchall():
+            if total <= self.max_bytes:
+                break
+            doomed.append(key)
+            total -= size
+        self._conn.executemany('DELETE FROM audio WHERE key = ?', [(key,) for key in doomed])
+        for key in doomed:
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        """命中統計（hits/misses 為本進程累計）"""
+        with self._lock:
+            count, total = self._conn.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0) FROM audio'
+            ).fetchone()
+        return {'hits': self.hits, 'misses': self.misses, 'entries': count, 'bytes': total}
+
+
+# 全局實例
+tts_cache = None
+
+def get_tts_cache():
+    """獲取全局單字語音快取實例"""
+    global tts_cache
+    if tts_cache is None:
+        tts_cache = TTSAudioCache(
+            directory=os.environ.get('TTS_CACHE_PATH', DEFAULT_CACHE_DIR),
+            max_bytes=int(os.environ.get('TTS_CACHE_MAX_BYTES', DEFAULT_MAX_BYTES))
+        )
+    return tts_cache
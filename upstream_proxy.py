@@ -0,0 +1,119 @@
+"""
+反向代理
+auth_app 的 /korean-app、/chinese-app 轉發到本機的韓文（5000）與中文（5001）服務：
+- 共用一個 requests.Session，連線池保持 keep-alive，不必每個請求重新建立 TCP 連線
+- 回應本體以原始位元組串流轉發（不解壓、不解碼再編碼），Content-Encoding / Content-Length 原樣保留
+- 連線與讀取逾時，上游無回應時回傳 503／504
+- 請求與回應共用同一套標頭過濾（逐跳標頭、Host、由代理注入的用戶標頭）
+"""
+import os
+import threading
+import urllib.parse
+from http.cookiejar import DefaultCookiePolicy
+
+import requests
+from requests.adapters import HTTPAdapter
+from flask import Response, jsonify, request, session
+
+
+PROXY_CONNECT_TIMEOUT = float(os.environ.get('PROXY_CONNECT_TIMEOUT', 5))
+# 分析請求可能需要數分鐘
+PROXY_READ_TIMEOUT = float(os.environ.get('PROXY_READ_TIMEOUT', 300))
+PROXY_POOL_SIZE = int(os.environ.get('PROXY_POOL_SIZE', 32))
+CHUNK_SIZE = 64 * 1024
+
+# 代理前綴 -> (上游網址, 服務名稱)
+UPSTREAMS = {
+    '/korean-app': ('http://localhost:5000', '韓文新聞系統'),
+    '/chinese-app': ('http://localhost:5001', '中文詞彙系統')
+}
+
+# RFC 7230 逐跳標頭，只對單一連線有效，不可轉發
+HOP_BY_HOP_HEADERS = {
+    'connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization',
+    'te', 'trailer', 'trailers', 'transfer-encoding', 'upgrade'
+}
+# 由代理依 session 重新設定，不接受瀏覽器傳入的值
+_REQUEST_EXCLUDED = HOP_BY_HOP_HEADERS | {'host', 'content-length', 'x-user-id', 'x-username'}
+_RESPONSE_EXCLUDED = HOP_BY_HOP_HEADERS
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def get_proxy_session():
+    """獲取共用的 requests.Session（連線池大小 PROXY_POOL_SIZE）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            session_ = requests.Session()
+            adapter = HTTPAdapter(pool_connections=4, pool_maxsize=PROXY_POOL_SIZE, max_retries=0)
+            session_.mount('http://', adapter)
+            session_.mount('https://', adapter)
+            # 上游的 Set-Cookie 直接轉給瀏覽器，不可留在共用 Session 中帶給其他用戶
+            session_.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+            session_.trust_env = False
+            _session = session_
+    return _session
+
+
+def request_headers(items, user_id, username):
+    """轉發給上游的請求標頭（items 為瀏覽器送來的 (name, value)）"""
+    headers = {name: value for name, value in items if name.lower() not in _REQUEST_EXCLUDED}
+    headers['X-User-ID'] = user_id
+    # URL 編碼 username 以避免中文字符導致 Latin-1 編碼錯誤
+    headers['X-Username'] = urllib.parse.quote(username) if username else ''
+    return headers
+
+
+def response_headers(items):
+    """回傳給瀏覽器的回應標頭（items 為上游回應的 (name, value)）"""
+    items = list(items)
+    headers = [(name, value) for name, value in items if name.lower() not in _RESPONSE_EXCLUDED]
+    # 確保 HTML / JSON 回應標示 UTF-8（只改標頭，不動本體）
+    content_type = next((value for name, value in items if name.lower() == 'content-type'), '')
+    if (content_type.startswith('text/html') or 'application/json' in content_type) and 'charset' not in content_type:
+        headers = [(name, value) for name, value in headers if name.lower() != 'content-type']
+        headers.append(('Content-Type', f'{content_type}; charset=utf-8'))
+    return headers
+
+
+def proxy_request(prefix, path):
+    """把目前的請求轉發到 UPSTREAMS[prefix] 的 path，串流回傳上游回應"""
+    base_url, service_name = UPSTREAMS[prefix]
+    target_url = f'{base_url}/{path}'
+    if request.query_string:
+        target_url += f'?{request.query_string.decode()}'
+
+    try:
+        upstream = get_proxy_session().request(
+            request.method,
+            target_url,
+            headers=request_headers(request.headers, session.get('user_id', ''), session.get('username', '')),
+            data=request.get_data() or None,
+            stream=True,
+            timeout=(PROXY_CONNECT_TIMEOUT, PROXY_READ_TIMEOUT)
+        )
+    except requests.exceptions.Timeout as e:
+        return jsonify({'error': f'{service_name}回應逾時', 'details': str(e)}), 504
+    except requests.exceptions.RequestException as e:
+        return jsonify({'error': f'無法連接到{service_name}', 'details': str(e)}), 503
+
+    finished = []
+
+    def body():
+        # decode_content=False：壓縮過的本體原樣轉發
+        for chunk in upstream.raw.stream(CHUNK_SIZE, decode_content=False):
+            yield chunk
+        # 本體已讀完，連線可放回連線池重用
+        finished.append(True)
+        upstream.raw.release_conn()
+
+    def close():
+        # 用戶端中途斷線時本體未讀完，該連線不可重用
+        if not finished:
+            upstream.close()
+
+    response = Response(body(), upstream.status_code, response_headers(upstream.raw.headers.items()))
+    response.call_on_close(close)
+    return response
@@ -0,0 +1,434 @@
+"""
+個人詞彙總圖譜
+把用戶所有收藏的詞彙（跨多次分析）合成一張知識圖譜，存在本地 SQLite：
+- 收藏／刪除單字時只新增或移除對應的節點與連線，不重新計算整張圖；
+  增量更新在背景執行緒中進行，收藏請求只遞增一個變更計數
+- 新詞只與既有詞彙做一次向量化評分（graph_edges.score_rows），保留 top-k 連線
+- 讀取時依頁數或 TOCFL 級數取出子圖，收藏數千個詞的用戶也能快速載入
+
+第一次查詢某用戶的圖譜時，才由 Supabase 的收藏清單整批建立；
+讀取清單期間若有收藏增刪（變更計數改變）會重新讀取，不會漏掉建立期間收藏的詞
+"""
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from graph_edges import score_rows, top_k_neighbours, link_values
+
+
+DEFAULT_GRAPH_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'vocab_graph.sqlite3')
+DEFAULT_TOP_K = 4
+DEFAULT_MIN_SCORE = 0.075  # 低於兩個雙字詞只共用一個字時的分數，跨文章的收藏主要靠共用字相連
+DEFAULT_PAGE_SIZE = 150
+MAX_PAGE_SIZE = 500
+# 整批建立時每次評分的詞數（矩陣大小為 區塊 × 既有詞數）
+_BUILD_BLOCK = 256
+# 整批建立期間一直有收藏增刪時，最多重新讀取清單的次數
+BUILD_ATTEMPTS = 3
+
+# 各語言收藏資料中的詞彙欄位
+HEADWORD_FIELDS = {'ko': 'korean', 'zh': 'chinese'}
+# 不放進節點資料的資料庫欄位
+_ROW_FIELDS = ('id', 'user_id')
+
+
+def _level_number(word):
+    """中文收藏的級數（'1'～'7'），未分級回傳空字串"""
+    return str(word.get('level_number') or '').strip()
+
+
+class VocabGraph:
+    def __init__(self, path=DEFAULT_GRAPH_PATH, top_k=DEFAULT_TOP_K, min_score=DEFAULT_MIN_SCORE):
+        self.path = path
+        self.top_k = top_k
+        self.min_score = min_score
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS vocab_graphs (
+                user_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                version INTEGER NOT NULL,
+                built_at REAL NOT NULL,
+                PRIMARY KEY (user_id, language)
+            )
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS vocab_nodes (
+                user_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                headword TEXT NOT NULL,
+                level TEXT NOT NULL,
+                level_category TEXT NOT NULL,
+                situation TEXT,
+                saved_at TEXT NOT NULL,
+                data TEXT NOT NULL,
+                PRIMARY KEY (user_id, language, headword)
+            )
+        ''')
+        self._conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_vocab_nodes_saved_at
+            ON vocab_nodes (user_id, language, saved_at)
+        ''')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS vocab_edges (
+                user_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                source TEXT NOT NULL,
+                target TEXT NOT NULL,
+                score REAL NOT NULL,
+                PRIMARY KEY (user_id, language, source, target)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_vocab_edges_target ON vocab_edges (user_id, language, target)')
+        # 收藏變更計數：不隨圖譜重建刪除，整批建立時用來偵測讀取清單期間的寫入
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS vocab_changes (
+                user_id TEXT NOT NULL,
+                language TEXT NOT NULL,
+                changes INTEGER NOT NULL,
+                PRIMARY KEY (user_id, language)
+            )
+        ''')
+        self._conn.commit()
+
+    # ---------- 狀態 ----------
+
+    def version(self, user_id, language):
+        """圖譜版本號（每次增刪都會遞增）；尚未建立時回傳 None"""
+        with self._lock:
+            row = self._conn.execute(
+                'SELECT version FROM vocab_graphs WHERE user_id = ? AND language = ?', (user_id, language)
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_built(self, user_id, language):
+        return self.version(user_id, language) is not None
+
+    def _changes(self, user_id, language):
+        row = self._conn.execute(
+            'SELECT changes FROM vocab_changes WHERE user_id = ? AND language = ?', (user_id, language)
+        ).fetchone()
+        return row[0] if row else 0
+
+    def record_change(self, user_id, language):
+        """記錄一次收藏增刪（在收藏請求中呼叫，只寫一列）"""
+        with self._lock:
+            self._conn.execute(
+                'INSERT INTO vocab_changes (user_id, language, changes) VALUES (?, ?, 1) '
+                'ON CONFLICT (user_id, language) DO UPDATE SET changes = changes + 1',
+                (user_id, language)
+            )
+            self._conn.commit()
+
+    def _bump(self, user_id, language):
+        self._conn.execute(
+            'INSERT INTO vocab_graphs (user_id, language, version, built_at) VALUES (?, ?, 1, ?) '
+            'ON CONFLICT (user_id, language) DO UPDATE SET version = version + 1',
+            (user_id, language, time.time())
+        )
+
+    # ---------- 寫入 ----------
+
+    def rebuild(self, user_id, language, words):
+        """以完整收藏清單重新建立圖譜"""
+        with self._lock:
+            self._replace(user_id, language, words)
+            self._conn.commit()
+
+    def build(self, user_id, language, load_words, attempts=BUILD_ATTEMPTS):
+        """以 load_words(user_id) 取得的收藏清單建立圖譜（第一次查詢時使用），回傳是否成功
+
+        讀取清單前後的變更計數不同時，清單可能已漏掉剛收藏或剛刪除的詞，重新讀取。
+        比對與寫入在同一個 IMMEDIATE 交易中，其他進程的 record_change 只能排在建立之前
+        （會被比對發現）或之後（此時圖譜已建立，增量更新照常套用）
+        """
+        for _ in range(attempts):
+            with self._lock:
+                started = self._changes(user_id, language)
+            words = load_words(user_id)
+            with self._lock:
+                self._conn.execute('BEGIN IMMEDIATE')
+                try:
+                    if self._changes(user_id, language) != started:
+                        self._conn.rollback()
+                        continue
+                    self._replace(user_id, language, words)
+                    self._conn.commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
+            return True
+        return False
+
+    def _replace(self, user_id, language, words):
+        words = sorted(words, key=lambda word: word.get('saved_at') or '')
+        for table in ('vocab_nodes', 'vocab_edges', 'vocab_graphs'):
+            self._conn.execute(f'DELETE FROM {table} WHERE user_id = ? AND language = ?', (user_id, language))
+        self._insert(user_id, language, words)
+        self._bump(user_id, language)   # 沒有任何收藏時也標記為已建立
+
+    def add_words(self, user_id, language, words):
+        """新增收藏的詞彙，只計算新詞與既有詞彙之間的連線"""
+        with self._lock:
+            self._insert(user_id, language, words)
+            self._conn.commit()
+
+    def remove_words(self, user_id, language, headwords):
+        """移除詞彙及其連線；因此失去所有連線的詞會重新找鄰居"""
+        headwords = list(dict.fromkeys(h for h in headwords if h))
+        if not headwords:
+            return
+        placeholders = ','.join('?' * len(headwords))
+        with self._lock:
+            neighbours = {
+                word
+                for row in self._conn.execute(
+                    f'SELECT source, target FROM vocab_edges WHERE user_id = ? AND language = ? '
+                    f'AND (source IN ({placeholders}) OR target IN ({placeholders}))',
+                    [user_id, language, *headwords, *headwords]
+                ).fetchall()
+                for word in row
+            } - set(headwords)
+
+            for table, column in (('vocab_nodes', 'headword'), ('vocab_edges', 'source'), ('vocab_edges', 'target')):
+                self._conn.execute(
+                    f'DELETE FROM {table} WHERE user_id = ? AND language = ? AND {column} IN ({placeholders})',
+                    [user_id, language, *headwords]
+                )
+
+            nodes = self._load_nodes(user_id, language)
+            linked = self._linked(user_id, language, neighbours)
+            orphaned = [i for i, node in enumerate(nodes) if node[0] in neighbours and node[0] not in linked]
+            if orphaned:
+                self._link(user_id, language, nodes, orphaned)
+            self._bump(user_id, language)
+            self._conn.commit()
+
+    def _insert(self, user_id, language, words):
+        field = HEADWORD_FIELDS[language]
+        nodes = self._load_nodes(user_id, language)
+        known = {node[0] for node in nodes}
+
+        new_words = {}
+        for word in words:
+            headword = word.get(field)
+            if headword and headword not in known:
+                new_words[headword] = word
+        if not new_words:
+            return
+
+        situations = self._situations(language, list(new_words))
+        rows = []
+        for headword, word in new_words.items():
+            level = _level_number(word) if language == 'zh' else ''
+            situation = situations.get(headword)
+            rows.append((
+                user_id, language, headword, level,
+                (word.get('level_category') or '未分級') if language == 'zh' else '',
+                situation,
+                word.get('saved_at') or time.strftime('%Y-%m-%dT%H:%M:%S'),
+                json.dumps({k: v for k, v in word.items() if k not in _ROW_FIELDS}, ensure_ascii=False)
+            ))
+            nodes.append((headword, level or None, situation))
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO vocab_nodes '
+            '(user_id, language, headword, level, level_category, situation, saved_at, data) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+            rows
+        )
+
+        # 依序分區塊評分：每個區塊只與它之前的詞（含區塊本身）比較
+        first_new = len(nodes) - len(new_words)
+        for start in range(first_new, len(nodes), _BUILD_BLOCK):
+            self._link(user_id, language, nodes[:start + _BUILD_BLOCK],
+                       list(range(start, min(start + _BUILD_BLOCK, len(nodes)))))
+        self._bump(user_id, language)
+
+    def _link(self, user_id, language, nodes, indices):
+        """為 nodes[indices] 與 nodes 中其他詞建立 top-k 連線"""
+        headwords = [node[0] for node in nodes]
+        rows_nodes = [nodes[i] for i in indices]
+        with_levels = language == 'zh'
+        scores = score_rows(
+            [node[0] for node in rows_nodes], headwords,
+            levels=[node[1] for node in rows_nodes] if with_levels else None,
+            other_levels=[node[1] for node in nodes] if with_levels else None,
+            situations=[node[2] for node in rows_nodes] if with_levels else None,
+            other_situations=[node[2] for node in nodes] if with_levels else None
+        )
+        scores[np.arange(len(indices)), indices] = 0.0
+
+        sources, targets, picked = top_k_neighbours(scores, self.top_k, self.min_score)
+        edges = []
+        for r, c, score in zip(sources.tolist(), targets.tolist(), picked.tolist()):
+            a, b = sorted((headwords[indices[r]], headwords[c]))
+            edges.append((user_id, language, a, b, round(score, 4)))
+        self._conn.executemany(
+            'INSERT OR REPLACE INTO vocab_edges (user_id, language, source, target, score) VALUES (?, ?, ?, ?, ?)',
+            edges
+        )
+
+    def _load_nodes(self, user_id, language):
+        """[(詞彙, 級數或 None, 情境或 None)]，依收藏時間排序"""
+        return [
+            (headword, level or None, situation)
+            for headword, level, situation in self._conn.execute(
+                'SELECT headword, level, situation FROM vocab_nodes WHERE user_id = ? AND language = ? '
+                'ORDER BY saved_at, headword',
+                (user_id, language)
+            ).fetchall()
+        ]
+
+    def _linked(self, user_id, language, headwords):
+        """headwords 中仍有連線的詞"""
+        if not headwords:
+            return set()
+        headwords = list(headwords)
+        placeholders = ','.join('?' * len(headwords))
+        rows = self._conn.execute(
+            f'SELECT source, target FROM vocab_edges WHERE user_id = ? AND language = ? '
+            f'AND (source IN ({placeholders}) OR target IN ({placeholders}))',
+            [user_id, language, *headwords, *headwords]
+        ).fetchall()
+        return {word for row in rows for word in row} & set(headwords)
+
+    @staticmethod
+    def _situations(language, headwords):
+        if language != 'zh':
+            return {}
+        from tocfl_loader import get_tocfl_vocab
+        vocab = get_tocfl_vocab()
+        return {word: (vocab.get_word_info(word) or {}).get('situation') or None for word in headwords}
+
+    # ---------- 讀取 ----------
+
+    def subgraph(self, user_id, language, page=1, page_size=DEFAULT_PAGE_SIZE, level=None, category=None):
+        """取出一頁（依收藏時間由新到舊）或指定級數的子圖，格式與單篇分析的圖譜相同"""
+        page_size = max(1, min(int(page_size), MAX_PAGE_SIZE))
+        page = max(1, int(page))
+
+        where = 'user_id = ? AND language = ?'
+        params = [user_id, language]
+        if level is not None:
+            where += ' AND level = ?'
+            params.append(str(level))
+        if category:
+            where += ' AND level_category = ?'
+            params.append(category)
+
+        with self._lock:
+            total = self._conn.execute(f'SELECT COUNT(*) FROM vocab_nodes WHERE {where}', params).fetchone()[0]
+            rows = self._conn.execute(
+                f'SELECT headword, level, data FROM vocab_nodes WHERE {where} '
+                f'ORDER BY saved_at DESC, headword LIMIT ? OFFSET ?',
+                [*params, page_size, (page - 1) * page_size]
+            ).fetchall()
+            index = {headword: i for i, (headword, _, _) in enumerate(rows)}
+            edges = []
+            if index:
+                placeholders = ','.join('?' * len(index))
+                edges = self._conn.execute(
+                    f'SELECT source, target, score FROM vocab_edges WHERE user_id = ? AND language = ? '
+                    f'AND source IN ({placeholders}) AND target IN ({placeholders})',
+                    [user_id, language, *index, *index]
+                ).fetchall()
+
+        nodes = []
+        for i, (headword, level_number, data) in enumerate(rows):
+            node = json.loads(data)
+            node['id'] = i
+            if language == 'zh':
+                node['tocfl_level'] = node.get('level') or '未分級'
+                node['group'] = int(level_number) - 1 if level_number.isdigit() and 1 <= int(level_number) <= 7 else 7
+            else:
+                node['group'] = i % 5
+            nodes.append(node)
+
+        values = link_values([score for _, _, score in edges]).tolist() if edges else []
+        links = [
+            {'source': index[source], 'target': index[target], 'value': value, 'score': score}
+            for (source, target, score), value in zip(edges, values)
+        ]
+        return {
+            'nodes': nodes,
+            'links': links,
+            'page': page,
+            'page_size': page_size,
+            'pages': max(1, -(-total // page_size)),
+            'total': total
+        }
+
+
+# 全局實例
+vocab_graph = None
+
+def get_vocab_graph():
+    """獲取全局個人詞彙圖譜實例"""
+    global vocab_graph
+    if vocab_graph is None:
+        vocab_graph = VocabGraph(path=os.environ.get('VOCAB_GRAPH_PATH', DEFAULT_GRAPH_PATH))
+    return vocab_graph
+
+
+# ==================== 收藏變更的增量更新 ====================
+
+# 單一背景執行緒依序套用，同一用戶的增刪順序不變
+_updates = queue.Queue()
+_updater = None
+_updater_lock = threading.Lock()
+
+
+def _apply_change(language, user_id, action, words):
+    """已建立的圖譜才做增量更新（未建立的會在第一次查詢時整批建立）"""
+    graph = get_vocab_graph()
+    if not graph.is_built(user_id, language):
+        return
+    if action == 'add':
+        graph.add_words(user_id, language, words)
+    elif action == 'delete':
+        graph.remove_words(user_id, language, words)
+
+
+def _run_updates():
+    while True:
+        change = _updates.get()
+        try:
+            _apply_change(*change)
+        except Exception as e:
+            print(f"✗ 詞彙圖譜更新失敗: {e}")
+        finally:
+            _updates.task_done()
+
+
+def _start_updater():
+    # 第一次有收藏變更時才啟動執行緒，避免 gunicorn fork 前就建立執行緒
+    global _updater
+    with _updater_lock:
+        if _updater is None:
+            _updater = threading.Thread(target=_run_updates, name='vocab-graph-updater', daemon=True)
+            _updater.start()
+
+
+def wait_for_updates():
+    """等待已排入的增量更新全部完成"""
+    _updates.join()
+
+
+def vocab_graph_listener(language, user_id, action, words):
+    """supabase_utils 的收藏變更回呼：請求中只記錄變更計數，評分與寫入交給背景執行緒
+
+    action 為 'add' 時 words 是收藏資料 dict 列表，'delete' 時是詞彙字串列表
+    """
+    get_vocab_graph().record_change(user_id, language)
+    _start_updater()
+    _updates.put((language, user_id, action, words))
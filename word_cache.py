@@ -0,0 +1,139 @@
+"""
+單字解釋快取
+以 (語言, 詞彙) 為鍵，把 Gemini 產生的翻譯、定義、例句存在本地 SQLite，
+重複出現的詞彙直接從磁碟讀取，不必再請模型重新生成
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cache', 'word_cache.sqlite3')
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_TTL = 30 * 24 * 3600  # 30 天
+
+# 不寫入快取的欄位（每次由本地重新計算）
+_VOLATILE_FIELDS = ('tocfl_level',)
+
+
+class WordCache:
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # WAL 模式讓多個 worker 進程可同時讀取同一個快取檔
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('''
+            CREATE TABLE IF NOT EXISTS word_cache (
+                language TEXT NOT NULL,
+                headword TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL,
+                PRIMARY KEY (language, headword)
+            )
+        ''')
+        self._conn.execute('CREATE INDEX IF NOT EXISTS idx_word_cache_last_used ON word_cache (last_used)')
+        self._conn.commit()
+
+    def get_many(self, language, headwords):
+        """批次查詢，回傳 {詞彙: 解釋}；過期的項目視為未命中"""
+        headwords = list(dict.fromkeys(headwords))
+        if not headwords:
+            return {}
+
+        now = time.time()
+        placeholders = ','.join('?' * len(headwords))
+        with self._lock:
+            rows = self._conn.execute(
+                f'SELECT headword, data FROM word_cache '
+                f'WHERE language = ? AND created_at >= ? AND headword IN ({placeholders})',
+                [language, now - self.ttl, *headwords]
+            ).fetchall()
+
+            found = {headword: json.loads(data) for headword, data in rows}
+            if found:
+                # 更新最近使用時間，供 LRU 淘汰使用
+                self._conn.execute(
+                    f'UPDATE word_cache SET last_used = ? '
+                    f'WHERE language = ? AND headword IN ({",".join("?" * len(found))})',
+                    [now, language, *found]
+                )
+                self._conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(headwords) - len(found)
+        return found
+
+    def get(self, language, headword):
+        """查詢單一詞彙，未命中時回傳 None"""
+        return self.get_many(language, [headword]).get(headword)
+
+    def put_many(self, language, entries):
+        """批次寫入 {詞彙: 解釋}，超過容量時淘汰最久未使用的項目"""
+        if not entries:
+            return
+
+        now = time.time()
+        rows = []
+        for headword, entry in entries.items():
+            data = {k: v for k, v in entry.items() if k not in _VOLATILE_FIELDS}
+            rows.append((language, headword, json.dumps(data, ensure_ascii=False), now, now))
+
+        with self._lock:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO word_cache (language, headword, data, created_at, last_used) '
+                'VALUES (?, ?, ?, ?, ?)',
+                rows
+            )
+            self._conn.execute('DELETE FROM word_cache WHERE created_at < ?', (now - self.ttl,))
+            overflow = self._count() - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    'DELETE FROM word_cache WHERE rowid IN '
+                    '(SELECT rowid FROM word_cache ORDER BY last_used LIMIT ?)',
+                    (overflow,)
+                )
+            self._conn.commit()
+
+    def put(self, language, headword, entry):
+        self.put_many(language, {headword: entry})
+
+    def _count(self):
+        return self._conn.execute('SELECT COUNT(*) FROM word_cache').fetchone()[0]
+
+    def stats(self):
+        """命中統計（hits/misses 為本進程累計）"""
+        with self._lock:
+            entries = self._count()
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / total, 3) if total else 0.0,
+            'entries': entries
+        }
+
+
+# 全局實例
+word_cache = None
+
+def get_word_cache():
+    """獲取全局單字解釋快取實例"""
+    global word_cache
+    if word_cache is None:
+        word_cache = WordCache(
+            path=os.environ.get('WORD_CACHE_PATH', DEFAULT_CACHE_PATH),
+            max_entries=int(os.environ.get('WORD_CACHE_MAX_ENTRIES', DEFAULT_MAX_ENTRIES)),
+            ttl=int(os.environ.get('WORD_CACHE_TTL', DEFAULT_TTL))
+        )
+    return word_cache